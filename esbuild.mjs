@@ -64,6 +64,17 @@ const latexServerOpts = {
     minify: false,
 };
 
+const renderServiceOpts = {
+    entryPoints: ["ts/server/render-service.ts"],
+    bundle: true,
+    outfile: "scripts/render-service.mjs",
+    platform: "node",
+    format: "esm",
+    target: "node20",
+    packages: "external",
+    minify: false,
+};
+
 const cssOpts = {
     entryPoints: ["static/css/main.css"],
     outfile: "static/css/main.min.css",
@@ -76,14 +87,17 @@ if (isWatch) {
     const ctx = await context(opts);
     const serverCtx = await context(serverOpts);
     const latexServerCtx = await context(latexServerOpts);
+    const renderServiceCtx = await context(renderServiceOpts);
     await ctx.watch();
     await serverCtx.watch();
     await latexServerCtx.watch();
+    await renderServiceCtx.watch();
     console.log("Watching for changes...");
 } else {
     await build(opts);
     await build(serverOpts);
     await build(latexServerOpts);
+    await build(renderServiceOpts);
     if (isProduction) {
         await build(cssOpts);
         console.log("Production build complete (minified JS + CSS).");
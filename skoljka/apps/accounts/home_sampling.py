@@ -1,7 +1,7 @@
 import random
 
 from django.core.cache import cache
-from django.db.models import Case, IntegerField, Q, When
+from django.db.models import Case, IntegerField, When
 
 from skoljka.apps.problems.models import Problem
 
@@ -10,17 +10,12 @@ HOME_PUBLIC_PROBLEM_IDS_TTL = 3600
 
 
 def public_home_problem_queryset(user):
-    return (
-        Problem.objects.for_user(user)
-        .filter(is_public=True)
-        .filter(Q(source__isnull=True) | Q(source__is_public=True))
-    )
+    return Problem.objects.for_user(user).filter(effectively_public=True)
 
 
 def _query_public_home_problem_ids() -> list[int]:
     return list(
-        Problem.objects.filter(is_public=True)
-        .filter(Q(source__isnull=True) | Q(source__is_public=True))
+        Problem.objects.filter(effectively_public=True)
         .order_by("id")
         .values_list("pk", flat=True)
     )
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_remove_user_grade"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="tracking_generation",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -11,6 +11,9 @@ class User(AbstractUser):
         "groups.Group", on_delete=models.SET_NULL, null=True, blank=True,
         related_name="personal_group_user",
     )
+    # Replaced whenever the user's solved/bookmarked/liked/noted problems
+    # change; keys the cached id sets in ``tracking.problem_sets``.
+    tracking_generation = models.BigIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
@@ -1,5 +1,4 @@
 import json
-from types import SimpleNamespace
 from tempfile import TemporaryDirectory
 from unittest.mock import patch
 
@@ -10,7 +9,7 @@ from skoljka.apps.accounts.challenges import _image_manifest, configured_challen
 from skoljka.apps.accounts.checks import check_registration_math_challenges
 from skoljka.apps.accounts.models import User
 from skoljka.apps.tracking.models import Submission
-from skoljka.tests.factories import make_problem, make_staff, make_user
+from skoljka.tests.factories import make_export, make_problem, make_staff, make_user
 
 
 TEST_CHALLENGES = [{"id": "test", "tex": r"10 + \sqrt{400}", "answer": "30"}]
@@ -434,7 +433,7 @@ class ProfileViewTest(TestCase):
         Like.objects.create(user=self.owner, problem=hidden)
         viewer = make_user(username="viewer")
         self.client.force_login(viewer)
-        export_pdf.return_value = SimpleNamespace(filename="liked.pdf", data=b"%PDF")
+        export_pdf.return_value = make_export("liked.pdf", b"%PDF", self.enterContext(TemporaryDirectory()))
 
         r = self.client.post(
             f"/accounts/profile/{self.owner.username}/liked/pdf/",
@@ -1,6 +1,6 @@
 from django.contrib import admin, messages
 
-from skoljka.apps.content.models import Content, ContentAttachment, ContentVersion
+from skoljka.apps.content.models import Content, ContentAttachment, ContentVersion, RenderCacheEntry
 
 
 class ContentVersionInline(admin.TabularInline):
@@ -67,3 +67,10 @@ class ContentAttachmentAdmin(admin.ModelAdmin):
     list_display = ("id", "content", "name", "mime_type", "size", "created_at")
     search_fields = ("name",)
     raw_id_fields = ("content",)
+
+
+@admin.register(RenderCacheEntry)
+class RenderCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("key", "renderer_version", "created_at")
+    list_filter = ("renderer_version",)
+    readonly_fields = ("key", "renderer_version", "html", "text", "created_at")
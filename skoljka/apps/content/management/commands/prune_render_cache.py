@@ -0,0 +1,31 @@
+"""Delete render cache entries that can no longer be hit."""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from skoljka.apps.content.models import RenderCacheEntry
+from skoljka.utils.markdown import renderer_version
+
+
+class Command(BaseCommand):
+    help = "Delete render cache entries from older renderer versions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=None,
+            help="Also delete current-version entries created more than this many days ago.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        deleted, _ = RenderCacheEntry.objects.exclude(renderer_version=renderer_version()).delete()
+        self.stdout.write(f"Deleted {deleted} RenderCacheEntry rows from older renderer versions.")
+
+        days = options["older_than_days"]
+        if days is not None:
+            cutoff = timezone.now() - timedelta(days=days)
+            deleted, _ = RenderCacheEntry.objects.filter(created_at__lt=cutoff).delete()
+            self.stdout.write(f"Deleted {deleted} RenderCacheEntry rows older than {days} days.")
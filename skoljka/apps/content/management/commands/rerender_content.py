@@ -0,0 +1,183 @@
+"""Re-render stored Content HTML after the Markdown renderer changes."""
+
+import json
+import math
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from skoljka.apps.content.models import COMPILED_FIELDS, Content, ContentCompilePlan, RenderedSource, render_sources
+from skoljka.utils.markdown import RENDER_BATCH_SIZE, renderer_version
+
+DEFAULT_CHECKPOINT = settings.BASE_DIR / "private" / "rerender_content.json"
+
+
+def _render_chunk(items: list[tuple[str, dict[str, str] | None]]) -> tuple[list[RenderedSource], float]:
+    started = time.perf_counter()
+    return render_sources(items), time.perf_counter() - started
+
+
+def _p95(values: list[float]) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-render Content.compiled_html, compiled_latex and search_text in id order, in parallel, "
+        "resuming from the last checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Renderer worker processes. 1 renders in this process.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=RENDER_BATCH_SIZE, help="Content rows per chunk.")
+        parser.add_argument(
+            "--since-renderer-version",
+            nargs="?",
+            const="",
+            default=None,
+            metavar="VERSION",
+            help=(
+                "Only re-render rows not already rendered with VERSION "
+                "(default: the current renderer version)."
+            ),
+        )
+        parser.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT), help="Checkpoint file path.")
+        parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint.")
+
+    def handle(self, *args, **options) -> None:
+        jobs = options["jobs"]
+        chunk_size = options["chunk_size"]
+        if jobs < 1 or chunk_size < 1:
+            raise CommandError("--jobs and --chunk-size must be positive.")
+
+        version = renderer_version()
+        since = options["since_renderer_version"]
+        if since == "":
+            since = version
+        queryset = Content.objects.order_by("pk")
+        if since is not None:
+            queryset = queryset.exclude(renderer_version=since)
+        queryset = queryset.only("id", "source_md").prefetch_related("attachments")
+
+        checkpoint_path = Path(options["checkpoint"])
+        checkpoint_key = {"renderer_version": version, "since": since}
+        last_id = 0 if options["restart"] else self._read_checkpoint(checkpoint_path, checkpoint_key)
+        if last_id:
+            self.stdout.write(f"Resuming after Content id {last_id}.")
+
+        self._rows = 0
+        self._skipped = 0
+        self._renders = 0
+        self._latencies: list[float] = []
+        self._checkpoint_path = checkpoint_path
+        self._checkpoint_key = checkpoint_key
+        started = time.perf_counter()
+
+        # Workers only render; the database is touched in this process alone.
+        # Spawned workers must set up Django before unpickling _render_chunk.
+        executor: Executor | None = None
+        if jobs > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=jobs,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        pending: deque[tuple[ContentCompilePlan, Future | None]] = deque()
+        try:
+            while True:
+                contents = list(queryset.filter(pk__gt=last_id)[:chunk_size])
+                if not contents:
+                    break
+                last_id = contents[-1].pk
+                plan = ContentCompilePlan(contents)
+                missing = plan.missing_inputs()
+                future = None
+                if missing and executor is not None:
+                    future = executor.submit(_render_chunk, missing)
+                elif missing:
+                    future = Future()
+                    future.set_result(_render_chunk(missing))
+                pending.append((plan, future))
+                # Keep every worker busy while bounding memory.
+                while len(pending) >= 2 * jobs:
+                    self._finish_chunk(*pending.popleft())
+            while pending:
+                self._finish_chunk(*pending.popleft())
+        except KeyboardInterrupt:
+            raise CommandError(f"Interrupted; run again to resume from {checkpoint_path}.")
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        checkpoint_path.unlink(missing_ok=True)
+        elapsed = time.perf_counter() - started
+        throughput = self._rows / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-rendered {self._rows} Content rows ({self._renders} sources rendered, "
+            f"the rest from the render cache) in {elapsed:.1f}s with renderer {version}."
+        ))
+        if self._skipped:
+            self.stdout.write(f"Skipped {self._skipped} rows edited during the run.")
+        self.stdout.write(f"Throughput: {throughput:.1f} rows/s")
+        self.stdout.write(
+            f"p95 render latency: {_p95(self._latencies) * 1000:.0f} ms per chunk of up to {chunk_size} rows"
+        )
+
+    def _finish_chunk(self, plan: ContentCompilePlan, future: Future | None) -> None:
+        rendered: list[RenderedSource] = []
+        if future is not None:
+            rendered, seconds = future.result()
+            self._latencies.append(seconds)
+        plan.finish(rendered)
+        with transaction.atomic():
+            # Rows edited since they were read already hold output for their new
+            # source; locking them keeps further edits out until this commits.
+            current = dict(
+                Content.objects.select_for_update()
+                .filter(pk__in=[content.pk for content in plan.contents])
+                .values_list("pk", "source_md")
+            )
+            unchanged = [content for content in plan.contents if current.get(content.pk) == content.source_md]
+            Content.objects.bulk_update(unchanged, COMPILED_FIELDS)
+        self._rows += len(unchanged)
+        self._skipped += len(plan.contents) - len(unchanged)
+        self._renders += len(rendered)
+        # Chunks finish in id order, so everything up to here is done.
+        self._write_checkpoint(plan.contents[-1].pk)
+        if self.verbosity >= 2:
+            self.stdout.write(f"Re-rendered {self._rows} rows, up to Content id {plan.contents[-1].pk}.")
+
+    def _read_checkpoint(self, path: Path, key: dict[str, str | None]) -> int:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read checkpoint {path}: {exc}. Use --restart to ignore it.")
+        if {name: data.get(name) for name in key} != key:
+            self.stdout.write(self.style.WARNING("Checkpoint is from a different run; starting from the beginning."))
+            return 0
+        return int(data.get("last_id", 0))
+
+    def _write_checkpoint(self, last_id: int) -> None:
+        path = self._checkpoint_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps({**self._checkpoint_key, "last_id": last_id}), encoding="utf-8")
+        tmp.replace(path)
@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-18 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0007_rerender_compiled_html_with_html_safety"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RenderCacheEntry",
+            fields=[
+                ("key", models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ("renderer_version", models.CharField(db_index=True, max_length=64)),
+                ("html", models.TextField()),
+                ("text", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
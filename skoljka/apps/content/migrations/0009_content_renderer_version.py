@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-18 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0008_render_cache_entry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="content",
+            name="renderer_version",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.1.2 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+
+def clear_render_cache(apps, schema_editor):
+    # Entries written before this migration have no LaTeX; they are only a
+    # cache, so drop them instead of serving empty bodies.
+    apps.get_model("content", "RenderCacheEntry").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0009_content_renderer_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="content",
+            name="compiled_latex",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="rendercacheentry",
+            name="latex",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="rendercacheentry",
+            name="latex_packages",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(clear_render_cache, migrations.RunPython.noop),
+    ]
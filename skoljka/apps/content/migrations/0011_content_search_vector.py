@@ -0,0 +1,32 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def backfill_search_vector(apps, schema_editor):
+    # One UPDATE; built before the GIN index so the index is bulk-loaded.
+    apps.get_model("content", "Content").objects.update(search_vector=SearchVector("search_text"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0010_content_compiled_latex"),
+        ("contenttypes", "0002_remove_content_type_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="content",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="content",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="content_search_vector_gin"),
+        ),
+    ]
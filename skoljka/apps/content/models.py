@@ -1,8 +1,16 @@
+import hashlib
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass
+
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.files.uploadedfile import UploadedFile
 from django.db import models
+from django.db.models import Value, prefetch_related_objects
 from django.utils.text import get_valid_filename
 
 
@@ -32,6 +40,147 @@ def _unique_attachment_name(content: "Content", requested: str) -> str:
     return candidate
 
 
+def render_cache_key(source: str, attachment_urls: dict[str, str] | None, version: str) -> str:
+    payload = json.dumps([version, source, attachment_urls or {}], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Fields written by compile_contents, for bulk_update/update_fields callers.
+COMPILED_FIELDS = ["compiled_html", "compiled_latex", "search_text", "search_vector", "renderer_version"]
+
+# compiled_latex points attachments into this directory; exports rewrite it
+# to wherever they copy the files.
+LATEX_ATTACHMENT_DIR = "attachments/@content"
+
+
+@dataclass(frozen=True)
+class RenderedSource:
+    html: str
+    text: str
+    latex: str
+    latex_packages: list[str]
+
+
+def render_sources(items: list[tuple[str, dict[str, str] | None]]) -> list[RenderedSource]:
+    """Render (source, attachment URL map) pairs to HTML, search text and LaTeX."""
+    from skoljka.utils.markdown import compile_markdown_many, render_latex_many
+
+    if not items:
+        return []
+    html = compile_markdown_many(items)
+    latex = render_latex_many([
+        (source, {name: f"{LATEX_ATTACHMENT_DIR}/{name}" for name in urls or {}})
+        for source, urls in items
+    ])
+    return [
+        RenderedSource(html=page, text=text, latex=tex.body, latex_packages=tex.packages)
+        for (page, text), tex in zip(html, latex, strict=True)
+    ]
+
+
+class ContentCompilePlan:
+    """Render-cache lookups for a batch of contents, split from the rendering.
+
+    ``missing_inputs()`` lists the (source, attachment URLs) pairs that still
+    need a Node render; ``finish()`` takes their ``render_sources`` results in
+    the same order, stores them in ``RenderCacheEntry``, and fills the
+    contents. The split lets ``rerender_content`` render in worker processes
+    that have no database.
+    """
+
+    def __init__(self, contents: list["Content"]) -> None:
+        from skoljka.utils.markdown import renderer_version
+
+        self.contents = contents
+        self.version = renderer_version()
+        self._jobs: list[tuple[Content, str, str]] = []
+        self._inputs: dict[str, tuple[str, dict[str, str] | None]] = {}
+        for content in contents:
+            attachment_urls = content.attachment_url_map() if content.pk else None
+            for lang, source in content.source_md.items():
+                key = render_cache_key(source, attachment_urls, self.version)
+                self._jobs.append((content, lang, key))
+                self._inputs[key] = (source, attachment_urls)
+
+        self._rendered = {
+            entry.key: entry
+            for entry in RenderCacheEntry.objects.filter(key__in=list(self._inputs))
+        }
+        self._missing = [key for key in self._inputs if key not in self._rendered]
+
+    def missing_inputs(self) -> list[tuple[str, dict[str, str] | None]]:
+        return [self._inputs[key] for key in self._missing]
+
+    def finish(self, rendered: list[RenderedSource]) -> None:
+        if self._missing:
+            new_entries = [
+                RenderCacheEntry(
+                    key=key,
+                    renderer_version=self.version,
+                    html=result.html,
+                    text=result.text,
+                    latex=result.latex,
+                    latex_packages=result.latex_packages,
+                )
+                for key, result in zip(self._missing, rendered, strict=True)
+            ]
+            # Another worker may have rendered the same input concurrently.
+            RenderCacheEntry.objects.bulk_create(new_entries, ignore_conflicts=True)
+            self._rendered.update((entry.key, entry) for entry in new_entries)
+
+        compiled: dict[int, dict[str, str]] = {id(content): {} for content in self.contents}
+        compiled_latex: dict[int, dict[str, dict]] = {id(content): {} for content in self.contents}
+        search_parts: dict[int, list[str]] = {id(content): [] for content in self.contents}
+        for content, lang, key in self._jobs:
+            entry = self._rendered[key]
+            compiled[id(content)][lang] = entry.html
+            compiled_latex[id(content)][lang] = {"body": entry.latex, "packages": entry.latex_packages}
+            if entry.text:
+                search_parts[id(content)].append(entry.text)
+        for content in self.contents:
+            content.compiled_html = compiled[id(content)]
+            content.compiled_latex = compiled_latex[id(content)]
+            content.search_text = " ".join(search_parts[id(content)])
+            content.search_vector = search_vector(content.search_text)
+            content.renderer_version = self.version
+
+
+def search_vector(text: str) -> SearchVector:
+    """Expression for ``Content.search_vector``, computed by Postgres on write.
+
+    Like search queries, it uses the database's default text search config.
+    """
+    return SearchVector(Value(text))
+
+
+def compile_contents(contents: list["Content"]) -> None:
+    """Fill ``compiled_html``, ``compiled_latex`` and ``search_text`` in one batch.
+
+    Renders are looked up in ``RenderCacheEntry`` first, so unchanged
+    languages cost one query instead of a Node call. Saved contents resolve
+    ``attachment:`` references through their attachments; prefetch
+    ``attachments`` to avoid a query per content.
+    """
+    plan = ContentCompilePlan(contents)
+    plan.finish(render_sources(plan.missing_inputs()))
+
+
+class ContentQuerySet(models.QuerySet):
+    def bulk_compile(self, contents: Iterable["Content"], *, batch_size: int | None = None) -> list["Content"]:
+        """Compile many saved contents with batched renders and bulk_update them.
+
+        Use this after saving contents with ``save(render=False)`` in bulk
+        import/edit paths.
+        """
+        contents = list({content.pk: content for content in contents}.values())
+        if not contents:
+            return contents
+        prefetch_related_objects(contents, "attachments")
+        compile_contents(contents)
+        self.bulk_update(contents, COMPILED_FIELDS, batch_size=batch_size)
+        return contents
+
+
 class Content(models.Model):
     id: int
     content_type_id: int
@@ -42,7 +191,16 @@ class Content(models.Model):
     original_language = models.CharField(max_length=10, default="en")
     source_md = models.JSONField(default=dict)
     compiled_html = models.JSONField(default=dict, blank=True)
+    # {language: {"body": ..., "packages": [...]}}, see latex_for().
+    compiled_latex = models.JSONField(default=dict, blank=True)
     search_text = models.TextField(blank=True)
+    # to_tsvector(search_text), kept in sync by save() and compile_contents().
+    search_vector = SearchVectorField(null=True, editable=False)
+    # renderer_version() that produced compiled_html; rerender_content uses
+    # it to find stale rows.
+    renderer_version = models.CharField(max_length=64, blank=True, db_index=True)
+
+    objects = ContentQuerySet.as_manager()
 
     class Meta:
         constraints = [
@@ -53,21 +211,22 @@ class Content(models.Model):
         ]
         indexes = [
             models.Index(fields=["content_type", "object_id"]),
+            GinIndex(fields=["search_vector"], name="content_search_vector_gin"),
         ]
 
-    def save(self, **kwargs: object) -> None:
-        from skoljka.utils.markdown import compile_markdown
-
-        compiled: dict[str, str] = {}
-        search_parts: list[str] = []
-        attachment_urls = self.attachment_url_map() if self.pk else None
-        for lang, source in self.source_md.items():
-            html, text = compile_markdown(source, attachment_urls=attachment_urls)
-            compiled[lang] = html
-            if text:
-                search_parts.append(text)
-        self.compiled_html = compiled
-        self.search_text = " ".join(search_parts)
+    def save(self, *, render: bool = True, **kwargs: object) -> None:
+        """Save, recompiling HTML and search text unless ``render=False``.
+
+        Bulk callers pass ``render=False`` and compile afterwards with
+        ``Content.objects.bulk_compile``.
+        """
+        if render:
+            compile_contents([self])
+        else:
+            self.search_vector = search_vector(self.search_text)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "search_text" in update_fields:
+            kwargs["update_fields"] = [*update_fields, "search_vector"]
         super().save(**kwargs)
 
     def attachment_url_map(self) -> dict[str, str]:
@@ -84,6 +243,20 @@ class Content(models.Model):
         lang = self.resolve_language(language)
         return self.compiled_html.get(lang, "") if lang else ""
 
+    def latex_for(self, language: str | None = None, *, attachment_dir: str) -> tuple[str, list[str]] | None:
+        """Cached LaTeX body and packages, with attachments under ``attachment_dir``.
+
+        Returns None when this content was compiled before LaTeX was cached.
+        """
+        lang = self.resolve_language(language)
+        if not lang:
+            return "", []
+        cached = self.compiled_latex.get(lang)
+        if cached is None:
+            return None
+        body = cached["body"].replace(f"{{{LATEX_ATTACHMENT_DIR}/", f"{{{attachment_dir}/")
+        return body, list(cached["packages"])
+
     def resolve_language(self, language: str | None = None) -> str:
         if language and language in self.source_md:
             return language
@@ -104,6 +277,25 @@ class Content(models.Model):
         return f"Content({self.content_type}, {self.object_id})"
 
 
+class RenderCacheEntry(models.Model):
+    """Rendered HTML, search text and LaTeX for one Markdown source.
+
+    The key hashes the source, the attachment URL map, and the renderer
+    version, so all workers share renders and a renderer change misses.
+    """
+
+    key = models.CharField(max_length=64, primary_key=True)
+    renderer_version = models.CharField(max_length=64, db_index=True)
+    html = models.TextField()
+    text = models.TextField(blank=True)
+    latex = models.TextField(blank=True)
+    latex_packages = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"RenderCacheEntry({self.key[:12]}, {self.renderer_version})"
+
+
 class ContentVersion(models.Model):
     id: int
     content_id: int
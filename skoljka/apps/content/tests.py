@@ -1,17 +1,24 @@
 from django.contrib.admin.sites import AdminSite
 from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.postgres.search import SearchQuery
 from django.db import IntegrityError
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import RequestFactory
 from django.test import override_settings
 from django.test import TestCase
 from django.urls import reverse
+from io import StringIO
+from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 from skoljka.apps.content.admin import ContentAdmin
-from skoljka.apps.content.models import Content, ContentAttachment
+from skoljka.apps.content.management.commands import rerender_content
+from skoljka.apps.content.models import Content, ContentAttachment, RenderCacheEntry
 from skoljka.apps.problems.models import Problem
 from skoljka.tests.factories import make_content, make_problem, make_staff, make_user
+from skoljka.utils.markdown import compile_markdown_many, renderer_version
 
 
 class ContentSaveTest(TestCase):
@@ -32,6 +39,24 @@ class ContentSaveTest(TestCase):
         c = make_content(p, source_md="**bold** text")
         self.assertEqual(c.search_text, "bold text")
 
+    def test_save_populates_search_vector(self):
+        p = make_problem()
+        c = make_content(p, source_md="**bold** text")
+        self.assertTrue(Content.objects.filter(pk=c.pk, search_vector=SearchQuery("bold")).exists())
+
+        c.search_text = "replaced"
+        c.save(render=False, update_fields=["search_text"])
+        self.assertFalse(Content.objects.filter(pk=c.pk, search_vector=SearchQuery("bold")).exists())
+        self.assertTrue(Content.objects.filter(pk=c.pk, search_vector=SearchQuery("replaced")).exists())
+
+    def test_save_populates_compiled_latex(self):
+        p = make_problem()
+        c = make_content(p, source_md=r"\textbf{bold} and $x$")
+        body, packages = c.latex_for("en", attachment_dir="attachments/p1")
+        self.assertIn(r"\textbf{bold}", body)
+        self.assertIn("$x$", body)
+        self.assertEqual(packages, c.compiled_latex["en"]["packages"])
+
     def test_unique_per_object(self):
         p = make_problem()
         make_content(p, source_md="A", language="en")
@@ -47,6 +72,134 @@ class ContentSaveTest(TestCase):
         self.assertEqual(c.source_for("hr"), "Zdravo")
 
 
+class ContentBulkCompileTest(TestCase):
+    def test_bulk_compile_renders_all_contents_in_one_batch(self):
+        first = make_content(make_problem(), source_md="one")
+        second = make_content(make_problem(), source_md="two")
+        second.set_text("hr", "**dva**")
+        for content in (first, second):
+            content.save(render=False)
+
+        with patch("skoljka.utils.markdown.compile_markdown_many", wraps=compile_markdown_many) as many:
+            Content.objects.bulk_compile([first, second])
+
+        self.assertEqual(many.call_count, 1)
+        second.refresh_from_db()
+        self.assertIn("<strong>dva</strong>", second.html_for("hr"))
+        self.assertEqual(second.search_text, "two dva")
+        self.assertTrue(Content.objects.filter(pk=second.pk, search_vector=SearchQuery("dva")).exists())
+
+    def test_save_without_render_keeps_compiled_html(self):
+        content = make_content(make_problem(), source_md="old")
+        content.set_text("en", "new")
+        content.save(render=False)
+
+        content.refresh_from_db()
+        self.assertEqual(content.source_for("en"), "new")
+        self.assertIn("old", content.html_for("en"))
+
+
+class ContentRenderCacheTest(TestCase):
+    def test_unchanged_source_reuses_cached_render(self):
+        content = make_content(make_problem(), source_md="**cached**")
+
+        with patch("skoljka.utils.markdown.compile_markdown_many") as many:
+            content.save()
+            make_content(make_problem(), source_md="**cached**")
+
+        many.assert_not_called()
+        self.assertIn("<strong>cached</strong>", content.html_for("en"))
+
+    def test_only_changed_language_is_rendered(self):
+        content = make_content(make_problem(), source_md="English")
+        content.set_text("hr", "Hrvatski")
+
+        with patch("skoljka.utils.markdown.compile_markdown_many", wraps=compile_markdown_many) as many:
+            content.save()
+
+        many.assert_called_once_with([("Hrvatski", {})])
+
+    def test_renderer_version_change_misses_cache(self):
+        make_content(make_problem(), source_md="versioned")
+
+        with (
+            patch("skoljka.utils.markdown.renderer_version", return_value="next-version"),
+            patch("skoljka.utils.markdown.compile_markdown_many", wraps=compile_markdown_many) as many,
+        ):
+            make_content(make_problem(), source_md="versioned")
+
+        many.assert_called_once()
+        self.assertTrue(RenderCacheEntry.objects.filter(renderer_version="next-version").exists())
+
+
+class RerenderContentCommandTest(TestCase):
+    def _rerender(self, *args: str) -> tuple[str, Path]:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        checkpoint = Path(tmp.name) / "checkpoint.json"
+        out = StringIO()
+        call_command("rerender_content", "--jobs=1", "--chunk-size=1", f"--checkpoint={checkpoint}", *args, stdout=out)
+        return out.getvalue(), checkpoint
+
+    def _make_stale(self, source_md: str) -> Content:
+        content = make_content(make_problem(), source_md=source_md)
+        Content.objects.filter(pk=content.pk).update(compiled_html={"en": "stale"}, renderer_version="old")
+        return content
+
+    def test_rerenders_stale_rows_and_reports_throughput(self):
+        stale = self._make_stale("**fresh**")
+        current = make_content(make_problem(), source_md="current")
+        Content.objects.filter(pk=current.pk).update(compiled_html={"en": "untouched"})
+
+        output, checkpoint = self._rerender("--since-renderer-version")
+
+        stale.refresh_from_db()
+        current.refresh_from_db()
+        self.assertIn("<strong>fresh</strong>", stale.html_for("en"))
+        self.assertEqual(stale.renderer_version, renderer_version())
+        self.assertEqual(current.html_for("en"), "untouched")
+        self.assertIn("rows/s", output)
+        self.assertIn("p95 render latency", output)
+        self.assertFalse(checkpoint.exists())
+
+    def test_resumes_after_checkpoint(self):
+        done = self._make_stale("done")
+        todo = self._make_stale("todo")
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        checkpoint = Path(tmp.name) / "checkpoint.json"
+        checkpoint.write_text(
+            '{"renderer_version": "%s", "since": null, "last_id": %d}' % (renderer_version(), done.pk)
+        )
+
+        call_command("rerender_content", "--jobs=1", f"--checkpoint={checkpoint}", stdout=StringIO())
+
+        done.refresh_from_db()
+        todo.refresh_from_db()
+        self.assertEqual(done.html_for("en"), "stale")
+        self.assertIn("todo", todo.html_for("en"))
+
+
+    def test_rows_edited_during_the_run_keep_their_output(self):
+        edited = self._make_stale("before")
+        render_chunk = rerender_content._render_chunk
+
+        def edit_then_render(items):
+            # An editor saves the row after the command has read it.
+            content = Content.objects.get(pk=edited.pk)
+            content.set_text("en", "**after**")
+            content.save()
+            return render_chunk(items)
+
+        with patch.object(rerender_content, "_render_chunk", side_effect=edit_then_render):
+            output, _checkpoint = self._rerender()
+
+        edited.refresh_from_db()
+        self.assertIn("<strong>after</strong>", edited.html_for("en"))
+        self.assertNotIn("before", edited.html_for("en"))
+        self.assertIn("Skipped 1 rows edited during the run.", output)
+
+
 class ContentFormatHelpTest(TestCase):
     def test_help_index_links_to_format_help(self):
         r = self.client.get(reverse("help_index"))
@@ -112,8 +112,9 @@ class Command(BaseCommand):
             if tag_slugs:
                 source.tags.set(Tag.objects.filter(slug__in=tag_slugs))
 
-        # Import problems.
+        # Import problems. Statements are rendered in batches at the end.
         problem_ct = ContentType.objects.get_for_model(Problem)
+        contents: list[Content] = []
         for p in problems_data:
             source = None
             if p.get("source_slug"):
@@ -158,7 +159,9 @@ class Command(BaseCommand):
                 content.set_text(lang, text)
                 if not content.original_language:
                     content.original_language = lang
-                content.save()
+                content.save(render=False)
+                contents.append(content)
+        Content.objects.bulk_compile(contents)
 
         self.stdout.write(
             self.style.SUCCESS(
@@ -1,10 +1,10 @@
 from typing import Any, Protocol, cast
 
-from django.db.models import Case, Count, IntegerField, Q, When
+from django.db.models import Case, Count, IntegerField, When
 
 from skoljka.apps.lists.models import ProblemList, ProblemListItem
 from skoljka.apps.problems.models import Problem
-from skoljka.apps.tracking.models import Submission
+from skoljka.apps.tracking.problem_sets import solved_problem_filter, tracked_problem_ids
 from skoljka.utils.permissions import PermissionType
 
 
@@ -45,7 +45,7 @@ def visible_solved_problem_counts(lists: list[ProblemList], user: UserLike) -> d
         .annotate(
             count=Count(
                 "problem_id",
-                filter=Q(problem__submissions__user=user, problem__submissions__solved=True),
+                filter=solved_problem_filter(user, "problem_id"),
                 distinct=True,
             )
         )
@@ -72,13 +72,7 @@ def ordered_list_problem_queryset(problem_list: ProblemList, user: UserLike):
 def solved_problem_ids(problems: list[Problem], user: UserLike | None) -> set[int]:
     if not user or not user.is_authenticated or not problems:
         return set()
-    return set(
-        Submission.objects.filter(
-            user=user,
-            problem_id__in=[problem.pk for problem in problems],
-            solved=True,
-        ).values_list("problem_id", flat=True)
-    )
+    return {problem.pk for problem in problems} & tracked_problem_ids(user).solved
 
 
 def _problem_queryset_for_user(user: UserLike, permission: PermissionType = "view"):
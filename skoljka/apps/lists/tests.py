@@ -1,4 +1,4 @@
-from types import SimpleNamespace
+from tempfile import TemporaryDirectory
 from unittest.mock import patch
 
 from django.db import IntegrityError
@@ -8,6 +8,7 @@ from skoljka.apps.lists.models import ProblemList, ProblemListItem
 from skoljka.apps.tracking.models import Submission
 from skoljka.tests.factories import (
     add_to_list,
+    make_export,
     make_list,
     make_problem,
     make_source,
@@ -123,7 +124,7 @@ class ListDetailViewTest(TestCase):
 
     @patch("skoljka.apps.problems.export_views.export_problems_pdf")
     def test_pdf_export_preserves_order_and_filters_private_problems(self, export_pdf):
-        export_pdf.return_value = SimpleNamespace(filename="ordered.pdf", data=b"%PDF")
+        export_pdf.return_value = make_export("ordered.pdf", b"%PDF", self.enterContext(TemporaryDirectory()))
         first = make_problem(title="First", is_public=True)
         hidden = make_problem(title="Hidden", is_public=False, created_by=self.owner)
         second = make_problem(title="Second", is_public=True)
@@ -5,3 +5,6 @@ class ProblemsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "skoljka.apps.problems"
     label = "problems"
+
+    def ready(self):
+        from skoljka.apps.problems import signals  # noqa: F401
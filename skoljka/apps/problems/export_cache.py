@@ -0,0 +1,85 @@
+"""On-disk cache of generated PDF and LaTeX exports.
+
+Files are named by their cache key, so a hit costs one ``open``. Hits bump
+the file's mtime, and writes evict the least recently used files once the
+directory grows past ``settings.EXPORT_CACHE_MAX_BYTES``. Entries are handed
+out as open files, so an entry evicted while it is being sent stays readable.
+"""
+
+import os
+import shutil
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import BinaryIO
+
+from django.conf import settings
+
+
+class ExportCache:
+    def __init__(self, root: Path, *, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def path(self, key: str, suffix: str) -> Path:
+        return self.root / f"{key}{suffix}"
+
+    def get(self, key: str, suffix: str) -> BinaryIO | None:
+        """Open the entry for reading, or return None on a miss."""
+        try:
+            file = self.path(key, suffix).open("rb")
+        except FileNotFoundError:
+            return None
+        os.utime(file.fileno())
+        return file
+
+    def put(self, key: str, suffix: str, source: Path) -> BinaryIO:
+        """Store a copy of ``source`` under ``key`` and return it opened for reading."""
+        with self.writer(key, suffix) as tmp, source.open("rb") as src:
+            shutil.copyfileobj(src, tmp)
+            tmp.flush()
+            # Open before the rename, so no eviction can come in between.
+            stored = open(tmp.name, "rb")
+        return stored
+
+    @contextmanager
+    def writer(self, key: str, suffix: str) -> Iterator[BinaryIO]:
+        """Write an entry through a file handle; it is stored only if the block completes."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(key, suffix)
+        # Write next to the target and rename, so readers never see a partial file.
+        tmp = NamedTemporaryFile(dir=self.root, prefix=".tmp-", suffix=suffix, delete=False)
+        try:
+            with tmp:
+                yield tmp
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+        os.replace(tmp.name, path)
+        self.evict(keep=path)
+
+    def evict(self, *, keep: Path | None = None) -> None:
+        entries = []
+        total = 0
+        for entry in os.scandir(self.root):
+            if not entry.is_file() or entry.name.startswith(".tmp-"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+            total += stat.st_size
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def export_cache() -> ExportCache:
+    return ExportCache(settings.EXPORT_CACHE_DIR, max_bytes=settings.EXPORT_CACHE_MAX_BYTES)
@@ -0,0 +1,133 @@
+"""Background worker for PDF exports above MAX_PDF_EXPORT_PROBLEMS."""
+
+import json
+import logging
+import os
+import threading
+from datetime import timedelta
+
+import pymupdf
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone, translation
+
+from skoljka.apps.problems.models import PdfExportJob, Problem
+from skoljka.apps.problems.pdf_export import (
+    MAX_PDF_EXPORT_PROBLEMS,
+    PdfExportError,
+    export_problems_pdf,
+    problem_export_queryset,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _progress(done: int, total: int) -> str:
+    return json.dumps({"done": done, "total": total})
+
+
+def _is_running(job_id: str) -> bool:
+    status = PdfExportJob.objects.filter(pk=job_id).values_list("status", flat=True).first()
+    return status == PdfExportJob.Status.RUNNING
+
+
+def run_export_job(job_id: str) -> None:
+    try:
+        affected = PdfExportJob.objects.filter(pk=job_id, status=PdfExportJob.Status.PENDING).update(
+            status=PdfExportJob.Status.RUNNING,
+            updated_at=timezone.now(),
+        )
+        if not affected:
+            return
+
+        job = PdfExportJob.objects.get(pk=job_id)
+        by_id = problem_export_queryset(Problem.objects.filter(pk__in=job.problem_ids)).in_bulk()
+        problems = [by_id[pk] for pk in job.problem_ids if pk in by_id]
+        compact = tuple(job.compact_generated_titles_for) if job.compact_generated_titles_for else None
+        if not problems:
+            raise PdfExportError("None of the exported problems exist any more.")
+
+        merged = pymupdf.open()
+        try:
+            next_page = 1
+            with translation.override(job.language):
+                for start in range(0, len(problems), MAX_PDF_EXPORT_PROBLEMS):
+                    # Honour cancellation between chunks.
+                    if not _is_running(job_id):
+                        return
+                    # Chunks continue the problem and page numbering of the
+                    # previous ones; only the first has a title block.
+                    exported = export_problems_pdf(
+                        problems[start:start + MAX_PDF_EXPORT_PROBLEMS],
+                        title=job.title if start == 0 else None,
+                        filename=job.filename,
+                        compact_generated_titles_for=compact,
+                        heading_mode=job.heading_mode,
+                        first_index=start + 1,
+                        first_page=next_page,
+                        build_format=True,
+                    )
+                    with exported.file, pymupdf.open(stream=exported.file.read(), filetype="pdf") as chunk:
+                        merged.insert_pdf(chunk)
+                        next_page += len(chunk)
+                    done = min(start + MAX_PDF_EXPORT_PROBLEMS, len(problems))
+                    PdfExportJob.objects.filter(pk=job_id, status=PdfExportJob.Status.RUNNING).update(
+                        progress_json=_progress(done, len(problems)),
+                        updated_at=timezone.now(),
+                    )
+
+            if not _is_running(job_id):
+                return
+            result_path = job.result_path
+            result_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = result_path.with_suffix(".tmp")
+            merged.save(tmp_path, garbage=3, deflate=True)
+            os.replace(tmp_path, result_path)
+        finally:
+            merged.close()
+
+        PdfExportJob.objects.filter(pk=job_id, status=PdfExportJob.Status.RUNNING).update(
+            status=PdfExportJob.Status.DONE,
+            progress_json=_progress(len(problems), len(problems)),
+            updated_at=timezone.now(),
+        )
+    except Exception as exc:
+        logger.exception("PDF export job %s failed", job_id)
+        try:
+            PdfExportJob.objects.filter(pk=job_id).update(
+                status=PdfExportJob.Status.FAILED,
+                error=str(exc)[:2000],
+                updated_at=timezone.now(),
+            )
+        except Exception:
+            logger.exception("Could not mark PDF export job %s as failed", job_id)
+    finally:
+        # Tests may run this inline inside the main thread.
+        if threading.current_thread() is not threading.main_thread():
+            connections.close_all()
+
+
+def start_export_job_thread(job_id: str) -> threading.Thread:
+    t = threading.Thread(
+        target=run_export_job,
+        args=(job_id,),
+        name=f"pdf-export-{job_id}",
+        daemon=True,
+    )
+    t.start()
+    return t
+
+
+def mark_if_stalled(job: PdfExportJob) -> PdfExportJob:
+    """If a 'running' job hasn't been touched in too long, mark it failed."""
+    if job.status != PdfExportJob.Status.RUNNING:
+        return job
+    cutoff = timezone.now() - timedelta(minutes=settings.PDF_EXPORT_JOB_ZOMBIE_MINUTES)
+    if job.updated_at < cutoff:
+        PdfExportJob.objects.filter(pk=job.pk, status=PdfExportJob.Status.RUNNING).update(
+            status=PdfExportJob.Status.FAILED,
+            error="Worker timed out (presumed dead)",
+            updated_at=timezone.now(),
+        )
+        job.refresh_from_db()
+    return job
@@ -0,0 +1,113 @@
+"""Precompiled XeLaTeX formats for the export preamble.
+
+Loading the preamble packages (fontspec, geometry, AMS) dominates the run time
+of a small export. The preamble is dumped once with mylatexformat into a format
+named after a hash of the preamble text, so every combination of optional
+packages gets its own format and editing the template builds a new one.
+Building takes a while, so requests only use formats that already exist; export
+jobs and ``manage.py build_latex_formats`` (run at deploy) build them.
+
+Exported documents stay standalone: mylatexformat skips the preamble up to
+``FORMAT_END_MARKER`` when the format is loaded, and without the format the
+marker expands to ``\\relax``.
+"""
+
+import hashlib
+import logging
+import os
+import subprocess
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.conf import settings
+
+from skoljka.utils.external_runner import run_external
+
+logger = logging.getLogger(__name__)
+
+FORMAT_END_MARKER = r"\csname endofdump\endcsname"
+
+# Formats that failed to build in this process. They are not retried until
+# restart, so a missing mylatexformat costs one failed run, not one per export.
+_failed: set[str] = set()
+
+
+def latex_format(preamble: str) -> Path | None:
+    """Return the format for ``preamble`` (path without ``.fmt``) if it is built.
+
+    Returns None when formats are disabled (``PDF_EXPORT_FORMAT_DIR = None``)
+    or the format does not exist yet; callers then compile the full preamble.
+    Formats are built by ``build_latex_format``, never in a request.
+    """
+    fmt_path = _format_path(preamble)
+    if fmt_path is None or not fmt_path.exists():
+        return None
+    return fmt_path.with_suffix("")
+
+
+def build_latex_format(preamble: str) -> Path | None:
+    """Like ``latex_format``, but build a missing format first.
+
+    Takes up to a minute, so only export jobs and the ``build_latex_formats``
+    command call it. Returns None if the format cannot be built.
+    """
+    fmt_path = _format_path(preamble)
+    if fmt_path is None:
+        return None
+    if fmt_path.exists():
+        return fmt_path.with_suffix("")
+    root, name = fmt_path.parent, fmt_path.stem
+    if name in _failed:
+        return None
+
+    root.mkdir(parents=True, exist_ok=True)
+    # Build next to the target and rename, so concurrent exports never load a
+    # partial format. The directory must be visible to the external worker.
+    with TemporaryDirectory(dir=root, prefix=".build-") as tmp:
+        build_dir = Path(tmp)
+        (build_dir / "preamble.tex").write_text(
+            f"{preamble}\n{FORMAT_END_MARKER}\n\\begin{{document}}\n\\end{{document}}\n",
+            encoding="utf-8",
+        )
+        try:
+            result = run_external(
+                [
+                    "xelatex",
+                    "-ini",
+                    "-interaction=nonstopmode",
+                    "-halt-on-error",
+                    f"-jobname={name}",
+                    "&xelatex",
+                    "mylatexformat.ltx",
+                    "preamble.tex",
+                ],
+                cwd=build_dir,
+                capture_output=True,
+                text=True,
+                check=False,
+                timeout=60,
+            )
+        except (OSError, RuntimeError, subprocess.SubprocessError):
+            logger.warning("Could not run xelatex to build LaTeX format %s", name, exc_info=True)
+            _failed.add(name)
+            return None
+        built = build_dir / f"{name}.fmt"
+        if result.returncode != 0 or not built.exists():
+            log = (result.stdout or result.stderr or "").strip()
+            logger.warning("Could not build LaTeX format %s: %s", name, log[-1000:])
+            _failed.add(name)
+            return None
+        os.replace(built, fmt_path)
+    return fmt_path.with_suffix("")
+
+
+def _format_path(preamble: str) -> Path | None:
+    if settings.PDF_EXPORT_FORMAT_DIR is None:
+        return None
+    name = f"skoljka-{hashlib.sha256(preamble.encode('utf-8')).hexdigest()[:16]}"
+    return Path(settings.PDF_EXPORT_FORMAT_DIR) / f"{name}.fmt"
+
+
+def discard_latex_format(fmt: Path) -> None:
+    """Remove a format that no longer loads, e.g. after a TeX upgrade."""
+    fmt.with_suffix(".fmt").unlink(missing_ok=True)
@@ -0,0 +1,121 @@
+"""Time problem substring search against a synthetic dataset.
+
+The dataset is generated inside a transaction that is rolled back afterwards
+(unless ``--keep``), so the command is safe to run against a development
+database that already holds real problems.
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from skoljka.apps.problems.matching import problem_text_match, problem_typeahead_match
+from skoljka.apps.problems.models import Problem
+from skoljka.apps.problems.signals import sync_effectively_public, sync_source_sort_keys, sync_tag_ids
+from skoljka.apps.sources.closure import sync_source_closure
+from skoljka.apps.sources.models import Source
+from skoljka.apps.sources.tree import bump_source_tree_generation
+from skoljka.apps.sources.year_stats import rebuild_source_year_stats
+from skoljka.apps.tags.models import Tag
+
+WORDS = [
+    "triangle", "circle", "polynomial", "inequality", "sequence", "function", "graph",
+    "integer", "prime", "divisor", "tangent", "chord", "matrix", "parity", "invariant",
+    "coloring", "tournament", "lattice", "quadrilateral", "cyclic", "median", "symmetric",
+    "recurrence", "modulo", "square", "cube", "digit", "permutation", "subset", "board",
+]
+TOKENS = ["tri", "poly", "ineq", "circ", "lattice", "cyclic", "modulo", "xyzzy", "2007"]
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = "Benchmark typeahead and search substring matching on a synthetic dataset."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--problems", type=int, default=200_000, help="Number of problems to generate.")
+        parser.add_argument("--sources", type=int, default=500)
+        parser.add_argument("--tags", type=int, default=300)
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per token.")
+        parser.add_argument("--keep", action="store_true", help="Commit the generated data.")
+
+    def handle(self, *args, **options) -> None:
+        with transaction.atomic():
+            self._generate(options["problems"], options["sources"], options["tags"])
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE sources_source, tags_tag, problems_problem, problems_problem_tags")
+            self._report("typeahead", self._typeahead, options["repeat"])
+            self._report("search fallback", self._search, options["repeat"])
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+    def _generate(self, problem_count: int, source_count: int, tag_count: int) -> None:
+        rng = random.Random(0)
+        sources = Source.objects.bulk_create(
+            Source(
+                slug=f"bench-source-{i}",
+                translations={
+                    "en": {"name": f"Bench {rng.choice(WORDS).title()} Olympiad {i}"},
+                    "hr": {"name": f"Bench natjecanje {i}"},
+                },
+            )
+            for i in range(source_count)
+        )
+        bump_source_tree_generation()
+        for source in sources:
+            sync_source_closure(source.pk)
+        tags = Tag.objects.bulk_create(
+            Tag(
+                slug=f"bench-{rng.choice(WORDS)}-{i}",
+                kind=Tag.Kind.TOPIC,
+                translations={"en": f"{rng.choice(WORDS).title()} {i}", "hr": f"Oznaka {i}"},
+            )
+            for i in range(tag_count)
+        )
+        Through = Problem.tags.through
+        for start in range(0, problem_count, BATCH_SIZE):
+            problems = Problem.objects.bulk_create(
+                Problem(
+                    source=rng.choice(sources),
+                    year=rng.randint(1960, 2025),
+                    problem_label=str(rng.randint(1, 8)),
+                    title=" ".join(rng.sample(WORDS, 3)).capitalize(),
+                )
+                for _ in range(start, min(start + BATCH_SIZE, problem_count))
+            )
+            Through.objects.bulk_create(
+                Through(problem_id=problem.pk, tag_id=tag.pk)
+                for problem in problems
+                for tag in rng.sample(tags, min(2, len(tags)))
+            )
+            batch = Problem.objects.filter(pk__in=[problem.pk for problem in problems])
+            sync_tag_ids(batch)
+            sync_effectively_public(batch)
+            sync_source_sort_keys(batch)
+        rebuild_source_year_stats()
+        self.stdout.write(f"Generated {problem_count} problems, {source_count} sources, {tag_count} tags.")
+
+    def _typeahead(self, token: str):
+        return Problem.objects.filter(problem_typeahead_match(token)).distinct()[:12]
+
+    def _search(self, token: str):
+        return Problem.objects.filter(problem_text_match(token))[:20]
+
+    def _report(self, label: str, build, repeat: int) -> None:
+        self.stdout.write(f"\n{label} (ms over {repeat} runs):")
+        for token in TOKENS:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(build(token))
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            plan = build(token).explain()
+            uses_index = "trgm" in plan
+            self.stdout.write(
+                f"  {token:<10} p50={statistics.median(timings):8.2f}  p95={p95:8.2f}"
+                f"  trigram index={'yes' if uses_index else 'NO'}"
+            )
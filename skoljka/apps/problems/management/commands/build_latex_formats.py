@@ -0,0 +1,21 @@
+"""Build the precompiled XeLaTeX formats for every PDF export preamble."""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from skoljka.apps.problems.latex_format import build_latex_format
+from skoljka.apps.problems.pdf_export import latex_export_preambles
+
+
+class Command(BaseCommand):
+    help = "Build the XeLaTeX formats used by PDF exports. Run after deploys and TeX upgrades."
+
+    def handle(self, *args, **options) -> None:
+        if settings.PDF_EXPORT_FORMAT_DIR is None:
+            self.stdout.write("PDF_EXPORT_FORMAT_DIR is None, nothing to build.")
+            return
+        preambles = latex_export_preambles()
+        failed = sum(build_latex_format(preamble) is None for preamble in preambles)
+        if failed:
+            raise CommandError(f"Could not build {failed} of {len(preambles)} LaTeX formats, see the log.")
+        self.stdout.write(f"{len(preambles)} LaTeX formats are ready.")
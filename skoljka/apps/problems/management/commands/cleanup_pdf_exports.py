@@ -0,0 +1,17 @@
+"""Delete expired PDF export jobs and their merged PDFs."""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from skoljka.apps.problems.models import PdfExportJob
+
+
+class Command(BaseCommand):
+    help = "Delete expired PdfExportJob rows and their result files."
+
+    def handle(self, *args, **options) -> None:
+        expired_jobs = list(PdfExportJob.objects.filter(expires_at__lt=timezone.now()).only("id"))
+        for job in expired_jobs:
+            job.result_path.unlink(missing_ok=True)
+        deleted, _ = PdfExportJob.objects.filter(pk__in=[job.pk for job in expired_jobs]).delete()
+        self.stdout.write(f"Deleted {deleted} expired PdfExportJob rows.")
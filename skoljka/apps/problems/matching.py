@@ -0,0 +1,34 @@
+"""Substring matching of problems for the search fallback and typeaheads.
+
+Every expression here has a matching ``trigram_index`` on its model, so a
+token costs a few GIN index scans instead of a sequential scan.
+"""
+
+from django.db.models import F, Q
+
+from skoljka.utils.trigram import contains_any, json_text
+
+
+def problem_text_match(token: str) -> Q:
+    """``token`` appears in the problem title or its source's slug or name."""
+    return contains_any(
+        token,
+        F("title"),
+        F("source__slug"),
+        json_text("source__translations", "en", "name"),
+        json_text("source__translations", "hr", "name"),
+    )
+
+
+def problem_typeahead_match(token: str) -> Q:
+    """``problem_text_match`` plus label, tags and year; needs ``distinct()``."""
+    match = problem_text_match(token) | contains_any(
+        token,
+        F("problem_label"),
+        F("tags__slug"),
+        json_text("tags__translations", "en"),
+        json_text("tags__translations", "hr"),
+    )
+    if token.isdigit():
+        match |= Q(year=int(token))
+    return match
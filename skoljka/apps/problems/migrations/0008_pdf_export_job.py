@@ -0,0 +1,41 @@
+# Generated by Django 6.1.2 on 2026-10-18 08:51
+
+import django.db.models.deletion
+import skoljka.apps.problems.models
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0007_problem_archive_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PdfExportJob",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("problem_ids", models.JSONField(default=list)),
+                ("title", models.CharField(max_length=255)),
+                ("filename", models.CharField(max_length=255)),
+                ("heading_mode", models.CharField(max_length=20)),
+                ("language", models.CharField(max_length=10)),
+                ("compact_generated_titles_for", models.JSONField(blank=True, null=True)),
+                ("progress_json", models.TextField(default='{"done":0,"total":0}')),
+                ("status", models.CharField(choices=[("pending", "Pending"), ("running", "Running"), ("done", "Done"), ("failed", "Failed"), ("cancelled", "Cancelled")], default="pending", max_length=12)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("expires_at", models.DateTimeField(default=skoljka.apps.problems.models._pdf_export_expires_at)),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="pdf_export_jobs", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [models.Index(fields=["user", "status"], name="problems_pd_user_id_8d55a3_idx"), models.Index(fields=["expires_at"], name="problems_pd_expires_9307f4_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:02
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0008_pdf_export_job"),
+        ("sources", "0007_trigram_indexes"),
+        ("tags", "0004_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="problem",
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(models.F("title")), name="gin_trgm_ops"), name="problem_title_trgm"),
+        ),
+        migrations.AddIndex(
+            model_name="problem",
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(models.F("problem_label")), name="gin_trgm_ops"), name="problem_label_trgm"),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:10
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0009_trigram_indexes"),
+        ("sources", "0007_trigram_indexes"),
+        ("tags", "0004_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(django.db.models.functions.comparison.Coalesce(models.F("source"), models.Value(9223372036854775807)), django.db.models.functions.comparison.Coalesce(models.F("year"), models.Value(2147483647)), models.F("problem_label"), models.F("id"), name="problem_keyset_idx"),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:11
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_tag_ids(apps, schema_editor):
+    # One UPDATE; built before the GIN index so the index is bulk-loaded.
+    Problem = apps.get_model("problems", "Problem")
+    ids = (
+        Problem.tags.through.objects.filter(problem_id=OuterRef("pk"))
+        .values("problem_id")
+        .annotate(ids=ArrayAgg("tag_id", order_by="tag_id"))
+        .values("ids")
+    )
+    tagged = Problem.tags.through.objects.values("problem_id")
+    Problem.objects.filter(pk__in=tagged).update(tag_ids=Subquery(ids))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0010_problem_keyset_index"),
+        ("sources", "0007_trigram_indexes"),
+        ("tags", "0004_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="problem",
+            name="tag_ids",
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(backfill_tag_ids, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="problem",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["tag_ids"], name="problem_tag_ids_gin"),
+        ),
+    ]
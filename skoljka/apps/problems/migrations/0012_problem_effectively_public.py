@@ -0,0 +1,55 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:19
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_effectively_public(apps, schema_editor):
+    Problem = apps.get_model("problems", "Problem")
+    Source = apps.get_model("sources", "Source")
+    rows = {pk: (parent_id, is_public) for pk, parent_id, is_public in Source.objects.values_list("pk", "parent_id", "is_public")}
+
+    def chain_is_public(source_id, seen=()):
+        if source_id is None:
+            return True
+        if source_id in seen or source_id not in rows:
+            return False
+        parent_id, is_public = rows[source_id]
+        return is_public and chain_is_public(parent_id, (*seen, source_id))
+
+    public_ids = [pk for pk in rows if chain_is_public(pk)]
+    Problem.objects.filter(is_public=True).filter(
+        models.Q(source=None) | models.Q(source__in=public_ids)
+    ).update(effectively_public=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0011_problem_tag_ids"),
+        ("sources", "0007_trigram_indexes"),
+        ("tags", "0004_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="problem",
+            name="effectively_public",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(backfill_effectively_public, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(condition=models.Q(("effectively_public", True)), fields=["source", "year"], name="problem_public_source_year_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(django.db.models.functions.comparison.Coalesce(models.F("source"), models.Value(9223372036854775807)), django.db.models.functions.comparison.Coalesce(models.F("year"), models.Value(2147483647)), models.F("problem_label"), models.F("id"), condition=models.Q(("effectively_public", True)), name="problem_public_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(condition=models.Q(("effectively_public", True)), fields=["-id"], name="problem_public_recent_idx"),
+        ),
+    ]
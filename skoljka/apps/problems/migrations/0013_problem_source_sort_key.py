@@ -0,0 +1,47 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:41
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_source_sort_key(apps, schema_editor):
+    Problem = apps.get_model("problems", "Problem")
+    Source = apps.get_model("sources", "Source")
+    for pk, order, slug in Source.objects.values_list("pk", "order", "slug"):
+        Problem.objects.filter(source_id=pk).update(source_sort_key=f"{order + 2**31:010d}{slug},")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0012_problem_effectively_public"),
+        ("sources", "0010_source_year_stats"),
+        ("tags", "0004_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="problem",
+            name="problem_keyset_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="problem",
+            name="problem_public_keyset_idx",
+        ),
+        migrations.AddField(
+            model_name="problem",
+            name="source_sort_key",
+            field=models.TextField(db_collation="C", default="~", editable=False),
+        ),
+        migrations.RunPython(backfill_source_sort_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(models.F("source_sort_key"), django.db.models.functions.comparison.Coalesce(models.F("year"), models.Value(2147483647)), models.F("problem_label"), models.F("id"), name="problem_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(models.F("source_sort_key"), django.db.models.functions.comparison.Coalesce(models.F("year"), models.Value(2147483647)), models.F("problem_label"), models.F("id"), condition=models.Q(("effectively_public", True)), name="problem_public_keyset_idx"),
+        ),
+    ]
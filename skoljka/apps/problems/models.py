@@ -1,10 +1,48 @@
+import json
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
 from django.urls import reverse
+from django.utils import timezone
 
+from skoljka.apps.sources.closure import sort_path
 from skoljka.apps.sources.models import Source
+from skoljka.apps.sources.tree import source_tree
 from skoljka.apps.tags.models import Tag
-from skoljka.utils.permissions import PermissionModel
+from skoljka.utils.keyset import KeyColumn
+from skoljka.utils.permissions import PermissionModel, PermissionQuerySet, PermissionType
+from skoljka.utils.trigram import trigram_index
+
+# ``Problem.source_sort_key`` of problems without a source; sorts after every
+# key that starts with a digit.
+NO_SOURCE_SORT_KEY = "~"
+
+# Keyset pagination order: sources in ``Source.Meta.ordering`` (order, slug)
+# through the denormalized ``source_sort_key``. Problems without a source or
+# year sort last, as with NULLS LAST, but the keys stay non-null so row
+# comparisons work and match ``problem_keyset_idx``.
+PROBLEM_KEYSET = (
+    KeyColumn("source_sort_key"),
+    KeyColumn("keyset_year", Coalesce(F("year"), Value(2**31 - 1))),
+    KeyColumn("problem_label"),
+    KeyColumn("id"),
+)
+
+
+class ProblemQuerySet(PermissionQuerySet):
+    def for_user(self, user, permission: PermissionType = "view") -> "ProblemQuerySet":
+        if not user.is_authenticated:
+            # Covers private sources too, and matches the partial indexes.
+            return self.filter(effectively_public=True)
+        return super().for_user(user, permission)
 
 
 class Problem(PermissionModel):
@@ -17,28 +55,72 @@ class Problem(PermissionModel):
     title = models.CharField(max_length=255, blank=True)
     expected_answer = models.JSONField(null=True, blank=True)
     tags = models.ManyToManyField(Tag, blank=True)
+    # Copy of the ``tags`` ids for containment filters (``tag_ids__contains``);
+    # kept in sync by ``signals``.
+    tag_ids = ArrayField(models.BigIntegerField(), default=list, blank=True, editable=False)
+    # ``is_public`` and every source up the parent chain public. Set by
+    # ``save``; ``signals`` refresh it when a source changes.
+    effectively_public = models.BooleanField(default=False, editable=False)
+    # The source's (order, slug) as text, for keyset pagination. Set by
+    # ``save``; ``signals`` refresh it when a source changes.
+    source_sort_key = models.TextField(default=NO_SOURCE_SORT_KEY, editable=False, db_collation="C")
     content = GenericRelation(
         "content.Content",
         content_type_field="content_type",
         object_id_field="object_id",
     )
 
+    objects = ProblemQuerySet.as_manager()
+
     class Meta:
         ordering = ["source", "year", "problem_label"]
         indexes = [
             models.Index(fields=["source", "year"], name="problem_source_year_idx"),
             models.Index(fields=["source", "year", "problem_label"], name="problem_source_year_label_idx"),
+            trigram_index(F("title"), name="problem_title_trgm"),
+            trigram_index(F("problem_label"), name="problem_label_trgm"),
+            models.Index(*(c.expression or F(c.name) for c in PROBLEM_KEYSET), name="problem_keyset_idx"),
+            GinIndex(fields=["tag_ids"], name="problem_tag_ids_gin"),
+            # Anonymous visitors only ever see effectively public problems.
+            models.Index(
+                fields=["source", "year"], condition=Q(effectively_public=True), name="problem_public_source_year_idx"
+            ),
+            models.Index(
+                *(c.expression or F(c.name) for c in PROBLEM_KEYSET),
+                condition=Q(effectively_public=True),
+                name="problem_public_keyset_idx",
+            ),
+            models.Index(fields=["-id"], condition=Q(effectively_public=True), name="problem_public_recent_idx"),
         ]
 
+    def save(self, **kwargs) -> None:
+        tree = source_tree()
+        self.effectively_public = self.is_public and (self.source_id is None or self.source_id in tree.public_ids)
+        self.source_sort_key = problem_source_sort_key(tree.get(self.source_id) or self.source)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            extra = []
+            if {"is_public", "source", "source_id"} & set(update_fields):
+                extra.append("effectively_public")
+            if {"source", "source_id"} & set(update_fields):
+                extra.append("source_sort_key")
+            kwargs["update_fields"] = [name for name in [*update_fields, *extra] if name != "tag_ids"]
+        elif not self._state.adding and not kwargs.get("force_insert"):
+            # Only ``sync_tag_ids`` writes ``tag_ids``; a stale instance must
+            # not restore the ids it was loaded with.
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "tag_ids" and field.attname not in deferred
+            ]
+        super().save(**kwargs)
+
     @property
     def display_title(self) -> str:
         if self.title:
             return self.title
-        if self.source and self.year and self.problem_label:
-            return f"{self.source.name()} {self.year} Problem {self.problem_label}"
-        if self.source and self.year:
-            return f"{self.source.name()} {self.year}"
-        return "(unnamed problem)"
+        return generated_problem_title(self.source, self.year, self.problem_label)
 
     def get_content(self, language: str = "en"):
         """Get the Content object for this problem."""
@@ -51,3 +133,81 @@ class Problem(PermissionModel):
 
     def get_absolute_url(self) -> str:
         return reverse("problem_detail", kwargs={"pk": self.pk})
+
+
+def problem_source_sort_key(source) -> str:
+    """``Problem.source_sort_key`` for ``source`` (a Source, SourceNode or None)."""
+    return NO_SOURCE_SORT_KEY if source is None else sort_path([source])
+
+
+def generated_problem_title(source, year: int | None, problem_label: str) -> str:
+    """Title of an untitled problem; ``source`` is anything with ``name()``."""
+    if source and year and problem_label:
+        return f"{source.name()} {year} Problem {problem_label}"
+    if source and year:
+        return f"{source.name()} {year}"
+    return "(unnamed problem)"
+
+
+def _pdf_export_expires_at():
+    return timezone.now() + timedelta(days=settings.PDF_EXPORT_JOB_TTL_DAYS)
+
+
+class PdfExportJob(models.Model):
+    """PDF export too large to compile inside a request.
+
+    The worker compiles ``problem_ids`` in chunks and merges them into
+    ``result_path``.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+        CANCELLED = "cancelled"
+
+    TERMINAL = frozenset([Status.DONE, Status.FAILED, Status.CANCELLED])
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="pdf_export_jobs",
+    )
+    # Problems in export order, already filtered for the requesting user.
+    problem_ids = models.JSONField(default=list)
+    title = models.CharField(max_length=255)
+    filename = models.CharField(max_length=255)
+    heading_mode = models.CharField(max_length=20)
+    language = models.CharField(max_length=10)
+    # [source_id, year] passed through as compact_generated_titles_for.
+    compact_generated_titles_for = models.JSONField(null=True, blank=True)
+    progress_json = models.TextField(default='{"done":0,"total":0}')
+    status = models.CharField(
+        max_length=12, choices=Status.choices, default=Status.PENDING,
+    )
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(default=_pdf_export_expires_at)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "status"]),
+            models.Index(fields=["expires_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"PdfExportJob({self.id}, {self.status})"
+
+    def is_terminal(self) -> bool:
+        return self.status in self.TERMINAL
+
+    def progress(self) -> dict:
+        return json.loads(self.progress_json or "{}")
+
+    @property
+    def result_path(self) -> Path:
+        return Path(settings.PDF_EXPORT_JOB_DIR) / f"{self.id}.pdf"
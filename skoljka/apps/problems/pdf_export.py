@@ -1,15 +1,26 @@
-import shutil
-from io import BytesIO
+import hashlib
+import json
+import subprocess
+from collections.abc import Callable, Iterator
+from contextlib import ExitStack
 from dataclasses import dataclass
+from functools import cache
+from itertools import combinations
 from pathlib import Path
-from zipfile import ZIP_DEFLATED, ZipFile
+from tempfile import TemporaryDirectory
+from typing import BinaryIO
+from zipfile import ZipFile
 
 from django.utils.translation import get_language, gettext as _
 
+from skoljka.apps.problems.export_cache import export_cache
+from skoljka.apps.problems.latex_format import FORMAT_END_MARKER, build_latex_format, discard_latex_format, latex_format
 from skoljka.apps.problems.models import Problem
 from skoljka.apps.problems.titles import problem_display_title, problem_title_context
 from skoljka.utils.external_runner import external_temporary_directory, run_external
-from skoljka.utils.markdown import render_latex
+from skoljka.utils.file_staging import FileStager
+from skoljka.utils.markdown import LatexRenderResult, render_latex_many, renderer_version
+from skoljka.utils.zip_stream import stream_zip, write_path
 
 
 MAX_PDF_EXPORT_PROBLEMS = 100
@@ -26,6 +37,8 @@ PDF_HEADING_MODES = {
     PDF_HEADING_NUMBER_TITLE,
 }
 PDF_HEADING_DEFAULT = PDF_HEADING_LABEL
+# Packages that _latex_preamble adds only when the statements need them.
+LATEX_OPTIONAL_PACKAGES = ("xcolor", "graphicx", "ulem")
 
 
 class PdfExportError(Exception):
@@ -34,48 +47,114 @@ class PdfExportError(Exception):
 
 @dataclass(frozen=True)
 class ProblemPdfExport:
+    """A compiled PDF, opened for reading; whoever sends it closes ``file``."""
+
     filename: str
-    data: bytes
+    file: BinaryIO
+    etag: str
+
+    @property
+    def data(self) -> bytes:
+        self.file.seek(0)
+        return self.file.read()
 
 
 @dataclass(frozen=True)
 class ProblemLatexExport:
+    """A LaTeX zip export: an open cached ``file``, or ``chunks`` streamed while it is built."""
+
     filename: str
-    data: bytes
+    etag: str
+    file: BinaryIO | None = None
+    chunks: Iterator[bytes] | None = None
+
+    @property
+    def data(self) -> bytes:
+        if self.file is not None:
+            self.file.seek(0)
+            return self.file.read()
+        return b"".join(self.chunks or ())
+
+
+def problem_export_queryset(queryset):
+    return queryset.select_related("source").prefetch_related("tags", "content__attachments")
 
 
 def export_problems_pdf(
     problems: list[Problem],
     *,
-    title: str,
+    title: str | None,
     filename: str,
     compact_generated_titles_for: tuple[int, int] | None = None,
     heading_mode: str = PDF_HEADING_DEFAULT,
+    first_index: int = 1,
+    first_page: int = 1,
+    build_format: bool = False,
 ) -> ProblemPdfExport:
+    """Compile ``problems`` to a PDF, reusing a cached one when possible.
+
+    ``first_index``, ``first_page`` and ``title=None`` (no title block) let
+    export jobs compile a long export in chunks that merge seamlessly.
+    ``build_format`` builds a missing preamble format first instead of
+    compiling the full preamble; only background jobs can afford the wait.
+    """
     if len(problems) > MAX_PDF_EXPORT_PROBLEMS:
         raise PdfExportError(_("Too many problems to export at once."))
-    with external_temporary_directory() as build_dir:
-        tex_path = _build_latex_export(
-            problems,
-            build_dir,
-            title=title,
-            compact_generated_titles_for=compact_generated_titles_for,
-            heading_mode=heading_mode,
-        )
-        pdf_path = build_dir / "problems.pdf"
-
-        result = run_external(
-            ["xelatex", "-interaction=nonstopmode", "-halt-on-error", tex_path.name],
-            cwd=build_dir,
-            capture_output=True,
-            text=True,
-            check=False,
-            timeout=30,
-        )
-        if result.returncode != 0 or not pdf_path.exists():
-            log = (result.stderr or result.stdout or "").strip()
-            raise PdfExportError(log[:1000] or _("PDF export failed."))
-        return ProblemPdfExport(filename=filename, data=pdf_path.read_bytes())
+    key = export_cache_key(
+        "pdf",
+        problems,
+        title=title,
+        compact_generated_titles_for=compact_generated_titles_for,
+        heading_mode=heading_mode,
+        first_index=first_index,
+        first_page=first_page,
+    )
+    exports = export_cache()
+    file = exports.get(key, ".pdf")
+    if file is None:
+        with external_temporary_directory() as build_dir:
+            tex_path, preamble = _build_latex_export(
+                problems,
+                build_dir,
+                title=title,
+                compact_generated_titles_for=compact_generated_titles_for,
+                heading_mode=heading_mode,
+                first_index=first_index,
+                first_page=first_page,
+            )
+            pdf_path = _compile_pdf(tex_path, preamble, build_format=build_format)
+            file = exports.put(key, ".pdf", pdf_path)
+    return ProblemPdfExport(filename=filename, file=file, etag=key)
+
+
+def _compile_pdf(tex_path: Path, preamble: str, *, build_format: bool) -> Path:
+    pdf_path = tex_path.with_suffix(".pdf")
+    fmt = build_latex_format(preamble) if build_format else latex_format(preamble)
+    result = _run_xelatex(tex_path, fmt)
+    if fmt is not None and (result.returncode != 0 or not pdf_path.exists()):
+        # A format that no longer loads (e.g. after a TeX upgrade) fails every
+        # compile, so retry once with the full preamble before giving up.
+        result = _run_xelatex(tex_path, None)
+        if result.returncode == 0 and pdf_path.exists():
+            discard_latex_format(fmt)
+    if result.returncode != 0 or not pdf_path.exists():
+        log = (result.stderr or result.stdout or "").strip()
+        raise PdfExportError(log[:1000] or _("PDF export failed."))
+    return pdf_path
+
+
+def _run_xelatex(tex_path: Path, fmt: Path | None) -> subprocess.CompletedProcess[str]:
+    args = ["xelatex", "-interaction=nonstopmode", "-halt-on-error"]
+    if fmt is not None:
+        args += ["-fmt", str(fmt)]
+    return run_external(
+        [*args, tex_path.name],
+        cwd=tex_path.parent,
+        capture_output=True,
+        text=True,
+        check=False,
+        timeout=30,
+    )
 
 
 def export_problems_latex_zip(
@@ -88,7 +167,21 @@ def export_problems_latex_zip(
 ) -> ProblemLatexExport:
     if len(problems) > MAX_PDF_EXPORT_PROBLEMS:
         raise PdfExportError(_("Too many problems to export at once."))
-    with external_temporary_directory() as build_dir:
+    key = export_cache_key(
+        "latex-zip",
+        problems,
+        title=title,
+        compact_generated_titles_for=compact_generated_titles_for,
+        heading_mode=heading_mode,
+    )
+    file = export_cache().get(key, ".zip")
+    if file is not None:
+        return ProblemLatexExport(filename=filename, etag=key, file=file)
+
+    # Build the sources now, so errors surface before the response starts.
+    cleanup = ExitStack()
+    try:
+        build_dir = Path(cleanup.enter_context(TemporaryDirectory(prefix="skoljka-latex-")))
         _build_latex_export(
             problems,
             build_dir,
@@ -96,55 +189,180 @@ def export_problems_latex_zip(
             compact_generated_titles_for=compact_generated_titles_for,
             heading_mode=heading_mode,
         )
-        data = BytesIO()
-        with ZipFile(data, "w", ZIP_DEFLATED) as zf:
-            for path in sorted(p for p in build_dir.rglob("*") if p.is_file()):
-                zf.write(path, path.relative_to(build_dir).as_posix())
-        return ProblemLatexExport(filename=filename, data=data.getvalue())
+    except BaseException:
+        cleanup.close()
+        raise
+    return ProblemLatexExport(filename=filename, etag=key, chunks=_stream_latex_zip(build_dir, key, cleanup))
+
+
+def _stream_latex_zip(build_dir: Path, key: str, cleanup: ExitStack) -> Iterator[bytes]:
+    """Zip ``build_dir`` chunk by chunk, storing the archive in the export cache on the way."""
+
+    def write(zf: ZipFile) -> Iterator[None]:
+        for input_path in sorted(p for p in build_dir.rglob("*") if p.is_file()):
+            yield from write_path(zf, input_path.relative_to(build_dir).as_posix(), input_path)
+
+    with cleanup, export_cache().writer(key, ".zip") as cached:
+        for chunk in stream_zip(write):
+            cached.write(chunk)
+            yield chunk
+
+
+@cache
+def export_template_version() -> str:
+    """Hash of this module (LaTeX template) and the renderer version."""
+    digest = hashlib.sha256(Path(__file__).read_bytes())
+    digest.update(renderer_version().encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def export_cache_key(
+    kind: str,
+    problems: list[Problem],
+    *,
+    title: str | None,
+    compact_generated_titles_for: tuple[int, int] | None,
+    heading_mode: str,
+    first_index: int = 1,
+    first_page: int = 1,
+) -> str:
+    """Key identifying an export's output: problems, statements, headings and template."""
+    heading_mode = normalize_pdf_heading_mode(heading_mode)
+    title_context = problem_title_context(problems, compact_generated_titles_for)
+    problem_parts = [
+        [
+            problem.pk,
+            problem_export_heading(index, problem, title_context, heading_mode),
+            _content_source_hash(next(iter(problem.content.all()), None)),
+        ]
+        for index, problem in enumerate(problems, start=first_index)
+    ]
+    payload = json.dumps(
+        [kind, export_template_version(), get_language(), title, heading_mode, first_page, problem_parts],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _content_source_hash(content) -> str:
+    if content is None:
+        return ""
+    attachments = sorted((a.name, a.file.name, a.size) for a in content.attachments.all())
+    payload = json.dumps([content.source_md, content.renderer_version, attachments], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
 def _build_latex_export(
     problems: list[Problem],
     build_dir: Path,
     *,
-    title: str,
+    title: str | None,
     compact_generated_titles_for: tuple[int, int] | None,
     heading_mode: str,
-) -> Path:
+    first_index: int = 1,
+    first_page: int = 1,
+) -> tuple[Path, str]:
+    """Write ``problems.tex`` into ``build_dir``; return its path and dumpable preamble."""
     heading_mode = normalize_pdf_heading_mode(heading_mode)
+    fragments = _LatexFragments()
+    title_ref = fragments.add(title) if title is not None else None
+    sections = _problem_sections(
+        problems,
+        FileStager(build_dir),
+        fragments,
+        compact_generated_titles_for,
+        heading_mode,
+        first_index=first_index,
+    )
+    fragments.render()
     packages: set[str] = set()
-    body = _problem_sections(problems, build_dir, packages, compact_generated_titles_for, heading_mode)
-    tex = _latex_document(title, body, packages)
+    body = sections(packages)
+    rendered_title = fragments[title_ref].body if title_ref is not None else None
+    preamble = _latex_preamble(packages)
+    tex = _latex_document(preamble, rendered_title, body, packages, first_page=first_page)
     tex_path = build_dir / "problems.tex"
     tex_path.write_text(tex, encoding="utf-8")
-    return tex_path
+    return tex_path, preamble
+
+
+class _LatexFragments:
+    """LaTeX fragments of one export, rendered in a single batched call.
+
+    ``add()`` returns a reference that can be looked up after ``render()``.
+    Identical fragments (e.g. repeated placeholders) are rendered once.
+    """
+
+    def __init__(self) -> None:
+        self._items: list[tuple[str, dict[str, str] | None]] = []
+        self._refs: dict[tuple[str, tuple[tuple[str, str], ...]], int] = {}
+        self._results: list[LatexRenderResult] = []
+
+    def add(self, source: str, attachment_paths: dict[str, str] | None = None) -> int:
+        key = (source, tuple(sorted((attachment_paths or {}).items())))
+        if key not in self._refs:
+            self._refs[key] = len(self._items)
+            self._items.append((source, attachment_paths))
+        return self._refs[key]
+
+    def render(self) -> None:
+        self._results = render_latex_many(self._items)
+
+    def __getitem__(self, ref: int) -> LatexRenderResult:
+        return self._results[ref]
 
 
 def _problem_sections(
     problems: list[Problem],
-    build_dir: Path,
-    packages: set[str],
+    files: FileStager,
+    fragments: _LatexFragments,
     compact_generated_titles_for: tuple[int, int] | None = None,
     heading_mode: str = PDF_HEADING_DEFAULT,
-) -> str:
+    *,
+    first_index: int = 1,
+) -> Callable[[set[str]], str]:
+    """Queue the fragments of every problem section.
+
+    Returns a function that assembles the sections, and collects their
+    packages, once ``fragments`` are rendered.
+    """
     if not problems:
-        return _latex_problem_placeholder(_("No problems found."))
-    parts = []
+        empty_ref = fragments.add(_("No problems found."))
+        return lambda packages: fragments[empty_ref].body
     language = get_language()
     title_context = problem_title_context(problems, compact_generated_titles_for)
-    for index, problem in enumerate(problems, start=1):
+    placeholder_ref = fragments.add(_("No problem statement available."))
+    planned = []
+    for index, problem in enumerate(problems, start=first_index):
+        heading = _problem_latex_heading(index, problem, title_context, heading_mode)
+        heading_ref = fragments.add(heading) if heading else None
         content = next(iter(problem.content.all()), None)
-        statement = ""
+        # Statements come from Content.compiled_latex; only rows compiled
+        # before it existed are rendered here.
+        statement: tuple[str, list[str]] | int = ("", [])
         if content:
-            source = content.source_for(language)
-            attachment_paths = _copy_attachments(content, build_dir, problem_index=index)
-            rendered = render_latex(source, attachment_paths=attachment_paths)
-            statement = rendered.body
-            packages.update(rendered.packages)
-        if not statement:
-            statement = _latex_problem_placeholder(_("No problem statement available."))
-        parts.append(_problem_latex_section(index, problem, title_context, heading_mode, statement))
-    return "\n".join(parts)
+            attachment_paths = _stage_attachments(content, files, problem_index=index)
+            cached = content.latex_for(language, attachment_dir=f"attachments/p{index}")
+            if cached is not None:
+                statement = cached
+            else:
+                statement = fragments.add(content.source_for(language), attachment_paths)
+        planned.append((heading_ref, statement))
+
+    def assemble(packages: set[str]) -> str:
+        parts = []
+        for heading_ref, statement in planned:
+            if isinstance(statement, int):
+                rendered = fragments[statement]
+                statement = (rendered.body, rendered.packages)
+            body, statement_packages = statement
+            packages.update(statement_packages)
+            if not body:
+                body = fragments[placeholder_ref].body
+            heading = fragments[heading_ref].body if heading_ref is not None else ""
+            parts.append(_problem_latex_section(heading_mode, heading, body))
+        return "\n".join(parts)
+
+    return assemble
 
 
 def normalize_pdf_heading_mode(raw: str | None) -> str:
@@ -166,25 +384,24 @@ def problem_export_heading(index: int, problem: Problem, title_context=None, hea
 
 
 def _problem_latex_heading(index: int, problem: Problem, title_context, heading_mode: str) -> str:
+    """Markdown source of a problem heading, to be rendered with the statements."""
     heading_mode = normalize_pdf_heading_mode(heading_mode)
     if heading_mode == PDF_HEADING_NONE:
         return ""
     title = problem_display_title(problem, title_context)
     if heading_mode == PDF_HEADING_NUMBER:
-        return render_latex(f"{index}\\.").body
+        return f"{index}\\."
     if heading_mode == PDF_HEADING_LABEL:
-        return render_latex(_problem_label_heading(index, problem).replace(".", r"\.")).body
+        return _problem_label_heading(index, problem).replace(".", r"\.")
     if heading_mode == PDF_HEADING_TITLE:
-        return render_latex(title).body
-    return render_latex(f"{index}\\. {title}").body
+        return title
+    return f"{index}\\. {title}"
 
 
-def _problem_latex_section(index: int, problem: Problem, title_context, heading_mode: str, statement: str) -> str:
+def _problem_latex_section(heading_mode: str, heading: str, statement: str) -> str:
     heading_mode = normalize_pdf_heading_mode(heading_mode)
     if heading_mode in {PDF_HEADING_NUMBER, PDF_HEADING_LABEL}:
-        heading = _problem_latex_heading(index, problem, title_context, heading_mode)
         return f"\\problemblock\n\\noindent {heading}\\quad {statement}\n"
-    heading = _problem_latex_heading(index, problem, title_context, heading_mode)
     heading_tex = f"\\problemheading{{{heading}}}\n\n" if heading else "\\problemblock\n"
     return f"{heading_tex}{statement}\n"
 
@@ -194,27 +411,29 @@ def _problem_label_heading(index: int, problem: Problem) -> str:
     return label if label.endswith(".") else f"{label}."
 
 
-def _copy_attachments(content, build_dir: Path, *, problem_index: int) -> dict[str, str]:
-    attachment_dir = build_dir / "attachments" / f"p{problem_index}"
-    attachment_dir.mkdir(parents=True, exist_ok=True)
+def _stage_attachments(content, files: FileStager, *, problem_index: int) -> dict[str, str]:
+    (files.root / "attachments" / f"p{problem_index}").mkdir(parents=True, exist_ok=True)
     paths = {}
     for attachment in content.attachments.all():
         if not attachment.file:
             continue
-        target = attachment_dir / attachment.name
-        target.parent.mkdir(parents=True, exist_ok=True)
-        with attachment.file.open("rb") as src, target.open("wb") as dst:
-            shutil.copyfileobj(src, dst)
-        paths[attachment.name] = f"attachments/p{problem_index}/{attachment.name}"
+        path = f"attachments/p{problem_index}/{attachment.name}"
+        files.stage(attachment.file, path)
+        paths[attachment.name] = path
     return paths
 
 
-def _latex_problem_placeholder(text: str) -> str:
-    return render_latex(text).body
+def latex_export_preambles() -> list[str]:
+    """Every preamble variant an export can produce, for prebuilding formats."""
+    return [
+        _latex_preamble(set(packages))
+        for n in range(len(LATEX_OPTIONAL_PACKAGES) + 1)
+        for packages in combinations(LATEX_OPTIONAL_PACKAGES, n)
+    ]
 
 
-def _latex_document(title: str, body: str, packages: set[str]) -> str:
-    rendered_title = render_latex(title).body
+def _latex_preamble(packages: set[str]) -> str:
+    """Preamble part that is dumped into a precompiled format (see latex_format)."""
     extra = []
     if "xcolor" in packages:
         extra.append("\\usepackage{xcolor}")
@@ -222,23 +441,36 @@ def _latex_document(title: str, body: str, packages: set[str]) -> str:
         extra.append("\\usepackage{graphicx}")
     if "ulem" in packages:
         extra.append("\\usepackage[normalem]{ulem}")
-    if "hyperref" in packages:
-        extra.append("\\usepackage{hyperref}")
-    preamble = "\n".join(extra)
+    optional = "\n".join(extra)
     return rf"""\documentclass[a4paper,12pt]{{article}}
 \usepackage{{fontspec}}
 \usepackage[a4paper,margin=2.5cm]{{geometry}}
 \usepackage{{amsmath,amssymb}}
-{preamble}
+{optional}
 \newcommand{{\problemblock}}{{\par\bigskip}}
 \newcommand{{\problemheading}}[1]{{\problemblock\noindent{{\large\normalfont #1}}\par\smallskip}}
+"""
 
-\title{{{rendered_title}}}
-\date{{}}
 
+def _latex_document(
+    preamble: str,
+    rendered_title: str | None,
+    body: str,
+    packages: set[str],
+    *,
+    first_page: int = 1,
+) -> str:
+    # hyperref patches too much at \begin{document} to be dumped safely.
+    late = "\\usepackage{hyperref}\n" if "hyperref" in packages else ""
+    title_setup = f"\\title{{{rendered_title}}}\n\\date{{}}\n" if rendered_title is not None else ""
+    begin = "\\maketitle\n" if rendered_title is not None else ""
+    if first_page != 1:
+        begin = f"\\setcounter{{page}}{{{first_page}}}\n{begin}"
+    return rf"""{preamble}{FORMAT_END_MARKER}
+{late}
+{title_setup}
 \begin{{document}}
-\maketitle
-
+{begin}
 {body}
 
 \end{{document}}
@@ -0,0 +1,107 @@
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import BigIntegerField, CharField, F, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.functions import Cast, Coalesce, Concat, LPad
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from skoljka.apps.problems.models import NO_SOURCE_SORT_KEY, Problem
+from skoljka.apps.sources.closure import SORT_PATH_SEPARATOR
+from skoljka.apps.sources.models import Source
+from skoljka.apps.sources.tree import source_tree
+from skoljka.apps.sources.year_stats import refresh_source_year_stats
+from skoljka.apps.tags.models import Tag
+
+
+def sync_tag_ids(problems) -> int:
+    """Recompute ``Problem.tag_ids`` from the tag links in one UPDATE."""
+    ids = (
+        Problem.tags.through.objects.filter(problem_id=OuterRef("pk"))
+        .values("problem_id")
+        .annotate(ids=ArrayAgg("tag_id", order_by="tag_id"))
+        .values("ids")
+    )
+    empty = Value([], output_field=ArrayField(BigIntegerField()))
+    return problems.update(tag_ids=Coalesce(Subquery(ids), empty))
+
+
+def sync_source_sort_keys(problems) -> int:
+    """Recompute ``Problem.source_sort_key``, writing only rows that change."""
+    key = Concat(
+        LPad(Cast(Cast("order", BigIntegerField()) + Value(2**31, BigIntegerField()), CharField()), 10, Value("0")),
+        F("slug"),
+        Value(SORT_PATH_SEPARATOR),
+        output_field=TextField(),
+    )
+    source_key = Source.objects.filter(pk=OuterRef("source_id")).order_by().values(key=key)[:1]
+    wanted = Coalesce(Subquery(source_key), Value(NO_SOURCE_SORT_KEY), output_field=TextField())
+    return problems.annotate(wanted_sort_key=wanted).exclude(source_sort_key=F("wanted_sort_key")).update(
+        source_sort_key=wanted
+    )
+
+
+def sync_effectively_public(problems) -> int:
+    """Recompute ``Problem.effectively_public``, writing only rows that change."""
+    public = Q(is_public=True) & (Q(source=None) | Q(source__in=source_tree().public_ids))
+    hidden = problems.filter(~public, effectively_public=True).update(effectively_public=False)
+    return hidden + problems.filter(public, effectively_public=False).update(effectively_public=True)
+
+
+@receiver(m2m_changed, sender=Problem.tags.through)
+def sync_problem_tag_ids(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # ``tag.problem_set.clear()`` doesn't say which problems it touched.
+        instance._cleared_problem_ids = list(instance.problem_set.values_list("pk", flat=True))
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        sync_tag_ids(Problem.objects.filter(pk=instance.pk))
+    elif action == "post_clear":
+        sync_tag_ids(Problem.objects.filter(pk__in=instance.__dict__.pop("_cleared_problem_ids", [])))
+    else:
+        sync_tag_ids(Problem.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_delete, sender=Tag)
+def drop_deleted_tag_id(sender, instance, **kwargs):
+    # The cascade removes tag links without sending m2m_changed.
+    sync_tag_ids(Problem.objects.filter(tag_ids__contains=[instance.pk]))
+
+
+@receiver(post_save, sender=Source)
+def sync_source_problem_visibility(sender, instance, created, **kwargs):
+    # A new source has no problems or children yet.
+    if not created:
+        sync_effectively_public(Problem.objects.filter(source__in=source_tree().descendant_ids(instance.pk)))
+        sync_source_sort_keys(Problem.objects.filter(source=instance))
+
+
+@receiver(post_delete, sender=Source)
+def sync_orphaned_problem_visibility(sender, instance, **kwargs):
+    # Problems of a deleted source keep only their own visibility.
+    orphans = Problem.objects.filter(source=None)
+    sync_effectively_public(orphans)
+    sync_source_sort_keys(orphans)
+
+
+@receiver(pre_save, sender=Problem)
+def remember_problem_year_key(sender, instance, **kwargs):
+    # A move to another source or year must recount the row it left too.
+    if instance.pk is not None:
+        instance._previous_year_key = (
+            Problem.objects.filter(pk=instance.pk).values_list("source_id", "year").first()
+        )
+
+
+@receiver(post_save, sender=Problem)
+def refresh_saved_problem_year_stats(sender, instance, **kwargs):
+    keys = [(instance.source_id, instance.year)]
+    previous = instance.__dict__.pop("_previous_year_key", None)
+    if previous is not None:
+        keys.append(previous)
+    refresh_source_year_stats(keys)
+
+
+@receiver(post_delete, sender=Problem)
+def refresh_deleted_problem_year_stats(sender, instance, **kwargs):
+    refresh_source_year_stats([(instance.source_id, instance.year)])
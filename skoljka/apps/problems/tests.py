@@ -1,17 +1,26 @@
+import html
+import os
+import re
 import subprocess
 from io import BytesIO
+from pathlib import Path
 from unittest.mock import patch
 from zipfile import ZipFile
 
+import pymupdf
+from django.contrib.auth.models import AnonymousUser
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, override_settings
 from django.urls import reverse
 from tempfile import TemporaryDirectory
 
-from skoljka.apps.content.models import ContentAttachment
-from skoljka.apps.problems.models import Problem
+from skoljka.apps.content.models import Content, ContentAttachment
+from skoljka.apps.problems.export_cache import ExportCache
+from skoljka.apps.problems.export_worker import run_export_job
+from skoljka.apps.problems.models import PdfExportJob, Problem
 from skoljka.apps.problems.pdf_export import export_problems_latex_zip, export_problems_pdf
 from skoljka.apps.tracking.models import Submission
+from skoljka.utils.markdown import render_latex_many
 from skoljka.tests.factories import (
     make_problem,
     make_source,
@@ -45,6 +54,65 @@ class ProblemModelTest(TestCase):
         p.tags.add(t1, t2)
         self.assertEqual(set(p.tags.all()), {t1, t2})
 
+    def test_tag_ids_follow_tag_changes(self):
+        p = make_problem()
+        t1 = make_tag(slug="algebra", name="Algebra")
+        t2 = make_tag(slug="geo", name="Geometry")
+
+        p.tags.set([t2, t1])
+        p.refresh_from_db()
+        self.assertEqual(p.tag_ids, sorted([t1.pk, t2.pk]))
+
+        t1.problem_set.clear()
+        p.refresh_from_db()
+        self.assertEqual(p.tag_ids, [t2.pk])
+
+        t2.delete()
+        p.refresh_from_db()
+        self.assertEqual(p.tag_ids, [])
+
+    def test_saving_stale_instance_keeps_tag_ids(self):
+        p = make_problem()
+        stale = Problem.objects.get(pk=p.pk)
+        tag = make_tag(slug="stale-tag", name="Stale")
+        p.tags.add(tag)
+
+        stale.title = "Edited"
+        stale.save()
+
+        p.refresh_from_db()
+        self.assertEqual(p.title, "Edited")
+        self.assertEqual(p.tag_ids, [tag.pk])
+        self.assertEqual(list(Problem.objects.filter(tag_ids__contains=[tag.pk])), [p])
+
+    def test_effectively_public_follows_source_chain(self):
+        root = make_source(slug="root")
+        child = make_source(slug="child", parent=root)
+        p = make_problem(source=child)
+        private = make_problem(source=child, is_public=False)
+        self.assertEqual(self._anonymous_ids(), {p.pk})
+
+        root.is_public = False
+        root.save()
+        self.assertEqual(self._anonymous_ids(), set())
+        # Signed-in users still see public problems by their own flag.
+        self.assertIn(p.pk, Problem.objects.for_user(make_user()).values_list("pk", flat=True))
+
+        root.is_public = True
+        root.save()
+        private.is_public = True
+        private.save(update_fields=["is_public"])
+        self.assertEqual(self._anonymous_ids(), {p.pk, private.pk})
+
+        root.is_public = False
+        root.save()
+        root.delete()
+        # Problems of a deleted source keep only their own visibility.
+        self.assertEqual(self._anonymous_ids(), {p.pk, private.pk})
+
+    def _anonymous_ids(self) -> set[int]:
+        return set(Problem.objects.for_user(AnonymousUser()).values_list("pk", flat=True))
+
 
 class ProblemListViewTest(TestCase):
     @classmethod
@@ -79,7 +147,53 @@ class ProblemListViewTest(TestCase):
         r = self.client.get("/problems/")
 
         self.assertNotContains(r, "Showing 1-10 of")
-        self.assertContains(r, "page=2")
+        self.assertContains(r, "Showing 1-50 of 56")
+        self.assertContains(r, 'rel="next"')
+
+    def test_problem_table_pages_by_cursor(self):
+        for i in range(55):
+            make_problem(title=f"Paged {i:02d}")
+
+        first = self.client.get("/problems/")
+        next_url = re.search(r'href="([^"]+)" rel="next"', first.content.decode()).group(1)
+        second = self.client.get(html.unescape(next_url))
+
+        self.assertContains(second, "Showing 51-56 of 56")
+        self.assertContains(second, "Paged 54")
+        self.assertNotContains(second, "Paged 48")
+        previous_url = re.search(r'href="([^"]+)" rel="prev"', second.content.decode()).group(1)
+        self.assertEqual(html.unescape(previous_url), "/problems/")
+
+    def test_problem_table_serves_old_page_numbers(self):
+        for i in range(55):
+            make_problem(title=f"Paged {i:02d}")
+
+        r = self.client.get("/problems/?page=2")
+
+        self.assertContains(r, "Showing 51-56 of 56")
+        self.assertContains(r, "Paged 54")
+        self.assertNotContains(r, "Paged 48")
+        previous_url = re.search(r'href="([^"]+)" rel="prev"', r.content.decode()).group(1)
+        self.assertEqual(html.unescape(previous_url), "/problems/")
+
+    def test_problem_table_orders_sources_by_display_order(self):
+        later = make_source(slug="keyset-b")
+        earlier = make_source(slug="keyset-a")
+        make_problem(title="From B", source=later, year=2020, problem_label="1")
+        make_problem(title="From A", source=earlier, year=2020, problem_label="1")
+
+        r = self.client.get("/problems/")
+        self.assertLess(r.content.index(b"From A"), r.content.index(b"From B"))
+
+        earlier.order = 1
+        earlier.save()
+        r = self.client.get("/problems/")
+        self.assertLess(r.content.index(b"From B"), r.content.index(b"From A"))
+
+    def test_problem_table_ignores_tampered_cursor(self):
+        r = self.client.get("/problems/?page=not-a-cursor")
+
+        self.assertContains(r, self.public.title)
 
     def test_staff_sees_problem_list_actions(self):
         staff = make_staff(username="problem-staff")
@@ -133,6 +247,12 @@ class ProblemListViewTest(TestCase):
 
 
 class ProblemPdfExportTest(TestCase):
+    def setUp(self):
+        self.enterContext(override_settings(
+            EXPORT_CACHE_DIR=self.enterContext(TemporaryDirectory()),
+            PDF_EXPORT_FORMAT_DIR=None,
+        ))
+
     def _fake_xelatex(self, args, **kwargs):
         cwd = kwargs.get("cwd")
         if cwd is None:
@@ -168,6 +288,111 @@ class ProblemPdfExportTest(TestCase):
 
         self.assertIn(r"\includegraphics[width=0.5\linewidth]{\detokenize{attachments/p1/figure.png}}", self.rendered_tex)
 
+    def test_export_reads_statements_from_compiled_latex(self):
+        problem = make_problem(content="Cached $x$ statement.")
+
+        with (
+            patch("skoljka.apps.problems.pdf_export.run_external") as run,
+            patch("skoljka.apps.problems.pdf_export.render_latex_many", wraps=render_latex_many) as render,
+        ):
+            run.side_effect = self._fake_xelatex
+            export_problems_pdf([problem], title="Cached", filename="cached.pdf", heading_mode="none")
+
+        rendered_sources = [source for call in render.call_args_list for source, _paths in call.args[0]]
+        self.assertNotIn("Cached $x$ statement.", rendered_sources)
+        self.assertIn("Cached $x$ statement.", self.rendered_tex)
+
+    def test_export_renderer_runs_do_not_grow_with_problem_count(self):
+        def renderer_runs(problems):
+            # Without the pool, so every render is a Node process.
+            with (
+                patch("skoljka.apps.problems.pdf_export.run_external") as run,
+                patch("skoljka.utils.markdown.renderer_pool", return_value=None),
+                patch("skoljka.utils.markdown.subprocess.run", wraps=subprocess.run) as node,
+            ):
+                run.side_effect = self._fake_xelatex
+                export_problems_pdf(problems, title="Batch", filename="batch.pdf", heading_mode="number-title")
+            return node.call_count
+
+        problems = [make_problem(title=f"Problem {i}", content=f"Statement {i}.") for i in range(5)]
+        Content.objects.filter(pk=problems[0].content.get().pk).update(compiled_latex={})
+
+        self.assertEqual(renderer_runs(problems[:1]), 1)
+        self.assertEqual(renderer_runs(problems), 1)
+        self.assertIn(r"\problemheading{5. Problem 4}", self.rendered_tex)
+        self.assertIn("Statement 0.", self.rendered_tex)
+
+    def test_repeat_export_is_served_from_cache(self):
+        problem = make_problem(content="Cached booklet.")
+
+        with patch("skoljka.apps.problems.pdf_export.run_external") as run:
+            run.side_effect = self._fake_xelatex
+            first = export_problems_pdf([problem], title="Booklet", filename="booklet.pdf")
+            second = export_problems_pdf([problem], title="Booklet", filename="booklet.pdf")
+
+        self.assertEqual(run.call_count, 1)
+        self.assertEqual(first.data, b"%PDF fake")
+        self.assertEqual(second.data, b"%PDF fake")
+
+    def test_changed_statement_misses_cache(self):
+        problem = make_problem(content="Before.")
+
+        with patch("skoljka.apps.problems.pdf_export.run_external") as run:
+            run.side_effect = self._fake_xelatex
+            first = export_problems_pdf([problem], title="Booklet", filename="booklet.pdf")
+            content = problem.content.get()
+            content.set_text("en", "After.")
+            content.save()
+            second = export_problems_pdf([problem], title="Booklet", filename="booklet.pdf")
+
+        self.assertEqual(run.call_count, 2)
+        self.assertNotEqual(first.etag, second.etag)
+        self.assertIn("After.", self.rendered_tex)
+
+    def test_export_builds_format_once_per_preamble(self):
+        built = []
+
+        def fake_format_build(args, **kwargs):
+            jobname = next(arg for arg in args if arg.startswith("-jobname="))
+            built.append(args)
+            (kwargs["cwd"] / f"{jobname.removeprefix('-jobname=')}.fmt").write_bytes(b"fmt")
+            return subprocess.CompletedProcess(args, 0, stdout="", stderr="")
+
+        first, second = make_problem(content="First."), make_problem(content="Second.")
+        with (
+            TemporaryDirectory() as formats,
+            override_settings(PDF_EXPORT_FORMAT_DIR=formats),
+            patch("skoljka.apps.problems.latex_format.run_external", side_effect=fake_format_build),
+            patch("skoljka.apps.problems.pdf_export.run_external") as run,
+        ):
+            run.side_effect = self._fake_xelatex
+            export_problems_pdf([first], title="One", filename="one.pdf", build_format=True)
+            export_problems_pdf([second], title="Two", filename="two.pdf", build_format=True)
+            fmt_files = list(Path(formats).glob("*.fmt"))
+
+        self.assertEqual(len(built), 1)
+        self.assertIn("mylatexformat.ltx", built[0])
+        self.assertEqual(len(fmt_files), 1)
+        for call in run.call_args_list:
+            self.assertIn(str(fmt_files[0].with_suffix("")), call.args[0])
+        self.assertIn(r"\csname endofdump\endcsname", self.rendered_tex)
+
+    def test_request_export_does_not_build_missing_format(self):
+        problem = make_problem(content="Statement.")
+
+        with (
+            TemporaryDirectory() as formats,
+            override_settings(PDF_EXPORT_FORMAT_DIR=formats),
+            patch("skoljka.apps.problems.latex_format.run_external") as build,
+            patch("skoljka.apps.problems.pdf_export.run_external") as run,
+        ):
+            run.side_effect = self._fake_xelatex
+            export_problems_pdf([problem], title="One", filename="one.pdf")
+
+        build.assert_not_called()
+        self.assertEqual(run.call_count, 1)
+        self.assertNotIn("-fmt", run.call_args.args[0])
+
     def test_export_escapes_raw_latex(self):
         problem = make_problem(title=r"\input{title}", content=r"\input{secret}")
 
@@ -226,6 +451,19 @@ class ProblemPdfExportTest(TestCase):
 
         self.assertIn(r"\includegraphics[width=0.5\linewidth]{\detokenize{attachments/p1/figure.png}}", tex)
 
+    def test_latex_zip_streams_first_export_and_caches_it(self):
+        problem = make_problem(content="Streamed.")
+
+        first = export_problems_latex_zip([problem], title="Stream", filename="stream.zip")
+        self.assertIsNone(first.file)
+        data = b"".join(first.chunks)
+        second = export_problems_latex_zip([problem], title="Stream", filename="stream.zip")
+
+        self.assertIsNotNone(second.file)
+        self.assertEqual(second.data, data)
+        with ZipFile(BytesIO(data)) as zf:
+            self.assertIn("Streamed.", zf.read("problems.tex").decode("utf-8"))
+
     def test_latex_zip_namespaces_attachment_paths_by_problem(self):
         with TemporaryDirectory() as tmp, override_settings(MEDIA_ROOT=tmp, MEDIA_URL="/media/"):
             first = make_problem(content="![first](attachment:figure.png)")
@@ -253,6 +491,147 @@ class ProblemPdfExportTest(TestCase):
         self.assertIn(r"\detokenize{attachments/p2/figure.png}", tex)
 
 
+class ExportCacheTest(TestCase):
+    def test_evicts_least_recently_used_files(self):
+        with TemporaryDirectory() as tmp:
+            cache = ExportCache(Path(tmp) / "cache", max_bytes=10)
+            source = Path(tmp) / "export.pdf"
+            source.write_bytes(b"12345")
+            cache.put("old", ".pdf", source).close()
+            cache.put("used", ".pdf", source).close()
+            os.utime(cache.path("old", ".pdf"), (0, 0))
+            os.utime(cache.path("used", ".pdf"), (1, 1))
+            with cache.get("used", ".pdf") as used:
+                self.assertEqual(used.read(), b"12345")
+
+            cache.put("new", ".pdf", source).close()
+
+            self.assertIsNone(cache.get("old", ".pdf"))
+            self.assertTrue(cache.path("used", ".pdf").exists())
+            self.assertTrue(cache.path("new", ".pdf").exists())
+
+    def test_entry_evicted_after_get_stays_readable(self):
+        with TemporaryDirectory() as tmp:
+            cache = ExportCache(Path(tmp) / "cache", max_bytes=5)
+            source = Path(tmp) / "export.pdf"
+            source.write_bytes(b"12345")
+            cache.put("old", ".pdf", source).close()
+            os.utime(cache.path("old", ".pdf"), (0, 0))
+
+            with cache.get("old", ".pdf") as old:
+                cache.put("new", ".pdf", source).close()
+
+                self.assertFalse(cache.path("old", ".pdf").exists())
+                self.assertEqual(old.read(), b"12345")
+
+    def test_download_is_file_response(self):
+        self.client.force_login(make_user(username="export-etag"))
+        make_problem(content="Download me.")
+
+        def fake_xelatex(args, **kwargs):
+            (kwargs["cwd"] / "problems.pdf").write_bytes(b"%PDF fake")
+            return subprocess.CompletedProcess(args, 0, stdout="", stderr="")
+
+        with TemporaryDirectory() as tmp, override_settings(EXPORT_CACHE_DIR=tmp, PDF_EXPORT_FORMAT_DIR=None):
+            with patch("skoljka.apps.problems.pdf_export.run_external", side_effect=fake_xelatex):
+                r = self.client.post("/problems/export/pdf/", {"title": "Problems", "action": "download"})
+                body = b"".join(r.streaming_content)
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(body, b"%PDF fake")
+        # POST downloads cannot be revalidated, so they carry no validator.
+        self.assertNotIn("ETag", r)
+        self.assertIn('filename="problems.pdf"', r["Content-Disposition"])
+
+
+class PdfExportJobTest(TestCase):
+    def setUp(self):
+        self.enterContext(override_settings(
+            EXPORT_CACHE_DIR=self.enterContext(TemporaryDirectory()),
+            PDF_EXPORT_JOB_DIR=self.enterContext(TemporaryDirectory()),
+            PDF_EXPORT_FORMAT_DIR=None,
+        ))
+        self.user = make_user(username="exporter")
+        self.client.force_login(self.user)
+        self.tex_chunks = []
+
+    def _fake_xelatex(self, args, **kwargs):
+        cwd = kwargs["cwd"]
+        self.tex_chunks.append((cwd / "problems.tex").read_text(encoding="utf-8"))
+        doc = pymupdf.open()
+        doc.new_page()
+        doc.save(cwd / "problems.pdf")
+        doc.close()
+        return subprocess.CompletedProcess(args, 0, stdout="", stderr="")
+
+    def test_large_export_starts_background_job(self):
+        problems = [make_problem(content=f"Statement {i}.") for i in range(3)]
+
+        with (
+            patch("skoljka.apps.problems.export_views.MAX_PDF_EXPORT_PROBLEMS", 2),
+            patch("skoljka.apps.problems.export_views.start_export_job_thread") as start,
+        ):
+            r = self.client.post("/problems/export/pdf/", {"title": "Booklet", "action": "download"})
+
+        job = PdfExportJob.objects.get(user=self.user)
+        self.assertRedirects(r, f"/problems/export/jobs/{job.id}/")
+        start.assert_called_once_with(str(job.id))
+        self.assertEqual(job.problem_ids, [p.pk for p in Problem.objects.for_user(self.user)])
+        self.assertEqual(len(job.problem_ids), len(problems))
+
+    def test_job_compiles_chunks_and_merges_with_continuous_numbering(self):
+        problems = [make_problem(content=f"Statement {i}.") for i in range(5)]
+        job = PdfExportJob.objects.create(
+            user=self.user,
+            problem_ids=[p.pk for p in problems],
+            title="Booklet",
+            filename="booklet.pdf",
+            heading_mode="number",
+            language="en",
+        )
+
+        with (
+            patch("skoljka.apps.problems.export_worker.MAX_PDF_EXPORT_PROBLEMS", 2),
+            patch("skoljka.apps.problems.pdf_export.run_external", side_effect=self._fake_xelatex),
+        ):
+            run_export_job(str(job.id))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PdfExportJob.Status.DONE, job.error)
+        self.assertEqual(job.progress(), {"done": 5, "total": 5})
+        self.assertEqual(len(self.tex_chunks), 3)
+        self.assertIn(r"\maketitle", self.tex_chunks[0])
+        self.assertNotIn(r"\maketitle", self.tex_chunks[1])
+        self.assertIn(r"\noindent 3.\quad Statement 2.", self.tex_chunks[1])
+        self.assertIn(r"\setcounter{page}{3}", self.tex_chunks[2])
+        with pymupdf.open(job.result_path) as merged:
+            self.assertEqual(len(merged), 3)
+
+        status = self.client.get(f"/problems/export/jobs/{job.id}/status/").json()
+        self.assertEqual(status["status"], "done")
+        r = self.client.get(status["download_url"])
+        self.assertEqual(r["Content-Type"], "application/pdf")
+        self.assertIn('filename="booklet.pdf"', r["Content-Disposition"])
+        self.assertEqual(r["ETag"], f'"{job.id}"')
+        r.close()
+
+        repeat = self.client.get(status["download_url"], headers={"if-none-match": r["ETag"]})
+        self.assertEqual(repeat.status_code, 304)
+
+    def test_other_users_cannot_see_job(self):
+        job = PdfExportJob.objects.create(
+            user=make_user(username="owner"),
+            problem_ids=[],
+            title="Private",
+            filename="private.pdf",
+            heading_mode="number",
+            language="en",
+        )
+
+        self.assertEqual(self.client.get(f"/problems/export/jobs/{job.id}/status/").status_code, 404)
+        self.assertEqual(self.client.get(f"/problems/export/jobs/{job.id}/").status_code, 404)
+
+
 class ProblemDetailViewTest(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -1,10 +1,13 @@
 from django.urls import path
 
-from skoljka.apps.problems import views
+from skoljka.apps.problems import export_views, views
 
 urlpatterns = [
     path("", views.problem_list, name="problem_list"),
     path("export/pdf/", views.problem_list_pdf, name="problem_list_pdf"),
+    path("export/jobs/<uuid:job_id>/", export_views.pdf_export_job, name="pdf_export_job"),
+    path("export/jobs/<uuid:job_id>/status/", export_views.pdf_export_job_status, name="pdf_export_job_status"),
+    path("export/jobs/<uuid:job_id>/download/", export_views.pdf_export_job_download, name="pdf_export_job_download"),
     path("suggest-tags/", views.problem_suggest_tags, name="problem_suggest_tags"),
     path("<int:pk>/", views.problem_detail, name="problem_detail"),
 ]
@@ -5,3 +5,6 @@ class SearchConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "skoljka.apps.search"
     label = "search"
+
+    def ready(self):
+        from skoljka.apps.search import signals  # noqa: F401
@@ -0,0 +1,81 @@
+"""Cached data for the search form's filter dropdowns.
+
+Entries are keyed by ``SearchFormGeneration.generation``, which Problem,
+Source and Tag signals replace (see ``signals``), by visibility class and by
+language, so a warm search form costs one query for the generation. The
+generation lives in the database because the default cache is per process.
+``QuerySet.update`` and other bulk writes skip the signals; the TTL bounds how
+stale they can make an entry.
+"""
+
+import time
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.utils.translation import get_language
+
+from skoljka.apps.problems.models import Problem
+from skoljka.apps.search.facets import source_counts, tag_counts, year_counts
+from skoljka.apps.search.models import SearchFormGeneration
+from skoljka.apps.sources.hierarchy import source_options_with_hierarchy_labels
+from skoljka.apps.sources.models import Source
+from skoljka.apps.tags.models import Tag
+
+GENERATION_PK = 1
+SEARCH_FORM_TTL = 24 * 3600
+
+
+@dataclass(frozen=True)
+class SearchFormData:
+    sources: list[Source]
+    source_options: list[tuple[Source, str]]
+    tags: list[Tag]
+    # Facet counts over every problem the user can see (no filters applied).
+    source_counts: dict[int, int]
+    year_counts: dict[int, int]
+    tag_counts: dict[int, int]
+
+
+def visibility_class(user) -> str:
+    """Users that see the same problems and sources share a class."""
+    if not user.is_authenticated:
+        return "anonymous"
+    if user.is_staff:
+        return "staff"
+    # Non-staff users also see their own private problems and sources.
+    return f"user-{user.pk}"
+
+
+def search_form_data(user) -> SearchFormData:
+    generation = current_search_form_generation()
+    language = (get_language() or "en").split("-")[0]
+    key = f"search:form:{generation}:{visibility_class(user)}:{language}"
+    data = cache.get(key)
+    if data is None:
+        data = _build_search_form_data(user)
+        cache.set(key, data, SEARCH_FORM_TTL)
+    return data
+
+
+def current_search_form_generation() -> int:
+    return SearchFormGeneration.objects.filter(pk=GENERATION_PK).values_list("generation", flat=True).first() or 0
+
+
+def invalidate_search_form_data() -> None:
+    generation = time.time_ns()
+    if not SearchFormGeneration.objects.filter(pk=GENERATION_PK).update(generation=generation):
+        SearchFormGeneration.objects.create(pk=GENERATION_PK, generation=generation)
+
+
+def _build_search_form_data(user) -> SearchFormData:
+    problems = Problem.objects.for_user(user)
+    sources = list(Source.objects.for_user(user).order_by("order", "slug"))
+    tags = list(Tag.objects.filter(kind=Tag.Kind.TOPIC, hidden=False).order_by("slug"))
+    return SearchFormData(
+        sources=sources,
+        source_options=source_options_with_hierarchy_labels(sources),
+        tags=tags,
+        source_counts=source_counts(problems, sources),
+        year_counts=year_counts(problems),
+        tag_counts=tag_counts(problems, tags),
+    )
@@ -0,0 +1,45 @@
+"""Facet counts for the search filter dropdowns.
+
+Each facet is one grouped query over the filtered problems. Callers pass the
+result set without the facet's own filter (a selected year should still list
+the other years), except for tags, which narrow the results conjunctively.
+"""
+
+from django.db.models import Count, QuerySet
+
+from skoljka.apps.problems.models import Problem
+from skoljka.apps.sources.models import Source
+from skoljka.apps.tags.models import Tag
+
+
+def source_counts(problems: QuerySet[Problem], sources: list[Source]) -> dict[int, int]:
+    """Source id -> matching problems in that source and its descendants."""
+    rows = problems.order_by().exclude(source=None).values("source").annotate(count=Count("pk"))
+    parent_of = {source.pk: source.parent_id for source in sources}
+    counts: dict[int, int] = {}
+    for row in rows:
+        source_id, seen = row["source"], set()
+        while source_id in parent_of and source_id not in seen:
+            seen.add(source_id)
+            counts[source_id] = counts.get(source_id, 0) + row["count"]
+            source_id = parent_of[source_id]
+    return counts
+
+
+def year_counts(problems: QuerySet[Problem]) -> dict[int, int]:
+    rows = problems.order_by().exclude(year=None).values("year").annotate(count=Count("pk"))
+    return {row["year"]: row["count"] for row in rows}
+
+
+def tag_counts(problems: QuerySet[Problem], tags: list[Tag]) -> dict[int, int]:
+    # Through the join table, over the ids of the filtered problems.
+    rows = (
+        Problem.tags.through.objects.filter(
+            problem_id__in=problems.order_by().values("pk"),
+            tag_id__in=[tag.pk for tag in tags],
+        )
+        .values("tag_id")
+        .annotate(count=Count("problem_id"))
+        .order_by()
+    )
+    return {row["tag_id"]: row["count"] for row in rows}
@@ -0,0 +1,77 @@
+"""Summarize the sampled search query log."""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Aggregate, Count, F, FloatField, Max
+from django.utils import timezone
+
+from skoljka.apps.search.models import SearchQueryLog
+
+
+class Percentile(Aggregate):
+    function = "PERCENTILE_CONT"
+    template = "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction: float, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
+class Command(BaseCommand):
+    help = "Report the slowest searches, latency by filter combination and zero-result queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="Report on the last DAYS days.")
+        parser.add_argument("--limit", type=int, default=20, help="Rows per section.")
+        parser.add_argument("--prune-days", type=int, help="First delete entries older than PRUNE_DAYS days.")
+
+    def handle(self, *args, **options) -> None:
+        now = timezone.now()
+        if options["prune_days"] is not None:
+            deleted, _ = SearchQueryLog.objects.filter(created_at__lt=now - timedelta(days=options["prune_days"])).delete()
+            self.stdout.write(f"Deleted {deleted} old search log entries.")
+
+        logs = SearchQueryLog.objects.filter(created_at__gte=now - timedelta(days=options["days"])).annotate(
+            elapsed_ms=F("sql_ms") + F("render_ms")
+        )
+        limit = options["limit"]
+        self.stdout.write(f"{logs.count()} sampled searches in the last {options['days']} days.")
+
+        self.stdout.write("\nSlowest searches (ms):")
+        for log in logs.order_by("-elapsed_ms")[:limit]:
+            self.stdout.write(
+                f"  {log.elapsed_ms:8.1f}  sql={log.sql_ms:7.1f}  render={log.render_ms:7.1f}"
+                f"  results={log.result_count:<6} {log.filters:<24} {log.query}"
+            )
+
+        self.stdout.write("\nLatency by filter combination (ms):")
+        combinations = (
+            logs.order_by()
+            .values("filters")
+            .annotate(
+                count=Count("pk"),
+                p50=Percentile(F("elapsed_ms"), 0.5),
+                p95=Percentile(F("elapsed_ms"), 0.95),
+                sql_p50=Percentile(F("sql_ms"), 0.5),
+                max_ms=Max("elapsed_ms"),
+            )
+            .order_by("-p95")
+        )
+        for row in combinations:
+            self.stdout.write(
+                f"  {row['filters']:<24} n={row['count']:<6} p50={row['p50']:8.1f}  p95={row['p95']:8.1f}"
+                f"  sql p50={row['sql_p50']:7.1f}  max={row['max_ms']:8.1f}"
+            )
+
+        self.stdout.write("\nZero-result queries:")
+        zero = (
+            logs.filter(result_count=0)
+            .exclude(query="")
+            .order_by()
+            .values("query")
+            .annotate(count=Count("pk"))
+            .order_by("-count", "query")[:limit]
+        )
+        for row in zero:
+            self.stdout.write(f"  {row['count']:6}  {row['query']}")
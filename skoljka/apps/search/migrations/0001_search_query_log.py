@@ -0,0 +1,30 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchQueryLog",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ("query", models.CharField(blank=True, max_length=255)),
+                ("filters", models.CharField(max_length=64)),
+                ("result_count", models.PositiveIntegerField()),
+                ("sql_ms", models.FloatField()),
+                ("render_ms", models.FloatField()),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
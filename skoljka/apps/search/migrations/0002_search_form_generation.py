@@ -0,0 +1,20 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_search_query_log"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchFormGeneration",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("generation", models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
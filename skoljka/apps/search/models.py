@@ -0,0 +1,35 @@
+from django.db import models
+from django.utils import timezone
+
+
+class SearchQueryLog(models.Model):
+    """One sampled search request; written in batches by ``query_log``."""
+
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # Lowercased, whitespace-collapsed ``q``; empty for filter-only searches.
+    query = models.CharField(max_length=255, blank=True)
+    # Active filter names joined with "+", e.g. "q+source+tags".
+    filters = models.CharField(max_length=64)
+    result_count = models.PositiveIntegerField()
+    sql_ms = models.FloatField()
+    render_ms = models.FloatField()
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.filters}: {self.query}"
+
+    @property
+    def total_ms(self) -> float:
+        return self.sql_ms + self.render_ms
+
+
+class SearchFormGeneration(models.Model):
+    """Single row whose ``generation`` changes with every Problem, Source or Tag write.
+
+    Cached search form data is keyed by it (see ``cache``), so every process
+    sees an invalidation at once.
+    """
+
+    generation = models.BigIntegerField(default=0)
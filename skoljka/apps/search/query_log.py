@@ -0,0 +1,116 @@
+"""Sampled timing log of search requests.
+
+``timed_search`` wraps the search view: it sums the time spent in SQL with a
+connection execute wrapper and counts everything else (building querysets in
+Python and rendering HTML) as render time. Entries are buffered per process
+and written with one ``bulk_create`` after a response has been sent (see
+``signals``) once the buffer is full or old enough, so a search never waits on
+its own log insert. Entries still buffered when a worker exits are lost, which
+sampling tolerates.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from skoljka.apps.search.models import SearchQueryLog
+
+logger = logging.getLogger(__name__)
+_buffer: list[SearchQueryLog] = []
+_buffer_lock = threading.Lock()
+_buffer_started = time.monotonic()
+
+
+@dataclass
+class SearchLogEntry:
+    """Filled in by the view; left with ``filters=""`` the request is not logged."""
+
+    query: str = ""
+    filters: str = ""
+    result_count: int = 0
+
+
+class _SqlTimer:
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+def normalize_query(q: str) -> str:
+    return re.sub(r"\s+", " ", q).strip().lower()[:255]
+
+
+def filter_combination(**filters) -> str:
+    """``filter_combination(q="x", source="", tags=["a"])`` -> ``"q+tags"``."""
+    return "+".join(name for name, value in filters.items() if value)
+
+
+@contextmanager
+def timed_search() -> Iterator[SearchLogEntry]:
+    entry = SearchLogEntry()
+    if random.random() >= settings.SEARCH_LOG_SAMPLE_RATE:
+        yield entry
+        return
+    timer = _SqlTimer()
+    started = time.perf_counter()
+    with connection.execute_wrapper(timer):
+        yield entry
+    total = time.perf_counter() - started
+    if entry.filters:
+        record(
+            SearchQueryLog(
+                query=entry.query,
+                filters=entry.filters,
+                result_count=entry.result_count,
+                sql_ms=timer.seconds * 1000,
+                render_ms=(total - timer.seconds) * 1000,
+            )
+        )
+
+
+def record(log: SearchQueryLog) -> None:
+    global _buffer_started
+    with _buffer_lock:
+        if not _buffer:
+            _buffer_started = time.monotonic()
+        _buffer.append(log)
+
+
+def flush() -> int:
+    with _buffer_lock:
+        logs = _buffer[:]
+        _buffer.clear()
+    if logs:
+        SearchQueryLog.objects.bulk_create(logs)
+    return len(logs)
+
+
+def discard() -> None:
+    with _buffer_lock:
+        _buffer.clear()
+
+
+def flush_if_due() -> None:
+    due = len(_buffer) >= settings.SEARCH_LOG_BATCH_SIZE or (
+        _buffer and time.monotonic() - _buffer_started >= settings.SEARCH_LOG_FLUSH_SECONDS
+    )
+    if not due:
+        return
+    try:
+        flush()
+    except DatabaseError:
+        logger.exception("Could not write the search query log")
@@ -0,0 +1,23 @@
+from django.core.signals import request_finished
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from skoljka.apps.problems.models import Problem
+from skoljka.apps.search.cache import invalidate_search_form_data
+from skoljka.apps.search.query_log import flush_if_due
+from skoljka.apps.sources.models import Source
+from skoljka.apps.tags.models import Tag
+
+
+@receiver([post_save, post_delete], sender=Problem)
+@receiver([post_save, post_delete], sender=Source)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver(m2m_changed, sender=Problem.tags.through)
+def invalidate_search_form_cache(**kwargs):
+    invalidate_search_form_data()
+
+
+@receiver(request_finished)
+def flush_search_query_log(**kwargs):
+    # After the response has been sent, so searches never wait on the insert.
+    flush_if_due()
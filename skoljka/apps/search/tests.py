@@ -1,10 +1,18 @@
-from types import SimpleNamespace
+from io import StringIO
+from tempfile import TemporaryDirectory
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
+from skoljka.apps.search import query_log
+from skoljka.apps.search.cache import GENERATION_PK, current_search_form_generation, invalidate_search_form_data
+from skoljka.apps.search.models import SearchFormGeneration, SearchQueryLog
 from skoljka.apps.tracking.models import Submission
 from skoljka.tests.factories import (
+    make_export,
     make_problem,
     make_source,
     make_tag,
@@ -39,6 +47,10 @@ class SearchViewTest(TestCase):
             content="Study connected graphs via Euler's bridges.",
         )
 
+    def setUp(self):
+        # Test rollbacks don't send signals; start from a cold form cache.
+        invalidate_search_form_data()
+
     def test_full_text_finds_body_match(self):
         r = self.client.get("/search/?q=delightful")
         self.assertContains(r, self.p_fermat.title)
@@ -54,6 +66,15 @@ class SearchViewTest(TestCase):
         self.assertContains(r, self.p_euler.title)
         self.assertNotContains(r, self.p_fermat.title)
 
+    def test_results_are_ordered_by_relevance(self):
+        weak = make_problem(title="Weak match", year=2000, content="A prime appears once among many other words here.")
+        strong = make_problem(title="Strong match", year=2030, content="Prime, prime, prime: every prime is prime.")
+
+        r = self.client.get("/search/?q=prime")
+        html = r.content.decode()
+
+        self.assertLess(html.index(strong.title), html.index(weak.title))
+
     def test_title_substring_fallback(self):
         """Title substring match works even when FTS misses."""
         r = self.client.get("/search/?q=Ramanujan")
@@ -99,12 +120,78 @@ class SearchViewTest(TestCase):
 
     def test_source_dropdown_shows_hierarchy(self):
         parent = make_source(slug="dropdown-parent", name="Dropdown Parent")
-        make_source(slug="dropdown-child", name="Dropdown Child", parent=parent)
+        child = make_source(slug="dropdown-child", name="Dropdown Child", parent=parent)
+        make_problem(title="Dropdown child problem", source=child)
+
+        r = self.client.get("/search/")
+
+        self.assertContains(r, ">Dropdown Parent (1)</option>")
+        self.assertContains(r, ">-- Dropdown Child (1)</option>")
+
+    def test_facets_count_results_and_hide_empty_values(self):
+        make_source(slug="empty-source", name="Empty Source")
+
+        r = self.client.get("/search/?q=Ramanujan")
+
+        self.assertContains(r, ">IMO (1)</option>")
+        self.assertContains(r, ">2021 (1)</option>")
+        self.assertNotContains(r, 'value="2020"')
+        self.assertNotContains(r, "Empty Source")
+        self.assertContains(r, "&quot;algebra&quot;: 0")
+
+    def test_year_facet_ignores_selected_year(self):
+        r = self.client.get(f"/search/?source={self.src.slug}&year=2020")
+
+        self.assertContains(r, ">2020 (1)</option>")
+        self.assertContains(r, ">2021 (1)</option>")
+        self.assertNotContains(r, 'value="2022"')
+        self.assertContains(r, ">IMO (1)</option>")
+
+    def test_tag_facet_counts_results(self):
+        r = self.client.get(f"/search/?source={self.src.slug}")
+
+        self.assertContains(r, "&quot;algebra&quot;: 1")
+
+    def test_warm_form_cache_skips_dropdown_queries(self):
+        self.client.get("/search/")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/search/")
+
+        tables = ("problems_problem", "sources_source", "tags_tag")
+        self.assertFalse([q["sql"] for q in queries if any(table in q["sql"] for table in tables)])
+
+    def test_form_cache_is_invalidated_on_save(self):
+        self.client.get("/search/")
+        source = make_source(slug="fresh-source", name="Fresh Source")
+        make_problem(title="Fresh problem", source=source, year=1999)
 
         r = self.client.get("/search/")
 
-        self.assertContains(r, ">Dropdown Parent</option>")
-        self.assertContains(r, ">-- Dropdown Child</option>")
+        self.assertContains(r, ">Fresh Source (1)</option>")
+        self.assertContains(r, ">1999 (1)</option>")
+
+    def test_form_generation_is_shared_through_the_database(self):
+        before = current_search_form_generation()
+
+        make_tag(slug="generation-tag", name="Generation")
+
+        # Read back from the row, as another worker process would.
+        after = SearchFormGeneration.objects.get(pk=GENERATION_PK).generation
+        self.assertNotEqual(after, before)
+        self.assertEqual(current_search_form_generation(), after)
+
+    def test_form_cache_is_partitioned_by_visibility(self):
+        owner = make_user("form-cache-owner")
+        make_problem(title="Private form problem", year=1888, is_public=False, created_by=owner)
+        self.client.get("/search/")
+
+        self.client.force_login(owner)
+        r = self.client.get("/search/")
+
+        self.assertContains(r, ">1888 (1)</option>")
+        self.client.logout()
+        self.assertNotContains(self.client.get("/search/"), 'value="1888"')
 
     def test_year_dropdown_deduplicates_years(self):
         make_problem(title="Another 2020", year=2020, content="year duplicate marker")
@@ -143,6 +230,20 @@ class SearchViewTest(TestCase):
         self.assertNotContains(r, self.p_fermat.title)
         self.assertContains(r, self.p_ramanujan.title)
 
+    def test_status_filter_sends_solved_ids_as_one_array(self):
+        user = make_user(username="many-solved-search")
+        solved = [make_problem(title=f"Paradox {i}", content="a") for i in range(20)]
+        Submission.objects.bulk_create(Submission(user=user, problem=p, solved=True) for p in solved)
+        self.client.force_login(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.get("/search/?q=a&status=solved")
+
+        self.assertContains(r, "Paradox 19")
+        sql = [q["sql"] for q in queries]
+        self.assertTrue(any('"problems_problem"."id" = ANY(' in query for query in sql))
+        self.assertFalse([query for query in sql if '"problems_problem"."id" IN (' in query])
+
     def test_anon_sees_only_public(self):
         alice = make_user(username="sa")
         private = make_problem(
@@ -184,7 +285,7 @@ class SearchViewTest(TestCase):
 
     @patch("skoljka.apps.problems.export_views.export_problems_pdf")
     def test_pdf_export_uses_filtered_results(self, export_pdf):
-        export_pdf.return_value = SimpleNamespace(filename="search-results.pdf", data=b"%PDF")
+        export_pdf.return_value = make_export("search-results.pdf", b"%PDF", self.enterContext(TemporaryDirectory()))
         self.client.force_login(make_user(username="search-pdf-user-2"))
 
         r = self.client.post("/search/pdf/?q=Fermat", {"title": "Search results", "heading_mode": "number", "action": "download"})
@@ -196,7 +297,7 @@ class SearchViewTest(TestCase):
 
     @patch("skoljka.apps.problems.export_views.export_problems_latex_zip")
     def test_latex_export_uses_filtered_results(self, export_latex):
-        export_latex.return_value = SimpleNamespace(filename="search-results.zip", data=b"zip")
+        export_latex.return_value = make_export("search-results.zip", b"zip", self.enterContext(TemporaryDirectory()))
         self.client.force_login(make_user(username="search-latex-user"))
 
         r = self.client.post("/search/pdf/?q=Fermat", {"title": "Search results", "heading_mode": "number", "action": "latex"})
@@ -223,7 +324,7 @@ class SearchViewTest(TestCase):
         r = self.client.get("/search/?q=limitcheck")
         self.assertContains(r, "105 results")
         self.assertNotContains(r, "Showing 1-10 of 105")
-        self.assertContains(r, "page=2")
+        self.assertContains(r, 'rel="next"')
 
 
 class SearchNoQueryTest(TestCase):
@@ -233,3 +334,33 @@ class SearchNoQueryTest(TestCase):
         self.assertEqual(r.status_code, 200)
         # Without filters, results table isn't rendered.
         self.assertNotContains(r, "results")
+
+
+@override_settings(SEARCH_LOG_SAMPLE_RATE=1.0, SEARCH_LOG_BATCH_SIZE=2)
+class SearchQueryLogTest(TestCase):
+    def setUp(self):
+        query_log.discard()
+
+    def test_searches_are_logged_in_batches(self):
+        make_problem(title="Fermat riddle", year=2020, content="delightful")
+
+        self.client.get("/search/?q=%20Fermat%20%20Riddle&year=2020")
+        self.assertFalse(SearchQueryLog.objects.exists())
+        self.client.get("/search/?q=nomatchatall")
+        self.client.get("/search/")
+
+        logs = list(SearchQueryLog.objects.order_by("pk"))
+        self.assertEqual(
+            [(log.query, log.filters, log.result_count) for log in logs],
+            [("fermat riddle", "q+year", 1), ("nomatchatall", "q", 0)],
+        )
+        self.assertTrue(all(log.sql_ms > 0 and log.render_ms > 0 for log in logs))
+
+    def test_report(self):
+        SearchQueryLog.objects.create(query="abc", filters="q", result_count=0, sql_ms=5, render_ms=3)
+        out = StringIO()
+
+        call_command("search_report", stdout=out)
+
+        self.assertIn("1 sampled searches", out.getvalue())
+        self.assertIn("abc", out.getvalue())
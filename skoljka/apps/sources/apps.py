@@ -5,3 +5,6 @@ class SourcesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "skoljka.apps.sources"
     label = "sources"
+
+    def ready(self):
+        from skoljka.apps.sources import signals  # noqa: F401
@@ -6,6 +6,7 @@ from pathlib import PurePosixPath
 from django.utils.text import get_valid_filename
 
 from skoljka.apps.problems.models import Problem
+from skoljka.utils.file_staging import file_sha256
 
 
 def problem_key(problem: Problem) -> str:
@@ -43,15 +44,10 @@ def safe_zip_path(path: str) -> bool:
     return bool(path) and not p.is_absolute() and ".." not in p.parts and p.parts[0] == "files"
 
 
-def file_bytes(file_field) -> bytes:
-    with file_field.open("rb") as f:
-        return f.read()
-
-
 def file_hash(file_field) -> str:
     if not file_field:
         return ""
-    return sha256(file_bytes(file_field))
+    return file_sha256(file_field)
 
 
 def sha256(data: bytes) -> str:
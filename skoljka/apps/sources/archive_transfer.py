@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import json
 import zipfile
+from collections.abc import Generator, Iterator
+from dataclasses import dataclass
 from pathlib import PurePosixPath
 from typing import Any
 
@@ -13,7 +15,6 @@ from skoljka.apps.problems.models import Problem
 from skoljka.apps.sources.archive_paths import (
     attachment_archive_path,
     document_key,
-    file_bytes,
     file_hash,
     problem_key,
     safe_zip_path,
@@ -29,12 +30,42 @@ from skoljka.apps.sources.archive_types import (
 )
 from skoljka.apps.sources.models import Source, SourceDocument
 from skoljka.apps.tags.models import Tag
+from skoljka.utils.file_staging import ZipStager
+from skoljka.utils.zip_stream import stream_zip
 
 Payload = dict[str, Any]
 FileField = Any
 
 
 def export_archive(options: ExportOptions) -> dict[str, int]:
+    """Write an archive to ``options.output``, a path or a writable binary stream such as stdout."""
+    selection = _export_selection(options)
+    with zipfile.ZipFile(options.output, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for _step in _write_archive(zf, selection, options):
+            pass
+    return {
+        "sources": len(selection.sources),
+        "tags": len(selection.tags),
+        "problems": len(selection.problems),
+        "source_documents": len(selection.source_documents),
+    }
+
+
+def stream_archive(options: ExportOptions) -> Iterator[bytes]:
+    """Yield the archive bytes while they are written, e.g. into a StreamingHttpResponse."""
+    selection = _export_selection(options)
+    return stream_zip(lambda zf: _write_archive(zf, selection, options))
+
+
+@dataclass
+class _ArchiveSelection:
+    sources: list[Source]
+    tags: list[Tag]
+    problems: list[Problem]
+    source_documents: list[SourceDocument]
+
+
+def _export_selection(options: ExportOptions) -> _ArchiveSelection:
     sources = _export_sources(options)
     problems = list(
         Problem.objects.filter(source__in=sources)
@@ -55,20 +86,25 @@ def export_archive(options: ExportOptions) -> dict[str, int]:
     source_docs = []
     if options.include_documents:
         source_docs = list(SourceDocument.objects.filter(source__in=sources))
-
-    with zipfile.ZipFile(options.output, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        _write_json(zf, "manifest.json", {"schema": SCHEMA})
-        _write_json(zf, "sources.json", [_source_payload(s) for s in sources])
-        _write_json(zf, "tags.json", [_tag_payload(t) for t in tags])
-        _write_json(zf, "problems.json", [_problem_payload(zf, p, options) for p in problems])
-        _write_json(zf, "source_documents.json", [_source_document_payload(zf, d) for d in source_docs])
-
-    return {
-        "sources": len(sources),
-        "tags": len(tags),
-        "problems": len(problems),
-        "source_documents": len(source_docs),
-    }
+    return _ArchiveSelection(sources=sources, tags=tags, problems=problems, source_documents=source_docs)
+
+
+def _write_archive(zf: zipfile.ZipFile, selection: _ArchiveSelection, options: ExportOptions) -> Iterator[None]:
+    """Write the archive members, yielding after each file chunk so streams can flush."""
+    _write_json(zf, "manifest.json", {"schema": SCHEMA})
+    _write_json(zf, "sources.json", [_source_payload(s) for s in selection.sources])
+    _write_json(zf, "tags.json", [_tag_payload(t) for t in selection.tags])
+    files = ZipStager(zf)
+    problems = []
+    for problem in selection.problems:
+        problems.append((yield from _problem_payload(files, problem, options)))
+        yield
+    _write_json(zf, "problems.json", problems)
+    documents = []
+    for document in selection.source_documents:
+        documents.append((yield from _source_document_payload(files, document)))
+        yield
+    _write_json(zf, "source_documents.json", documents)
 
 
 def plan_import(zip_path: str, options: ImportOptions) -> ImportPlan:
@@ -240,7 +276,7 @@ def _tag_payload(tag: Tag) -> Payload:
     }
 
 
-def _problem_payload(zf: zipfile.ZipFile, problem: Problem, options: ExportOptions) -> Payload:
+def _problem_payload(files: ZipStager, problem: Problem, options: ExportOptions) -> Generator[None, None, Payload]:
     content = problem.content.first()
     key = problem_key(problem)
     payload = {
@@ -257,15 +293,15 @@ def _problem_payload(zf: zipfile.ZipFile, problem: Problem, options: ExportOptio
         attachments = []
         if options.include_attachments:
             for attachment in content.attachments.all():
-                path = attachment_archive_path(problem, attachment.name)
-                data = file_bytes(attachment.file)
-                zf.writestr(path, data)
+                path, size, digest = yield from files.add(
+                    attachment.file, attachment_archive_path(problem, attachment.name)
+                )
                 attachments.append({
                     "name": attachment.name,
                     "path": path,
                     "content_type": attachment.mime_type,
-                    "size": len(data),
-                    "sha256": sha256(data),
+                    "size": size,
+                    "sha256": digest,
                 })
         payload["content"] = {
             "original_language": content.original_language,
@@ -275,11 +311,12 @@ def _problem_payload(zf: zipfile.ZipFile, problem: Problem, options: ExportOptio
     return payload
 
 
-def _source_document_payload(zf: zipfile.ZipFile, document: SourceDocument) -> Payload:
+def _source_document_payload(files: ZipStager, document: SourceDocument) -> Generator[None, None, Payload]:
     filename = document.original_filename or PurePosixPath(document.file.name).name
-    path = source_document_archive_path(document.source.slug, document.year, document.kind, filename)
-    data = file_bytes(document.file)
-    zf.writestr(path, data)
+    path, size, digest = yield from files.add(
+        document.file,
+        source_document_archive_path(document.source.slug, document.year, document.kind, filename),
+    )
     return {
         "key": document_key(document.source.slug, document.year, document.kind, filename),
         "source": document.source.slug,
@@ -290,8 +327,8 @@ def _source_document_payload(zf: zipfile.ZipFile, document: SourceDocument) -> P
         "source_url": document.source_url,
         "original_filename": filename,
         "path": path,
-        "size": len(data),
-        "sha256": sha256(data),
+        "size": size,
+        "sha256": digest,
     }
 
 
@@ -540,6 +577,7 @@ def _apply_sources(archive: _Archive, options: ImportOptions, tags_by_slug: dict
 
 def _apply_problems(archive: _Archive, options: ImportOptions, sources_by_key: dict[str, Source], tags_by_slug: dict[str, Tag], written_files: list[FileField]) -> dict[str, Problem]:
     result: dict[str, Problem] = {}
+    contents: list[Content] = []
     for payload in archive.problems:
         problem = _find_problem(payload, sources_by_key)
         key = _payload_str(payload, "key")
@@ -555,26 +593,30 @@ def _apply_problems(archive: _Archive, options: ImportOptions, sources_by_key: d
         problem.is_public = options.force_public if options.force_public is not None else bool(payload.get("is_public", True))
         problem.save()
         problem.tags.set([tags_by_slug[s] for s in payload.get("tags") or [] if s in tags_by_slug])
-        _apply_problem_content(archive, problem, payload, options, written_files)
+        content = _apply_problem_content(archive, problem, payload, options, written_files)
+        if content:
+            contents.append(content)
         result[key] = problem
+    # Render all statements in a few batched renderer calls, after attachments
+    # are written so attachment: references resolve to media URLs.
+    Content.objects.bulk_compile(contents)
     return result
 
 
-def _apply_problem_content(archive: _Archive, problem: Problem, payload: Payload, options: ImportOptions, written_files: list[FileField]) -> None:
+def _apply_problem_content(archive: _Archive, problem: Problem, payload: Payload, options: ImportOptions, written_files: list[FileField]) -> Content | None:
     content_payload = payload.get("content")
     existing = problem.content.first()
     if not content_payload:
         if existing:
             existing.delete()
-        return
+        return None
     content = existing or Content(content_object=problem)
     content.source_md = content_payload.get("source_md") or {}
     content.original_language = content_payload.get("original_language") or next(iter(content.source_md), "en")
-    content.save()
+    content.save(render=False)
 
     incoming = {_payload_str(a, "name"): a for a in content_payload.get("attachments") or []}
     existing_attachments = {a.name: a for a in ContentAttachment.objects.filter(content=content)}
-    attachments_changed = False
     for name, payload_attachment in incoming.items():
         current = existing_attachments.get(name)
         data = archive.file_bytes(_payload_str(payload_attachment, "path"))
@@ -588,7 +630,6 @@ def _apply_problem_content(archive: _Archive, problem: Problem, payload: Payload
             current.mime_type = payload_attachment.get("content_type") or ""
             current.size = len(data)
             current.save()
-            attachments_changed = True
         else:
             attachment = ContentAttachment(
                 content=content,
@@ -599,15 +640,12 @@ def _apply_problem_content(archive: _Archive, problem: Problem, payload: Payload
             attachment.file.save(name, ContentFile(data), save=False)
             written_files.append(attachment.file)
             attachment.save()
-            attachments_changed = True
     if options.missing_attachments == "delete":
         for name, attachment in existing_attachments.items():
             if name not in incoming:
                 attachment.file.delete(save=False)
                 attachment.delete()
-                attachments_changed = True
-    if attachments_changed:
-        content.save()
+    return content
 
 
 def _apply_source_documents(archive: _Archive, options: ImportOptions, sources_by_key: dict[str, Source], written_files: list[FileField]) -> None:
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import asdict, dataclass, field
-from typing import Any, Literal, TypedDict
+from typing import Any, BinaryIO, Literal, TypedDict
 
 from skoljka.apps.accounts.models import User
 
@@ -29,7 +29,8 @@ class ImportSummary(TypedDict):
 @dataclass
 class ExportOptions:
     source_slugs: list[str]
-    output: str
+    # Path or writable binary stream; unused by stream_archive().
+    output: str | BinaryIO = ""
     include_children: bool = True
     include_documents: bool = True
     include_attachments: bool = True
@@ -0,0 +1,48 @@
+"""Maintenance of the ``SourceClosure`` table."""
+
+from collections.abc import Sequence
+
+from skoljka.apps.sources.models import SourceClosure
+from skoljka.apps.sources.tree import SourceNode, source_tree
+
+# Sorts below every slug character (letters, digits, "-" and "_") under the
+# "C" collation, so a parent's path sorts before its children's paths and a
+# slug that is a prefix of a sibling's slug keeps its subtree together.
+SORT_PATH_SEPARATOR = ","
+
+
+def sort_path(chain: Sequence[SourceNode]) -> str:
+    """Path of the last node in ``chain`` (root first), comparable as text."""
+    return "".join(f"{node.order + 2**31:010d}{node.slug}{SORT_PATH_SEPARATOR}" for node in chain)
+
+
+def sync_source_closure(source_id: int) -> int:
+    """Rewrite the closure rows of the source's subtree that differ from the tree.
+
+    Saving a source can change its ancestors (a move) or the paths of its
+    whole subtree (a new order or slug); other rows never change.
+    """
+    tree = source_tree()
+    subtree = tree.descendant_ids(source_id)
+    wanted: dict[tuple[int, int], tuple[int, str]] = {}
+    for descendant_id in subtree:
+        chain = tree.ancestors(descendant_id)
+        path = sort_path(chain)
+        for depth, ancestor in enumerate(reversed(chain)):
+            wanted[(ancestor.id, descendant_id)] = (depth, path)
+
+    existing = {
+        (ancestor_id, descendant_id): (pk, depth, path)
+        for pk, ancestor_id, descendant_id, depth, path in SourceClosure.objects.filter(
+            descendant__in=subtree
+        ).values_list("pk", "ancestor_id", "descendant_id", "depth", "sort_path")
+    }
+    stale = {pk for key, (pk, depth, path) in existing.items() if wanted.get(key) != (depth, path)}
+    missing = [(*key, *value) for key, value in wanted.items() if key not in existing or existing[key][0] in stale]
+    if stale:
+        SourceClosure.objects.filter(pk__in=stale).delete()
+    SourceClosure.objects.bulk_create(
+        SourceClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=depth, sort_path=path)
+        for ancestor_id, descendant_id, depth, path in missing
+    )
+    return len(stale) + len(missing)
@@ -1,3 +1,5 @@
+import sys
+
 from django.core.management.base import BaseCommand, CommandError
 
 from skoljka.apps.sources.archive_transfer import ExportOptions, export_archive
@@ -9,7 +11,7 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("--source", action="append", dest="sources", required=True, help="Source slug to export. Can be repeated.")
-        parser.add_argument("--output", required=True, help="Output zip path.")
+        parser.add_argument("--output", required=True, help="Output zip path, or - to stream the zip to stdout.")
         parser.add_argument("--include-children", action="store_true", default=True)
         parser.add_argument("--no-include-children", action="store_false", dest="include_children")
         parser.add_argument("--include-documents", action="store_true", default=True)
@@ -24,15 +26,18 @@ class Command(BaseCommand):
         if missing:
             raise CommandError("Unknown source slug(s): " + ", ".join(missing))
 
+        to_stdout = options["output"] == "-"
         summary = export_archive(ExportOptions(
             source_slugs=source_slugs,
-            output=options["output"],
+            output=sys.stdout.buffer if to_stdout else options["output"],
             include_children=options["include_children"],
             include_documents=options["include_documents"],
             include_attachments=options["include_attachments"],
             public_only=options["public_only"],
         ))
-        self.stdout.write(self.style.SUCCESS(f"Archive exported to {options['output']}"))
+        # Keep stdout clean when it carries the zip.
+        out = self.stderr if to_stdout else self.stdout
+        out.write(f"Archive exported to {'stdout' if to_stdout else options['output']}", style_func=self.style.SUCCESS)
         for key, value in summary.items():
-            self.stdout.write(f"{key}: {value}")
+            out.write(f"{key}: {value}", style_func=str)
 
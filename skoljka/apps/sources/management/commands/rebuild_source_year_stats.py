@@ -0,0 +1,15 @@
+"""Recount SourceYearStats from scratch."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from skoljka.apps.sources.year_stats import rebuild_source_year_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-source, per-year problem totals used by the competition tables."
+
+    def handle(self, *args, **options) -> None:
+        with transaction.atomic():
+            rows = rebuild_source_year_stats()
+        self.stdout.write(f"Rebuilt {rows} SourceYearStats rows.")
@@ -0,0 +1,31 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:02
+
+import django.contrib.postgres.indexes
+import django.db.models.fields.json
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sources", "0006_sourcedocument_source_url"),
+        ("tags", "0004_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="source",
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(models.F("slug")), name="gin_trgm_ops"), name="source_slug_trgm"),
+        ),
+        migrations.AddIndex(
+            model_name="source",
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.fields.json.KeyTextTransform("name", django.db.models.fields.json.KeyTransform("en", "translations"))), name="gin_trgm_ops"), name="source_name_en_trgm"),
+        ),
+        migrations.AddIndex(
+            model_name="source",
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.fields.json.KeyTextTransform("name", django.db.models.fields.json.KeyTransform("hr", "translations"))), name="gin_trgm_ops"), name="source_name_hr_trgm"),
+        ),
+    ]
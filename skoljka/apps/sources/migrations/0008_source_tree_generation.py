@@ -0,0 +1,20 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sources", "0007_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SourceTreeGeneration",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("generation", models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_source_closure(apps, schema_editor):
+    Source = apps.get_model("sources", "Source")
+    SourceClosure = apps.get_model("sources", "SourceClosure")
+    sources = {source.pk: source for source in Source.objects.only("id", "parent_id", "order", "slug")}
+    rows = []
+    for source in sources.values():
+        chain, seen = [], set()
+        current = source
+        while current is not None and current.pk not in seen:
+            seen.add(current.pk)
+            chain.append(current)
+            current = sources.get(current.parent_id)
+        path = "".join(f"{node.order + 2**31:010d}{node.slug}," for node in reversed(chain))
+        rows.extend(
+            SourceClosure(ancestor_id=ancestor.pk, descendant_id=source.pk, depth=depth, sort_path=path)
+            for depth, ancestor in enumerate(chain)
+        )
+    SourceClosure.objects.bulk_create(rows, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sources", "0008_source_tree_generation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SourceClosure",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("depth", models.PositiveSmallIntegerField()),
+                ("sort_path", models.TextField(db_collation="C")),
+                ("ancestor", models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name="descendant_links", to="sources.source")),
+                ("descendant", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="ancestor_links", to="sources.source")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["ancestor", "sort_path", "descendant"], name="source_closure_subtree_idx")],
+                "constraints": [models.UniqueConstraint(fields=("ancestor", "descendant"), name="source_closure_unique")],
+            },
+        ),
+        migrations.RunPython(build_source_closure, migrations.RunPython.noop),
+    ]
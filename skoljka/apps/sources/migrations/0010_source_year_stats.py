@@ -0,0 +1,57 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:27
+
+import re
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import migrations, models
+
+
+def label_sort_key(label):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", label)]
+
+
+def build_source_year_stats(apps, schema_editor):
+    Problem = apps.get_model("problems", "Problem")
+    SourceYearStats = apps.get_model("sources", "SourceYearStats")
+    rows = (
+        Problem.objects.exclude(source=None)
+        .order_by()
+        .values("source_id", "year")
+        .annotate(
+            problem_count=models.Count("pk"),
+            public_problem_count=models.Count("pk", filter=models.Q(is_public=True)),
+            labels=ArrayAgg("problem_label", distinct=True, filter=~models.Q(problem_label=""), default=[]),
+        )
+    )
+    SourceYearStats.objects.bulk_create(
+        (SourceYearStats(**{**row, "labels": sorted(row["labels"], key=label_sort_key)}) for row in rows),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0012_problem_effectively_public"),
+        ("sources", "0009_source_closure"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SourceYearStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("year", models.IntegerField(blank=True, null=True)),
+                ("problem_count", models.PositiveIntegerField(default=0)),
+                ("public_problem_count", models.PositiveIntegerField(default=0)),
+                ("labels", django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=32), blank=True, default=list)),
+                ("source", models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name="year_stats", to="sources.source")),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("source", "year"), name="source_year_stats_unique", nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(build_source_year_stats, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,16 @@
 import uuid
 
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.db.models import F
 from django.urls import reverse
 from django.utils.text import get_valid_filename
 from django.utils.translation import get_language
 
 from skoljka.apps.tags.models import Tag
 from skoljka.utils.permissions import PermissionModel
+from skoljka.utils.trigram import json_text, trigram_index
 
 
 class Source(PermissionModel):
@@ -23,14 +26,17 @@ class Source(PermissionModel):
 
     class Meta:
         ordering = ["order", "slug"]
+        indexes = [
+            trigram_index(F("slug"), name="source_slug_trgm"),
+            trigram_index(json_text("translations", "en", "name"), name="source_name_en_trgm"),
+            trigram_index(json_text("translations", "hr", "name"), name="source_name_hr_trgm"),
+        ]
 
     def _language(self, language: str | None = None) -> str:
         return (language or get_language() or "en").split("-")[0]
 
     def name(self, language: str | None = None) -> str:
-        language = self._language(language)
-        tr = self.translations.get(language, self.translations.get("en", {}))
-        return tr.get("name", self.slug)
+        return translated_source_name(self.translations, self.slug, self._language(language))
 
     def __str__(self) -> str:
         return self.name()
@@ -39,6 +45,64 @@ class Source(PermissionModel):
         return reverse("source_detail", kwargs={"slug": self.slug})
 
 
+class SourceClosure(models.Model):
+    """One row per (ancestor, descendant) pair, including each source with itself.
+
+    ``sort_path`` is the descendant's position in the whole tree (see
+    ``closure.sort_path``), so ordering the rows of one ancestor by it lists
+    the subtree parents first, siblings by ``(order, slug)``. Kept in sync by
+    ``signals``.
+    """
+
+    ancestor = models.ForeignKey(Source, on_delete=models.CASCADE, related_name="descendant_links", db_index=False)
+    descendant = models.ForeignKey(Source, on_delete=models.CASCADE, related_name="ancestor_links")
+    depth = models.PositiveSmallIntegerField()
+    sort_path = models.TextField(db_collation="C")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["ancestor", "descendant"], name="source_closure_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["ancestor", "sort_path", "descendant"], name="source_closure_subtree_idx"),
+        ]
+
+
+class SourceYearStats(models.Model):
+    """Problem totals per source and year for the competition tables.
+
+    ``problem_count`` counts every problem, ``public_problem_count`` those
+    with ``is_public``; ``labels`` are the distinct problem labels in natural
+    order. Rows are recounted by Problem signals (see ``year_stats``) and can
+    be rebuilt with ``manage.py rebuild_source_year_stats``.
+    """
+
+    source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name="year_stats", db_index=False)
+    year = models.IntegerField(null=True, blank=True)
+    problem_count = models.PositiveIntegerField(default=0)
+    public_problem_count = models.PositiveIntegerField(default=0)
+    labels = ArrayField(models.CharField(max_length=32), default=list, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["source", "year"], name="source_year_stats_unique", nulls_distinct=False),
+        ]
+
+
+class SourceTreeGeneration(models.Model):
+    """Single row whose ``generation`` changes with every source write.
+
+    Processes compare it with their cached source tree (see ``tree``).
+    """
+
+    generation = models.BigIntegerField(default=0)
+
+
+def translated_source_name(translations: dict, slug: str, language: str) -> str:
+    tr = translations.get(language, translations.get("en", {}))
+    return tr.get("name", slug)
+
+
 def source_document_upload_to(instance: "SourceDocument", filename: str) -> str:
     filename = get_valid_filename(filename.rsplit("/", 1)[-1].rsplit("\\", 1)[-1])
     return f"documents/{uuid.uuid4()}/{filename or 'document'}"
@@ -1,11 +1,18 @@
+from dataclasses import dataclass
 from typing import Any, Protocol, cast
 
 from django.db import models
+from django.urls import reverse
 
-from skoljka.apps.problems.models import Problem
+from skoljka.apps.problems.models import Problem, generated_problem_title
 from skoljka.apps.sources.models import Source, SourceDocument
+from skoljka.apps.sources.tree import source_tree
 from skoljka.utils.permissions import PermissionType
 
+# Tree order of the problem's source within the filtered subtree; the join
+# is the one ``_subtree_problem_queryset`` filters on.
+SUBTREE_ORDER = "source__ancestor_links__sort_path"
+
 
 class UserLike(Protocol):
     is_authenticated: bool
@@ -13,13 +20,11 @@ class UserLike(Protocol):
 
 
 def source_year_problem_queryset(user: UserLike, source: Source, year: int) -> models.QuerySet[Problem]:
-    source_ids = source_and_descendant_order(source, user)
-    source_ordering = source_ordering_case(source_ids)
     return (
-        _problem_queryset_for_user(user)
-        .filter(source_id__in=source_ids, year=year)
+        _subtree_problem_queryset(user, source)
+        .filter(year=year)
         .order_by(
-            source_ordering,
+            SUBTREE_ORDER,
             models.F("problem_label").asc(nulls_last=True),
             "id",
         )
@@ -29,13 +34,10 @@ def source_year_problem_queryset(user: UserLike, source: Source, year: int) -> m
 
 
 def source_problem_queryset(user: UserLike, source: Source) -> models.QuerySet[Problem]:
-    source_ids = source_and_descendant_order(source, user)
-    source_ordering = source_ordering_case(source_ids)
     return (
-        _problem_queryset_for_user(user)
-        .filter(source_id__in=source_ids)
+        _subtree_problem_queryset(user, source)
         .order_by(
-            source_ordering,
+            SUBTREE_ORDER,
             models.F("year").desc(nulls_last=True),
             models.F("problem_label").asc(nulls_last=True),
             "id",
@@ -45,45 +47,44 @@ def source_problem_queryset(user: UserLike, source: Source) -> models.QuerySet[P
     )
 
 
-def source_document_queryset(_user: UserLike, source: Source, year: int | None = None) -> models.QuerySet[SourceDocument]:
-    # Source documents intentionally inherit visibility from the source page.
-    # If documents need their own privacy later, this is the policy boundary.
-    queryset = SourceDocument.objects.filter(source=source)
-    if year is not None:
-        queryset = queryset.filter(year=year)
-    return queryset
+@dataclass(frozen=True)
+class ProblemEntry:
+    """The few columns of a problem that overview grids and lists need."""
 
+    id: int
+    year: int | None
+    problem_label: str
+    title: str
+    source_id: int | None
 
-def source_and_descendant_order(source: Source, user: UserLike) -> list[int]:
-    sources = list(_source_queryset_for_user(user).only("id", "parent_id", "order", "slug"))
-    by_parent: dict[int | None, list[Source]] = {}
-    for item in sources:
-        by_parent.setdefault(item.parent_id, []).append(item)
-    for children in by_parent.values():
-        children.sort(key=lambda item: (item.order, item.slug))
+    @property
+    def pk(self) -> int:
+        return self.id
 
-    result: list[int] = []
-    seen: set[int] = set()
+    @property
+    def display_title(self) -> str:
+        return self.title or generated_problem_title(source_tree().get(self.source_id), self.year, self.problem_label)
 
-    def visit(source_id: int) -> None:
-        seen.add(source_id)
-        result.append(source_id)
-        for child in by_parent.get(source_id, []):
-            if child.id not in seen:
-                visit(child.id)
+    def get_absolute_url(self) -> str:
+        return reverse("problem_detail", kwargs={"pk": self.id})
 
-    visit(source.id)
-    return result
 
+def problem_entries(problems: models.QuerySet[Problem]) -> list[ProblemEntry]:
+    """``problems`` in order, as one ``values_list`` query without prefetches."""
+    rows = problems.prefetch_related(None).values_list("id", "year", "problem_label", "title", "source_id")
+    return [ProblemEntry(*row) for row in rows]
 
-def source_ordering_case(source_ids: list[int]) -> models.Case:
-    return models.Case(
-        *[models.When(source_id=source_id, then=pos) for pos, source_id in enumerate(source_ids)],
-        output_field=models.IntegerField(),
-    )
+
+def source_document_queryset(_user: UserLike, source: Source, year: int | None = None) -> models.QuerySet[SourceDocument]:
+    # Source documents intentionally inherit visibility from the source page.
+    # If documents need their own privacy later, this is the policy boundary.
+    queryset = SourceDocument.objects.filter(source=source)
+    if year is not None:
+        queryset = queryset.filter(year=year)
+    return queryset
 
 
-def compact_source_year_title_context(problems: list[Problem], source: Source, year: int | None) -> tuple[int, int] | None:
+def compact_source_year_title_context(problems: list[Problem] | list[ProblemEntry], source: Source, year: int | None) -> tuple[int, int] | None:
     if year is None:
         return None
     source_ids = {problem.source_id for problem in problems}
@@ -108,6 +109,14 @@ def _problem_queryset_for_user(user: UserLike, permission: PermissionType = "vie
     return cast(models.QuerySet[Problem], manager.for_user(user, permission))
 
 
-def _source_queryset_for_user(user: UserLike) -> models.QuerySet[Source]:
-    manager = cast(Any, Source.objects)
-    return cast(models.QuerySet[Source], manager.for_user(user))
+def _subtree_problem_queryset(user: UserLike, source: Source) -> models.QuerySet[Problem]:
+    """Problems in ``source`` and its descendants, through ``SourceClosure``."""
+    problems = _problem_queryset_for_user(user).filter(source__ancestor_links__ancestor=source)
+    # Effectively public problems already exclude private sub-sources; other
+    # signed-in users may still be unable to see some of them.
+    if user.is_authenticated and not user.is_staff:
+        tree = source_tree()
+        hidden = set(tree.descendant_ids(source.pk)) - set(tree.descendant_ids(source.pk, user))
+        if hidden:
+            problems = problems.exclude(source_id__in=hidden)
+    return problems
@@ -0,0 +1,30 @@
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from skoljka.apps.sources.closure import sync_source_closure
+from skoljka.apps.sources.models import Source
+from skoljka.apps.sources.tree import begin_request, bump_source_tree_generation, end_request
+
+
+# Registered before the problems app's Source receivers, which read the tree.
+@receiver(post_save, sender=Source)
+def sync_source_tree(sender, instance, **kwargs):
+    bump_source_tree_generation()
+    sync_source_closure(instance.pk)
+
+
+@receiver(post_delete, sender=Source)
+def invalidate_source_tree(**kwargs):
+    # Closure rows of deleted sources go with them (ON DELETE CASCADE).
+    bump_source_tree_generation()
+
+
+@receiver(request_started)
+def start_source_tree_request(**kwargs):
+    begin_request()
+
+
+@receiver(request_finished)
+def finish_source_tree_request(**kwargs):
+    end_request()
@@ -3,15 +3,17 @@ import zipfile
 from io import StringIO
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from types import SimpleNamespace
 from unittest.mock import patch
 
+from django.contrib.auth.models import AnonymousUser
 from django.core.management import call_command
 from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.db.models import F
 
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils.translation import override
 
 from skoljka.apps.content.models import ContentAttachment
@@ -23,9 +25,13 @@ from skoljka.apps.sources.archive_transfer import (
     export_archive,
     plan_import,
 )
-from skoljka.apps.sources.models import Source, SourceDocument
+from skoljka.apps.sources.models import Source, SourceClosure, SourceDocument, SourceTreeGeneration, SourceYearStats
+from skoljka.apps.sources.selectors import source_year_problem_queryset
+from skoljka.apps.sources.tree import bump_source_tree_generation, source_tree
+from skoljka.apps.sources.year_stats import visible_year_counts
 from skoljka.apps.tracking.models import Submission
 from skoljka.tests.factories import (
+    make_export,
     make_problem,
     make_source,
     make_staff,
@@ -73,6 +79,128 @@ class SourceModelTest(TestCase):
             self.assertNotIn("..", document.file.name)
 
 
+
+class SourceTreeTest(TestCase):
+    def test_walk_orders_prunes_and_finds_ancestors(self):
+        owner = make_user(username="tree-owner")
+        root = make_source(slug="tree-root")
+        second = make_source(slug="tree-b", parent=root)
+        first = make_source(slug="tree-a", parent=root)
+        hidden = make_source(slug="tree-hidden", parent=first, is_public=False, created_by=owner)
+        leaf = make_source(slug="tree-leaf", parent=hidden)
+        Source.objects.filter(pk=second.pk).update(order=-1)
+        bump_source_tree_generation()
+
+        tree = source_tree()
+        self.assertEqual(tree.descendant_ids(root.pk), [root.pk, second.pk, first.pk, hidden.pk, leaf.pk])
+        self.assertEqual(tree.descendant_ids(root.pk, AnonymousUser()), [root.pk, second.pk, first.pk])
+        self.assertEqual(tree.descendant_ids(root.pk, owner)[-2:], [hidden.pk, leaf.pk])
+        self.assertEqual(
+            [node.slug for node in tree.ancestors(leaf.pk)], ["tree-root", "tree-a", "tree-hidden", "tree-leaf"]
+        )
+        self.assertNotIn(leaf.pk, tree.public_ids)
+
+    def test_reloads_when_generation_changes(self):
+        root = make_source(slug="gen-root")
+        tree = source_tree()
+        with self.assertNumQueries(1):
+            self.assertIs(source_tree(), tree)
+
+        # Another process: a write it made is announced only by the generation.
+        Source.objects.bulk_create([Source(slug="gen-child", parent=root)])
+        self.assertIs(source_tree(), tree)
+        SourceTreeGeneration.objects.update(generation=F("generation") + 1)
+        self.assertEqual(len(source_tree().descendant_ids(root.pk)), 2)
+
+
+class SourceClosureTest(TestCase):
+    def _subtree_slugs(self, source: Source) -> list[str]:
+        links = SourceClosure.objects.filter(ancestor=source).order_by("sort_path")
+        return [link.descendant.slug for link in links]
+
+    def test_closure_follows_saves_and_moves(self):
+        root = make_source(slug="cl-root")
+        a = make_source(slug="cl-a", parent=root)
+        ab = make_source(slug="cl-a-b", parent=root)
+        child = make_source(slug="cl-child", parent=a)
+        self.assertEqual(self._subtree_slugs(root), ["cl-root", "cl-a", "cl-child", "cl-a-b"])
+        self.assertEqual(SourceClosure.objects.get(ancestor=root, descendant=child).depth, 2)
+
+        a.order = 5
+        a.save()
+        self.assertEqual(self._subtree_slugs(root), ["cl-root", "cl-a-b", "cl-a", "cl-child"])
+
+        a.parent = ab
+        a.save()
+        self.assertEqual(self._subtree_slugs(ab), ["cl-a-b", "cl-a", "cl-child"])
+        self.assertEqual(SourceClosure.objects.get(ancestor=root, descendant=child).depth, 3)
+
+        a.delete()
+        self.assertEqual(self._subtree_slugs(root), ["cl-root", "cl-a-b"])
+
+    def test_subtree_problems_in_tree_order(self):
+        root = make_source(slug="order-root")
+        second = make_source(slug="order-b", parent=root)
+        first = make_source(slug="order-a", parent=root)
+        hidden = make_source(slug="order-hidden", parent=first, is_public=False, created_by=make_user())
+        p_second = make_problem(source=second, year=2020, problem_label="1")
+        p_first = make_problem(source=first, year=2020, problem_label="2")
+        p_root = make_problem(source=root, year=2020, problem_label="3")
+        make_problem(source=hidden, year=2020, problem_label="4")
+
+        problems = source_year_problem_queryset(make_user(), root, 2020)
+
+        self.assertEqual(list(problems), [p_root, p_first, p_second])
+
+
+class SourceYearStatsTest(TestCase):
+    def _stats(self, source: Source) -> dict:
+        rows = SourceYearStats.objects.filter(source=source)
+        return {row.year: (row.problem_count, row.public_problem_count, row.labels) for row in rows}
+
+    def test_stats_follow_problem_writes(self):
+        source = make_source(slug="stats-source")
+        other = make_source(slug="stats-other")
+        make_problem(source=source, year=2020, problem_label="10")
+        moved = make_problem(source=source, year=2020, problem_label="2", is_public=False, created_by=make_user())
+        make_problem(source=source, year=None, problem_label="")
+        self.assertEqual(self._stats(source), {2020: (2, 1, ["2", "10"]), None: (1, 1, [])})
+
+        moved.source = other
+        moved.year = 2021
+        moved.save()
+        self.assertEqual(self._stats(source), {2020: (1, 1, ["10"]), None: (1, 1, [])})
+        self.assertEqual(self._stats(other), {2021: (1, 0, ["2"])})
+
+        moved.delete()
+        self.assertEqual(self._stats(other), {})
+
+    def test_visible_counts_per_user(self):
+        owner = make_user()
+        source = make_source(slug="stats-visible")
+        make_problem(source=source, year=2020, problem_label="1")
+        make_problem(source=source, year=2020, problem_label="2", is_public=False, created_by=owner)
+        hidden = make_source(slug="stats-hidden", is_public=False, created_by=owner)
+        make_problem(source=hidden, year=2020, problem_label="1")
+        ids = [source.pk, hidden.pk]
+
+        self.assertEqual(visible_year_counts(ids, AnonymousUser()), {(source.pk, 2020): 1})
+        self.assertEqual(visible_year_counts(ids, make_user()), {(source.pk, 2020): 1, (hidden.pk, 2020): 1})
+        self.assertEqual(visible_year_counts(ids, owner), {(source.pk, 2020): 2, (hidden.pk, 2020): 1})
+        self.assertEqual(visible_year_counts(ids, make_staff()), {(source.pk, 2020): 2, (hidden.pk, 2020): 1})
+
+    def test_rebuild_command(self):
+        source = make_source(slug="stats-rebuild")
+        make_problem(source=source, year=2020, problem_label="1")
+        SourceYearStats.objects.all().delete()
+
+        out = StringIO()
+        call_command("rebuild_source_year_stats", stdout=out)
+
+        self.assertEqual(self._stats(source), {2020: (1, 1, ["1"])})
+        self.assertIn("Rebuilt 1 SourceYearStats rows.", out.getvalue())
+
+
 class SourceListViewTest(TestCase):
     def test_shows_root_sources(self):
         make_source(slug="root1", name="Root One")
@@ -376,6 +504,28 @@ class SourceDetailViewTest(TestCase):
         self.assertContains(r, "Overview body 50")
         self.assertContains(r, "Showing 51-55 of 55")
 
+    def test_source_detail_queries_do_not_grow_with_problems(self):
+        src = make_source(slug="source-queries", name="Source Queries")
+
+        def count_queries() -> int:
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(f"/archive/{src.slug}/?view=cards")
+            return len(queries)
+
+        make_problem(source=src, year=2023, problem_label="1", content="Body")
+        baseline = count_queries()
+        for i in range(60):
+            make_problem(source=src, year=2024, problem_label=str(i + 1), content="Body")
+        self.assertEqual(count_queries(), baseline)
+
+    def test_overview_grid_titles_untitled_problems(self):
+        src = make_source(slug="grid-light", name="Grid Light")
+        make_problem(source=src, year=2024, problem_label="1")
+
+        r = self.client.get(f"/archive/{src.slug}/")
+
+        self.assertContains(r, 'title="Grid Light 2024 Problem 1"')
+
     def test_year_pdf_export_button_requires_login(self):
         src = make_source(slug="yearpdfbutton", name="Year PDF Button")
         make_problem(source=src, year=2024, problem_label="1", content="Full statement.")
@@ -389,7 +539,7 @@ class SourceDetailViewTest(TestCase):
 
     @patch("skoljka.apps.problems.export_views.export_problems_pdf")
     def test_year_pdf_export_uses_visible_year_problems(self, export_pdf):
-        export_pdf.return_value = SimpleNamespace(filename="year.pdf", data=b"%PDF")
+        export_pdf.return_value = make_export("year.pdf", b"%PDF", self.enterContext(TemporaryDirectory()))
         user = make_user(username="source-pdf-user")
         other = make_user(username="source-pdf-other")
         src = make_source(slug="yearpdf", name="Year PDF")
@@ -407,7 +557,7 @@ class SourceDetailViewTest(TestCase):
 
     @patch("skoljka.apps.problems.export_views.export_problems_pdf")
     def test_year_pdf_export_includes_descendant_source_problems(self, export_pdf):
-        export_pdf.return_value = SimpleNamespace(filename="year.pdf", data=b"%PDF")
+        export_pdf.return_value = make_export("year.pdf", b"%PDF", self.enterContext(TemporaryDirectory()))
         user = make_user(username="source-pdf-desc-user")
         parent = make_source(slug="yearpdf-parent", name="Year PDF Parent")
         child = make_source(slug="yearpdf-child", name="Year PDF Child", parent=parent)
@@ -424,7 +574,7 @@ class SourceDetailViewTest(TestCase):
 
     @patch("skoljka.apps.problems.export_views.export_problems_pdf")
     def test_source_pdf_export_matches_archive_page_problem_scope(self, export_pdf):
-        export_pdf.return_value = SimpleNamespace(filename="source.pdf", data=b"%PDF")
+        export_pdf.return_value = make_export("source.pdf", b"%PDF", self.enterContext(TemporaryDirectory()))
         user = make_user(username="source-pdf-page-scope-user")
         parent = make_source(slug="sourcepdf-parent", name="Source PDF Parent")
         child = make_source(slug="sourcepdf-child", name="Source PDF Child", parent=parent)
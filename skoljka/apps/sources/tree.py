@@ -0,0 +1,160 @@
+"""Process-wide snapshot of the source hierarchy.
+
+Each process keeps one immutable ``SourceTree``, built by a single query over
+``Source`` and tagged with ``SourceTreeGeneration.generation``. ``signals``
+replace the generation on every source save or delete, so other processes
+reload once they see it change. Inside a request the generation is read once
+(the first time the tree is needed); outside requests it is read on every
+call. Generations are timestamps, so a rolled-back write never leaves a
+process holding a tree that matches the restored generation.
+"""
+
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+from django.urls import reverse
+from django.utils.translation import get_language
+
+from skoljka.apps.sources.models import Source, SourceTreeGeneration, translated_source_name
+
+GENERATION_PK = 1
+
+_tree: "SourceTree | None" = None
+_request_state = threading.local()
+
+
+@dataclass(frozen=True)
+class SourceNode:
+    id: int
+    parent_id: int | None
+    order: int
+    slug: str
+    translations: dict
+    is_public: bool
+    created_by_id: int | None
+
+    @property
+    def pk(self) -> int:
+        return self.id
+
+    def name(self, language: str | None = None) -> str:
+        return translated_source_name(self.translations, self.slug, (language or get_language() or "en").split("-")[0])
+
+    def get_absolute_url(self) -> str:
+        return reverse("source_detail", kwargs={"slug": self.slug})
+
+    def visible_to(self, user) -> bool:
+        """Same rule as ``Source.objects.for_user(user)``."""
+        if not user.is_authenticated:
+            return self.is_public
+        return user.is_staff or self.is_public or self.created_by_id == user.pk
+
+
+class SourceTree:
+    def __init__(self, generation: int, nodes: Iterable[SourceNode]) -> None:
+        self.generation = generation
+        self._nodes = {node.id: node for node in nodes}
+        self._by_slug = {node.slug: node for node in self._nodes.values()}
+        children: dict[int | None, list[SourceNode]] = {}
+        for node in self._nodes.values():
+            parent_id = node.parent_id if node.parent_id in self._nodes else None
+            children.setdefault(parent_id, []).append(node)
+        self._children = {
+            parent_id: tuple(sorted(nodes, key=lambda node: (node.order, node.slug)))
+            for parent_id, nodes in children.items()
+        }
+        # Public along with every ancestor; parents are visited first.
+        public: set[int] = set()
+        for node, _depth in self.walk(None):
+            if node.is_public and (node.parent_id is None or node.parent_id in public):
+                public.add(node.id)
+        self.public_ids = frozenset(public)
+
+    def get(self, source_id: int | None) -> SourceNode | None:
+        return self._nodes.get(source_id) if source_id is not None else None
+
+    def by_slug(self, slug: str) -> SourceNode | None:
+        return self._by_slug.get(slug)
+
+    def walk(self, source_id: int | None, user=None) -> Iterator[tuple[SourceNode, int]]:
+        """The source and its descendants with their depth, parents first.
+
+        Siblings follow ``(order, slug)``. ``source_id=None`` walks every root
+        at depth 0. With ``user``, sources they cannot see are skipped along
+        with their subtrees.
+        """
+        if source_id is None:
+            stack = [(node, 0) for node in reversed(self._children.get(None, ()))]
+        else:
+            node = self._nodes.get(source_id)
+            stack = [(node, 0)] if node is not None else []
+        seen: set[int] = set()
+        while stack:
+            node, depth = stack.pop()
+            if node.id in seen or (user is not None and not node.visible_to(user)):
+                continue
+            seen.add(node.id)
+            yield node, depth
+            stack.extend((child, depth + 1) for child in reversed(self._children.get(node.id, ())))
+
+    def descendant_ids(self, source_id: int, user=None) -> list[int]:
+        """``source_id`` followed by its descendants in display order."""
+        return [node.id for node, _depth in self.walk(source_id, user)]
+
+    def ancestors(self, source_id: int) -> list[SourceNode]:
+        """The root first, down to and including ``source_id``."""
+        chain: list[SourceNode] = []
+        seen: set[int] = set()
+        node = self._nodes.get(source_id)
+        while node is not None and node.id not in seen:
+            seen.add(node.id)
+            chain.append(node)
+            node = self.get(node.parent_id)
+        chain.reverse()
+        return chain
+
+
+def source_tree() -> SourceTree:
+    global _tree
+    generation = getattr(_request_state, "generation", None)
+    if generation is None:
+        generation = current_source_tree_generation()
+        if getattr(_request_state, "active", False):
+            _request_state.generation = generation
+    tree = _tree
+    if tree is None or tree.generation != generation:
+        tree = _load_tree(generation)
+        _tree = tree
+    return tree
+
+
+def current_source_tree_generation() -> int:
+    return SourceTreeGeneration.objects.filter(pk=GENERATION_PK).values_list("generation", flat=True).first() or 0
+
+
+def bump_source_tree_generation() -> None:
+    global _tree
+    generation = time.time_ns()
+    if not SourceTreeGeneration.objects.filter(pk=GENERATION_PK).update(generation=generation):
+        SourceTreeGeneration.objects.create(pk=GENERATION_PK, generation=generation)
+    _tree = None
+    _request_state.generation = None
+
+
+def begin_request() -> None:
+    _request_state.active = True
+    _request_state.generation = None
+
+
+def end_request() -> None:
+    _request_state.active = False
+    _request_state.generation = None
+
+
+def _load_tree(generation: int) -> SourceTree:
+    rows = Source.objects.order_by().values_list(
+        "id", "parent_id", "order", "slug", "translations", "is_public", "created_by_id"
+    )
+    return SourceTree(generation, (SourceNode(*row) for row in rows))
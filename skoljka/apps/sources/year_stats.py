@@ -0,0 +1,86 @@
+"""Maintenance and reads of ``SourceYearStats``.
+
+A problem write recounts only the (source, year) rows it touched, from the
+``problem_source_year_idx`` index, so concurrent writes cannot drift the
+totals the way increments could. Which problems a user sees depends on the
+user, so ``visible_year_counts`` picks the matching total per row and adds a
+signed-in user's own private problems live.
+"""
+
+import re
+from collections.abc import Iterable
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import Count, Q
+
+from skoljka.apps.problems.models import Problem
+from skoljka.apps.sources.models import SourceYearStats
+from skoljka.apps.sources.tree import source_tree
+
+type YearKey = tuple[int, int | None]
+
+
+def problem_label_sort_key(label: str):
+    parts = re.split(r"(\d+)", label)
+    return [int(part) if part.isdigit() else part.lower() for part in parts]
+
+
+def refresh_source_year_stats(keys: Iterable[tuple[int | None, int | None]]) -> None:
+    for source_id, year in set(keys):
+        if source_id is None:
+            continue
+        totals = Problem.objects.filter(source_id=source_id, year=year).aggregate(
+            problem_count=Count("pk"),
+            public_problem_count=Count("pk", filter=Q(is_public=True)),
+            labels=ArrayAgg("problem_label", distinct=True, filter=~Q(problem_label=""), default=[]),
+        )
+        if not totals["problem_count"]:
+            SourceYearStats.objects.filter(source_id=source_id, year=year).delete()
+            continue
+        totals["labels"] = sorted(totals["labels"], key=problem_label_sort_key)
+        SourceYearStats.objects.update_or_create(source_id=source_id, year=year, defaults=totals)
+
+
+def rebuild_source_year_stats() -> int:
+    """Replace every row from one grouped pass over ``Problem``."""
+    rows = (
+        Problem.objects.exclude(source=None)
+        .order_by()
+        .values("source_id", "year")
+        .annotate(
+            problem_count=Count("pk"),
+            public_problem_count=Count("pk", filter=Q(is_public=True)),
+            labels=ArrayAgg("problem_label", distinct=True, filter=~Q(problem_label=""), default=[]),
+        )
+    )
+    stats = [
+        SourceYearStats(**{**row, "labels": sorted(row["labels"], key=problem_label_sort_key)}) for row in rows
+    ]
+    SourceYearStats.objects.all().delete()
+    SourceYearStats.objects.bulk_create(stats, batch_size=5000)
+    return len(stats)
+
+
+def visible_year_counts(source_ids: list[int], user) -> dict[YearKey, int]:
+    """Problems ``user`` can see, per (source, year), as ``for_user`` counts them."""
+    rows = SourceYearStats.objects.filter(source_id__in=source_ids).values_list(
+        "source_id", "year", "problem_count", "public_problem_count"
+    )
+    if user.is_authenticated and user.is_staff:
+        counts = {(source_id, year): total for source_id, year, total, _public in rows}
+    elif not user.is_authenticated:
+        # Anonymous visitors only see problems whose whole source chain is public.
+        public_ids = source_tree().public_ids
+        counts = {(source_id, year): public for source_id, year, _total, public in rows if source_id in public_ids}
+    else:
+        counts = {(source_id, year): public for source_id, year, _total, public in rows}
+        own_private = (
+            Problem.objects.filter(created_by=user, is_public=False, source_id__in=source_ids)
+            .values("source_id", "year")
+            .annotate(count=Count("pk"))
+            .order_by()
+        )
+        for row in own_private:
+            key = (row["source_id"], row["year"])
+            counts[key] = counts.get(key, 0) + row["count"]
+    return {key: count for key, count in counts.items() if count}
@@ -0,0 +1,31 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:02
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.db.models.fields.json
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tags", "0003_tag_short_translations"),
+    ]
+
+    operations = [
+        # pg_trgm for every trigram index; sources and problems depend on this.
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddIndex(
+            model_name="tag",
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(models.F("slug")), name="gin_trgm_ops"), name="tag_slug_trgm"),
+        ),
+        migrations.AddIndex(
+            model_name="tag",
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.fields.json.KeyTextTransform("en", "translations")), name="gin_trgm_ops"), name="tag_name_en_trgm"),
+        ),
+        migrations.AddIndex(
+            model_name="tag",
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.fields.json.KeyTextTransform("hr", "translations")), name="gin_trgm_ops"), name="tag_name_hr_trgm"),
+        ),
+    ]
@@ -1,8 +1,11 @@
 from django.db import models
+from django.db.models import F
 from django.urls import reverse
 from django.utils.translation import get_language
 from django.utils.http import urlencode
 
+from skoljka.utils.trigram import json_text, trigram_index
+
 
 class Tag(models.Model):
     id: int
@@ -28,6 +31,11 @@ class Tag(models.Model):
 
     class Meta:
         ordering = ["slug"]
+        indexes = [
+            trigram_index(F("slug"), name="tag_slug_trgm"),
+            trigram_index(json_text("translations", "en"), name="tag_name_en_trgm"),
+            trigram_index(json_text("translations", "hr"), name="tag_name_hr_trgm"),
+        ]
 
     def _language(self, language: str | None = None) -> str:
         return (language or get_language() or "en").split("-")[0]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TrackingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "skoljka.apps.tracking"
+
+    def ready(self):
+        from skoljka.apps.tracking import signals  # noqa: F401
@@ -0,0 +1,99 @@
+"""Per-user sets of solved, bookmarked, liked and noted problem ids.
+
+The sets are loaded together, cached as sorted arrays and keyed by
+``User.tracking_generation``, which ``signals`` replace whenever a submission,
+bookmark or like changes. The generation lives on the user row that
+authentication loads anyway, so every worker sees a change immediately and a
+warm page costs no tracking queries. Generations are timestamps rather than
+counters, so a rolled-back bump can never reuse a cached key.
+"""
+
+import time
+from array import array
+from dataclasses import dataclass
+
+from django.contrib.postgres.fields import ArrayField
+from django.core.cache import cache
+from django.db.models import BigIntegerField, BooleanField, ExpressionWrapper, F, Func, Q, Value
+
+from skoljka.apps.accounts.models import User
+from skoljka.apps.tracking.models import Bookmark, Like, Submission
+
+TRACKED_IDS_TTL = 24 * 3600
+
+
+@dataclass(frozen=True)
+class TrackedProblemIds:
+    solved: frozenset[int]
+    bookmarked: frozenset[int]
+    liked: frozenset[int]
+    has_notes: frozenset[int]
+
+
+NO_TRACKED_IDS = TrackedProblemIds(frozenset(), frozenset(), frozenset(), frozenset())
+
+
+def tracked_problem_ids(user) -> TrackedProblemIds:
+    if not user or not user.is_authenticated:
+        return NO_TRACKED_IDS
+    key = f"tracking:ids:{user.pk}:{user.tracking_generation}"
+    # Several components ask within one request; build the sets once.
+    memo = getattr(user, "_tracked_problem_ids", None)
+    if memo is not None and memo[0] == key:
+        return memo[1]
+    arrays = cache.get(key)
+    if arrays is None:
+        arrays = _load_arrays(user)
+        cache.set(key, arrays, TRACKED_IDS_TTL)
+    ids = TrackedProblemIds(*(frozenset(a) for a in arrays))
+    user._tracked_problem_ids = (key, ids)
+    return ids
+
+
+class _InArray(Func):
+    """``expression = ANY(array)``."""
+
+    arg_joiner = " = ANY("
+    template = "%(expressions)s)"
+    output_field = BooleanField()
+
+
+def solved_problem_filter(user, field: str = "id") -> Q:
+    """``field`` is one of the user's solved problem ids.
+
+    The cached ids go to the database as a single array parameter
+    (``field = ANY(%s)``) rather than one bind parameter per id.
+    """
+    ids = sorted(tracked_problem_ids(user).solved)
+    return Q(_InArray(F(field), Value(ids, output_field=ArrayField(BigIntegerField()))))
+
+
+def bump_tracking_generation(user_id: int) -> None:
+    User.objects.filter(pk=user_id).update(tracking_generation=time.time_ns())
+
+
+def refresh_tracking_generation(user) -> None:
+    """Pick up a bump made while handling the current request."""
+    user.refresh_from_db(fields=["tracking_generation"])
+
+
+def _load_arrays(user) -> tuple[array, array, array, array]:
+    solved, has_notes = [], []
+    submissions = (
+        Submission.objects.filter(Q(solved=True) | ~Q(note_md=""), user=user)
+        .annotate(has_note=ExpressionWrapper(~Q(note_md=""), output_field=BooleanField()))
+        .values_list("problem_id", "solved", "has_note")
+    )
+    for problem_id, is_solved, has_note in submissions:
+        if is_solved:
+            solved.append(problem_id)
+        if has_note:
+            has_notes.append(problem_id)
+    bookmarked = Bookmark.objects.filter(user=user).values_list("problem_id", flat=True)
+    liked = Like.objects.filter(user=user).values_list("problem_id", flat=True)
+    return (
+        array("q", sorted(solved)),
+        array("q", sorted(bookmarked)),
+        array("q", sorted(liked)),
+        array("q", sorted(has_notes)),
+    )
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from skoljka.apps.tracking.models import Bookmark, Like, Submission
+from skoljka.apps.tracking.problem_sets import bump_tracking_generation
+
+
+@receiver([post_save, post_delete], sender=Submission)
+@receiver([post_save, post_delete], sender=Bookmark)
+@receiver([post_save, post_delete], sender=Like)
+def invalidate_tracked_problem_ids(sender, instance, **kwargs):
+    bump_tracking_generation(instance.user_id)
@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from skoljka.apps.tracking.models import Bookmark, FavoriteProblemList, FavoriteSource, Like, Submission
 from skoljka.tests.factories import make_list, make_problem, make_source, make_user
@@ -250,3 +252,39 @@ class SaveNoteTest(TestCase):
         self.client.force_login(self.user)
         r = self.client.post("/tracking/999999/note/", {"note_md": "x"})
         self.assertEqual(r.status_code, 404)
+
+
+class TrackedProblemIdsTest(TestCase):
+    def setUp(self):
+        self.user = make_user(username="tracked-ids")
+        self.problem = make_problem(title="Tracked problem")
+
+    def test_problem_list_reflects_toggles(self):
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get("/problems/"), 'data-solved="0"')
+
+        self.client.post(f"/tracking/{self.problem.pk}/solve/")
+        self.client.post(f"/tracking/{self.problem.pk}/bookmark/")
+
+        r = self.client.get("/problems/")
+        self.assertContains(r, 'data-solved="1"')
+        self.assertContains(r, 'data-bookmarked="1"')
+
+    def test_direct_writes_invalidate_the_cached_sets(self):
+        self.client.force_login(self.user)
+        self.client.get("/problems/")
+
+        Like.objects.create(user=self.user, problem=self.problem)
+
+        self.assertContains(self.client.get("/problems/"), 'data-liked="1"')
+
+    def test_warm_sets_skip_tracking_queries(self):
+        Submission.objects.create(user=self.user, problem=self.problem, solved=True)
+        self.client.force_login(self.user)
+        self.client.get("/problems/")
+
+        with CaptureQueriesContext(connection) as queries:
+            r = self.client.get("/problems/")
+
+        self.assertContains(r, 'data-solved="1"')
+        self.assertFalse([q["sql"] for q in queries if '"tracking_' in q["sql"]])
@@ -54,6 +54,10 @@ DEFAULT_FROM_EMAIL = "noreply@localhost"
 # the Django environment because it uses the app's generated JS bundles.
 EXTERNAL_PROCESS_MODE = "direct"
 
+# Each Django process keeps a pool of warm Node renderers for Markdown/LaTeX.
+# Set to 0 to start a fresh Node process for every render instead.
+# MARKDOWN_RENDERER_POOL_SIZE = 2
+
 # For release/deployment, prefer the Docker worker so external tools are
 # isolated from the web process. Start it with `cd docker && make up`.
 #
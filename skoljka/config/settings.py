@@ -127,8 +127,35 @@ TRANSCRIPTION_OCR_MODEL = "mistral-ocr-latest"
 TRANSCRIPTION_CHAT_MODEL = "anthropic/claude-sonnet-4-20250514"
 TRANSCRIPTION_TAG_SUGGESTION_MODEL = TRANSCRIPTION_CHAT_MODEL
 
+# Markdown/LaTeX rendering. Each Django process keeps this many warm Node
+# renderer processes; 0 disables the pool and renders with one-shot processes.
+MARKDOWN_RENDERER_POOL_SIZE = globals().get("MARKDOWN_RENDERER_POOL_SIZE", 2)
+MARKDOWN_RENDERER_TIMEOUT = 10
+MARKDOWN_RENDERER_HEALTH_CHECK_SECONDS = 60
+
+# Generated PDF/LaTeX exports, reused while the problems and template are
+# unchanged. Least recently used files are evicted above the size limit.
+EXPORT_CACHE_DIR = BASE_DIR / "private" / "export-cache"
+EXPORT_CACHE_MAX_BYTES = globals().get("EXPORT_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024)
+
+# Search query log: the share of searches timed and recorded, and how many
+# entries (or seconds) each process buffers before writing them in one insert.
+SEARCH_LOG_SAMPLE_RATE = globals().get("SEARCH_LOG_SAMPLE_RATE", 0.2)
+SEARCH_LOG_BATCH_SIZE = 50
+SEARCH_LOG_FLUSH_SECONDS = 60
+
+# PDF exports above MAX_PDF_EXPORT_PROBLEMS run as background jobs, compiled
+# in chunks of that size and merged.
+PDF_EXPORT_JOB_DIR = BASE_DIR / "private" / "pdf-export-jobs"
+PDF_EXPORT_JOB_TTL_DAYS = 2
+PDF_EXPORT_JOB_ZOMBIE_MINUTES = 10
+
 # External tool execution. Direct mode runs subprocesses locally. Worker mode
 # sends allowlisted commands to the Docker worker over HTTP.
 EXTERNAL_WORKER_HOST_ROOT = BASE_DIR
 EXTERNAL_WORKER_CONTAINER_ROOT = Path("/app")
 EXTERNAL_WORKER_TMP_DIR = BASE_DIR / "worker-files"
+
+# Precompiled XeLaTeX formats for PDF exports, one per preamble variant. The
+# directory is shared with the worker; None compiles the full preamble each time.
+PDF_EXPORT_FORMAT_DIR = globals().get("PDF_EXPORT_FORMAT_DIR", EXTERNAL_WORKER_TMP_DIR / "latex-formats")
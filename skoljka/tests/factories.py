@@ -1,6 +1,8 @@
 """Shared test helpers for constructing model instances."""
 
 from itertools import count
+from pathlib import Path
+from types import SimpleNamespace
 
 from skoljka.apps.accounts.models import User
 from skoljka.apps.content.models import Content
@@ -141,3 +143,10 @@ def add_to_list(pl: ProblemList, problem: Problem, order: int = 0) -> ProblemLis
     return ProblemListItem.objects.create(
         problem_list=pl, problem=problem, order=order
     )
+
+
+def make_export(filename: str, data: bytes, directory: str | Path) -> SimpleNamespace:
+    """Stand-in for a ProblemPdfExport/ProblemLatexExport backed by a file."""
+    path = Path(directory) / filename
+    path.write_bytes(data)
+    return SimpleNamespace(filename=filename, file=path.open("rb"), etag=filename)
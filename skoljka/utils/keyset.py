@@ -0,0 +1,172 @@
+"""Keyset (cursor) pagination.
+
+Pages are fetched with ``WHERE key > last_key ORDER BY key LIMIT n`` instead of
+an OFFSET, so a deep page costs the same as the first one when an index
+matches the key. Runs of key columns sorted the same way are compared as one
+row value (``ROW(a, b) > ROW(x, y)``), which Postgres turns into an index
+range. Cursors are signed: a stale or tampered ``?page=`` value falls back to
+the first page instead of reaching the database. A plain page number, as in
+links from before cursors, is still served with an OFFSET; its page links are
+cursors again.
+"""
+
+import hashlib
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import cached_property
+from itertools import groupby
+
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Expression, F, Field, Func, Q, QuerySet, Value
+from django.db.models.lookups import Exact, GreaterThan, LessThan
+
+KEYSET_SIGNING_SALT = "skoljka.keyset"
+COUNT_CACHE_TTL = 300
+
+
+@dataclass(frozen=True)
+class KeyColumn:
+    """One column of a keyset; the columns together must identify a row.
+
+    Without ``expression``, ``name`` is a field or an existing annotation.
+    """
+
+    name: str
+    expression: Expression | None = None
+    descending: bool = False
+
+
+class Row(Func):
+    template = "ROW(%(expressions)s)"
+    output_field = Field()
+
+
+@dataclass(frozen=True)
+class KeysetPage:
+    object_list: list
+    start_index: int
+    next_cursor: str | None
+    previous_cursor: str | None
+    """``""`` when the previous page is the first one."""
+    paginator: "KeysetPaginator"
+
+    def end_index(self) -> int:
+        return self.start_index + len(self.object_list) - 1
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    def __init__(self, queryset: QuerySet, per_page: int, key: Sequence[KeyColumn]) -> None:
+        self.queryset = queryset
+        self.per_page = per_page
+        self.key = tuple(key)
+
+    @cached_property
+    def count(self) -> int:
+        return cached_count(self.queryset)
+
+    def get_page(self, cursor: str | None) -> KeysetPage:
+        if cursor and cursor.isascii() and cursor.isdigit() and int(cursor) > 1:
+            return self._numbered_page(int(cursor))
+        state = _load_cursor(cursor, len(self.key))
+        backwards = state is not None and state["d"] == "prev"
+        qs = self._ordered(backwards=backwards)
+        if state is not None:
+            qs = qs.filter(_beyond(self.key, state["k"], backwards=backwards))
+
+        rows = list(qs[: self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+            # Reaching the start corrects any drift in the remembered position.
+            start = state["n"] if more else 1
+            has_next, has_previous = True, more
+        else:
+            start = state["n"] if state is not None else 1
+            has_next, has_previous = more, state is not None
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = _dump_cursor("next", self._values(rows[-1]), start + len(rows))
+        if rows and has_previous:
+            previous_start = start - self.per_page
+            previous_cursor = _dump_cursor("prev", self._values(rows[0]), previous_start) if previous_start > 1 else ""
+        elif state is not None and not rows:
+            previous_cursor = ""
+        return KeysetPage(rows, start if rows else 0, next_cursor, previous_cursor, self)
+
+    def _numbered_page(self, number: int) -> KeysetPage:
+        """Page ``number`` of an old ``?page=N`` link, by OFFSET."""
+        offset = (number - 1) * self.per_page
+        rows = list(self._ordered(backwards=False)[offset : offset + self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if not rows:
+            return KeysetPage([], 0, None, "", self)
+        start = offset + 1
+        next_cursor = _dump_cursor("next", self._values(rows[-1]), start + len(rows)) if more else None
+        previous_start = start - self.per_page
+        previous_cursor = _dump_cursor("prev", self._values(rows[0]), previous_start) if previous_start > 1 else ""
+        return KeysetPage(rows, start, next_cursor, previous_cursor, self)
+
+    def _ordered(self, *, backwards: bool) -> QuerySet:
+        qs = self.queryset.annotate(**{c.name: c.expression for c in self.key if c.expression is not None})
+        return qs.order_by(*(_order(c, backwards=backwards) for c in self.key))
+
+    def _values(self, obj) -> list:
+        return [getattr(obj, c.name) for c in self.key]
+
+
+def cached_count(queryset: QuerySet, timeout: int = COUNT_CACHE_TTL) -> int:
+    """``queryset.count()``, shared for ``timeout`` seconds by identical queries."""
+    digest = hashlib.sha256(str(queryset.query).encode()).hexdigest()
+    return cache.get_or_set(f"keyset:count:{digest}", queryset.count, timeout)
+
+
+def _order(column: KeyColumn, *, backwards: bool):
+    return F(column.name).asc() if column.descending == backwards else F(column.name).desc()
+
+
+def _beyond(key: Sequence[KeyColumn], values: list, *, backwards: bool) -> Q:
+    """Rows that come after ``values`` in key order (before, if ``backwards``)."""
+    runs = []
+    position = 0
+    for descending, run in groupby(key, key=lambda c: c.descending):
+        run = list(run)
+        left = Row(*(F(c.name) for c in run))
+        right = Row(*(Value(v) for v in values[position : position + len(run)]))
+        runs.append((left, right, descending))
+        position += len(run)
+
+    match = Q()
+    equal_so_far = Q()
+    for left, right, descending in runs:
+        compare = GreaterThan if descending == backwards else LessThan
+        match |= equal_so_far & Q(compare(left, right))
+        equal_so_far &= Q(Exact(left, right))
+    return match
+
+
+def _dump_cursor(direction: str, values: list, start: int) -> str:
+    return signing.dumps({"d": direction, "k": values, "n": start}, salt=KEYSET_SIGNING_SALT, compress=True)
+
+
+def _load_cursor(cursor: str | None, length: int) -> dict | None:
+    if not cursor:
+        return None
+    try:
+        state = signing.loads(cursor, salt=KEYSET_SIGNING_SALT)
+    except signing.BadSignature:
+        return None
+    if not isinstance(state, dict) or state.get("d") not in ("next", "prev"):
+        return None
+    if not isinstance(state.get("k"), list) or len(state["k"]) != length or not isinstance(state.get("n"), int):
+        return None
+    return state
@@ -2,15 +2,37 @@
 
 The renderer lives in TypeScript under ts/shared so browser previews and
 server-side cached HTML use the same parser/compiler.
+
+Renders go through a pool of warm Node processes (see render_service). When
+the pool is disabled or misbehaves, we fall back to one-shot Node scripts,
+which also take a batch of fragments per process.
 """
 
+import hashlib
 import json
+import logging
 import subprocess
+from collections.abc import Sequence
 from dataclasses import dataclass
+from functools import cache
 from pathlib import Path
+from typing import Any
+
+from skoljka.utils.render_service import RenderRequestError, RenderServiceError, renderer_pool
+
+logger = logging.getLogger(__name__)
 
-_NODE_RENDERER = Path(__file__).resolve().parents[2] / "scripts" / "render-markdown.mjs"
-_NODE_LATEX_RENDERER = Path(__file__).resolve().parents[2] / "scripts" / "render-latex.mjs"
+_ROOT = Path(__file__).resolve().parents[2]
+_NODE_RENDERER = _ROOT / "scripts" / "render-markdown.mjs"
+_NODE_LATEX_RENDERER = _ROOT / "scripts" / "render-latex.mjs"
+# Everything that can change rendered output: the shared TypeScript renderer
+# and the locked versions of its npm dependencies (marked, KaTeX).
+_RENDERER_VERSION_INPUTS = [_ROOT / "ts" / "shared", _ROOT / "package-lock.json"]
+
+# Items per batched renderer round trip, and the extra timeout each item adds.
+RENDER_BATCH_SIZE = 200
+_BATCH_ITEM_TIMEOUT = 0.5
+_ONE_SHOT_TIMEOUT = 10
 
 
 @dataclass(frozen=True)
@@ -20,29 +42,33 @@ class LatexRenderResult:
     packages: list[str]
 
 
+@cache
+def renderer_version() -> str:
+    """Short hash of the renderer sources, used to stamp cached renders."""
+    digest = hashlib.sha256()
+    for root in _RENDERER_VERSION_INPUTS:
+        paths = sorted(root.rglob("*.ts")) if root.is_dir() else [root]
+        for path in paths:
+            if not path.is_file():
+                continue
+            digest.update(path.relative_to(_ROOT).as_posix().encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
 def compile_markdown(
     source_md: str,
     *,
     attachment_urls: dict[str, str] | None = None,
 ) -> tuple[str, str]:
     """Compile Markdown + LaTeX source to cached HTML and search text."""
-    # TODO: If imports become render-heavy, replace per-save Node startup with
-    # a batched renderer or a small long-running local rendering service.
-    payload = json.dumps(
+    data = _render(
+        "markdown",
         {"source": source_md, "attachmentUrls": attachment_urls or {}},
-        ensure_ascii=False,
-    )
-    result = subprocess.run(
-        ["node", str(_NODE_RENDERER)],
-        input=payload,
-        text=True,
-        capture_output=True,
-        check=False,
-        timeout=10,
+        script=_NODE_RENDERER,
+        label="Markdown renderer",
     )
-    if result.returncode:
-        raise RuntimeError(f"Markdown renderer failed: {result.stderr.strip()}")
-    data = json.loads(result.stdout)
     return data["html"], data["text"]
 
 
@@ -52,23 +78,111 @@ def render_latex(
     attachment_paths: dict[str, str] | None = None,
 ) -> LatexRenderResult:
     """Render Markdown + LaTeX source to a normalized LaTeX body."""
-    payload = json.dumps(
+    data = _render(
+        "latex",
         {"source": source_md, "attachmentPaths": attachment_paths or {}},
-        ensure_ascii=False,
+        script=_NODE_LATEX_RENDERER,
+        label="LaTeX renderer",
     )
+    return LatexRenderResult(
+        body=data["body"],
+        errors=data["errors"],
+        packages=data["packages"],
+    )
+
+
+def compile_markdown_many(
+    items: Sequence[tuple[str, dict[str, str] | None]],
+) -> list[tuple[str, str]]:
+    """Batch version of compile_markdown for (source, attachment URL map) pairs.
+
+    Results are returned in input order.
+    """
+    payloads = [{"source": source, "attachmentUrls": urls or {}} for source, urls in items]
+    return [
+        (data["html"], data["text"])
+        for data in _render_many("markdown", payloads, script=_NODE_RENDERER, label="Markdown renderer")
+    ]
+
+
+def render_latex_many(
+    items: Sequence[tuple[str, dict[str, str] | None]],
+) -> list[LatexRenderResult]:
+    """Batch version of render_latex for (source, attachment path map) pairs.
+
+    Results are returned in input order.
+    """
+    payloads = [{"source": source, "attachmentPaths": paths or {}} for source, paths in items]
+    return [
+        LatexRenderResult(body=data["body"], errors=data["errors"], packages=data["packages"])
+        for data in _render_many("latex", payloads, script=_NODE_LATEX_RENDERER, label="LaTeX renderer")
+    ]
+
+
+def _render(kind: str, payload: dict[str, Any], *, script: Path, label: str) -> dict[str, Any]:
+    pool = renderer_pool()
+    if pool is not None:
+        try:
+            return pool.request({"kind": kind, **payload})
+        except RenderRequestError as exc:
+            # The input itself is bad; a one-shot process would fail the same way.
+            raise RuntimeError(f"{label} failed: {exc.reason}") from exc
+        except RenderServiceError:
+            logger.warning("%s pool failed, falling back to a one-shot process", label, exc_info=True)
+    return _render_once(payload, script=script, label=label)
+
+
+def _render_many(kind: str, payloads: list[dict[str, Any]], *, script: Path, label: str) -> list[dict[str, Any]]:
+    results: list[dict[str, Any] | None] = [None] * len(payloads)
+    pool = renderer_pool()
+    if pool is not None:
+        for start in range(0, len(payloads), RENDER_BATCH_SIZE):
+            chunk = payloads[start:start + RENDER_BATCH_SIZE]
+            try:
+                answers = pool.request(
+                    {"kind": "batch", "items": [{"kind": kind, **payload} for payload in chunk]},
+                    timeout=pool.timeout + _BATCH_ITEM_TIMEOUT * len(chunk),
+                )
+            except RenderRequestError as exc:
+                raise RuntimeError(f"{label} failed: {exc.reason}") from exc
+            except RenderServiceError:
+                logger.warning("%s pool failed, falling back to one-shot processes", label, exc_info=True)
+                break
+            for offset, answer in enumerate(answers):
+                if "error" in answer:
+                    raise RuntimeError(f"{label} failed: {answer['error']}")
+                results[start + offset] = answer["result"]
+    # Whatever the pool could not render goes through one-shot processes, a
+    # batch per process rather than one process per fragment.
+    missing = [index for index, result in enumerate(results) if result is None]
+    for start in range(0, len(missing), RENDER_BATCH_SIZE):
+        indexes = missing[start:start + RENDER_BATCH_SIZE]
+        answers = _run_script(
+            {"items": [payloads[index] for index in indexes]},
+            script=script,
+            label=label,
+            timeout=_ONE_SHOT_TIMEOUT + _BATCH_ITEM_TIMEOUT * len(indexes),
+        )
+        for index, answer in zip(indexes, answers):
+            if "error" in answer:
+                raise RuntimeError(f"{label} failed: {answer['error']}")
+            results[index] = answer["result"]
+    return results
+
+
+def _render_once(payload: dict[str, Any], *, script: Path, label: str) -> dict[str, Any]:
+    return _run_script(payload, script=script, label=label, timeout=_ONE_SHOT_TIMEOUT)
+
+
+def _run_script(payload: dict[str, Any], *, script: Path, label: str, timeout: float) -> Any:
     result = subprocess.run(
-        ["node", str(_NODE_LATEX_RENDERER)],
-        input=payload,
+        ["node", str(script)],
+        input=json.dumps(payload, ensure_ascii=False),
         text=True,
         capture_output=True,
         check=False,
-        timeout=10,
+        timeout=timeout,
     )
     if result.returncode:
-        raise RuntimeError(f"LaTeX renderer failed: {result.stderr.strip()}")
-    data = json.loads(result.stdout)
-    return LatexRenderResult(
-        body=data["body"],
-        errors=data["errors"],
-        packages=data["packages"],
-    )
+        raise RuntimeError(f"{label} failed: {result.stderr.strip()}")
+    return json.loads(result.stdout)
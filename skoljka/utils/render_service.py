@@ -0,0 +1,231 @@
+"""Pool of long-lived Node renderer processes.
+
+Starting Node and loading KaTeX dominates the cost of a single render, so each
+Django process keeps a few warm ``scripts/render-service.mjs`` processes and
+talks to them with line-delimited JSON over stdin/stdout. Callers treat a
+``RenderRequestError`` as bad input and any other ``RenderServiceError`` as
+"pool unavailable", falling back to the one-shot renderer scripts.
+"""
+
+import atexit
+import json
+import os
+import queue
+import select
+import subprocess
+import threading
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+
+_NODE_RENDER_SERVICE = Path(__file__).resolve().parents[2] / "scripts" / "render-service.mjs"
+
+
+class RenderServiceError(RuntimeError):
+    pass
+
+
+class RenderRequestError(RenderServiceError):
+    """The renderer answered, but could not render this request."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(f"Renderer failed: {reason}")
+        self.reason = reason
+
+
+class _RendererProcess:
+    def __init__(self, command: Sequence[str]) -> None:
+        self.process = subprocess.Popen(
+            list(command),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            bufsize=0,
+        )
+        self.last_used = time.monotonic()
+        self._next_id = 0
+        self._buffer = b""
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def request(self, payload: dict[str, Any], timeout: float) -> Any:
+        self._next_id += 1
+        request_id = self._next_id
+        line = json.dumps({**payload, "id": request_id}, ensure_ascii=False).encode("utf-8") + b"\n"
+        stdin = self.process.stdin
+        assert stdin is not None
+        try:
+            stdin.write(line)
+            stdin.flush()
+        except OSError as exc:
+            raise RenderServiceError(f"Renderer process is not accepting input: {exc}") from exc
+
+        try:
+            response = json.loads(self._read_line(timeout))
+        except json.JSONDecodeError as exc:
+            raise RenderServiceError(f"Renderer returned invalid JSON: {exc}") from exc
+        self.last_used = time.monotonic()
+        if not isinstance(response, dict) or response.get("id") != request_id:
+            raise RenderServiceError("Renderer response does not match the request.")
+        if "error" in response:
+            raise RenderRequestError(response["error"])
+        return response.get("result")
+
+    def close(self) -> None:
+        if self.process.stdin:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        if self.process.stdout:
+            self.process.stdout.close()
+
+    def _read_line(self, timeout: float) -> bytes:
+        stdout = self.process.stdout
+        assert stdout is not None
+        fd = stdout.fileno()
+        deadline = time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RenderServiceError(f"Renderer did not answer within {timeout} seconds.")
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                raise RenderServiceError("Renderer process exited unexpectedly.")
+            self._buffer += chunk
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return line
+
+
+class RendererPool:
+    """Fixed-size pool of renderer processes, started lazily.
+
+    A process that times out, crashes, or answers out of sequence is killed
+    and its slot is refilled by a fresh process on the next request. Idle
+    processes are pinged before reuse once ``health_check_interval`` passes.
+    """
+
+    def __init__(
+        self,
+        command: Sequence[str],
+        *,
+        size: int,
+        timeout: float,
+        health_check_interval: float = 60,
+    ) -> None:
+        self.command = list(command)
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        # Empty slots are represented by None and filled on first use.
+        self._slots: queue.LifoQueue[_RendererProcess | None] = queue.LifoQueue()
+        for _ in range(size):
+            self._slots.put(None)
+        self._all: set[_RendererProcess] = set()
+        self._lock = threading.Lock()
+
+    def request(self, payload: dict[str, Any], *, timeout: float | None = None) -> Any:
+        worker = self._acquire()
+        try:
+            result = worker.request(payload, timeout or self.timeout)
+        except RenderRequestError:
+            self._slots.put(worker)
+            raise
+        except BaseException:
+            self._discard(worker)
+            raise
+        self._slots.put(worker)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            workers = list(self._all)
+            self._all.clear()
+        for worker in workers:
+            worker.close()
+
+    def _acquire(self) -> _RendererProcess:
+        try:
+            worker = self._slots.get(timeout=self.timeout)
+        except queue.Empty as exc:
+            raise RenderServiceError("No renderer process became available.") from exc
+        if worker is not None and not self._healthy(worker):
+            self._forget(worker)
+            worker.close()
+            worker = None
+        if worker is None:
+            try:
+                worker = _RendererProcess(self.command)
+            except OSError as exc:
+                self._slots.put(None)
+                raise RenderServiceError(f"Could not start renderer process: {exc}") from exc
+            with self._lock:
+                self._all.add(worker)
+        return worker
+
+    def _healthy(self, worker: _RendererProcess) -> bool:
+        if not worker.alive():
+            return False
+        if time.monotonic() - worker.last_used < self.health_check_interval:
+            return True
+        try:
+            return worker.request({"kind": "ping"}, min(self.timeout, 2)) == {"ok": True}
+        except RenderServiceError:
+            return False
+
+    def _discard(self, worker: _RendererProcess) -> None:
+        self._forget(worker)
+        if worker.alive():
+            worker.process.kill()
+        worker.close()
+        self._slots.put(None)
+
+    def _forget(self, worker: _RendererProcess) -> None:
+        with self._lock:
+            self._all.discard(worker)
+
+
+_pool: RendererPool | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def renderer_pool() -> RendererPool | None:
+    """Return this process's renderer pool, or None when it is disabled."""
+    global _pool, _pool_pid
+    size = settings.MARKDOWN_RENDERER_POOL_SIZE
+    if size <= 0 or not _NODE_RENDER_SERVICE.exists():
+        return None
+    with _pool_lock:
+        # Forked workers (gunicorn) must not share the parent's pipes.
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = RendererPool(
+                ["node", str(_NODE_RENDER_SERVICE)],
+                size=size,
+                timeout=settings.MARKDOWN_RENDERER_TIMEOUT,
+                health_check_interval=settings.MARKDOWN_RENDERER_HEALTH_CHECK_SECONDS,
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def close_renderer_pool() -> None:
+    global _pool, _pool_pid
+    with _pool_lock:
+        pool, pid = _pool, _pool_pid
+        _pool, _pool_pid = None, None
+    if pool is not None and pid == os.getpid():
+        pool.close()
+
+
+atexit.register(close_renderer_pool)
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from skoljka.utils.file_staging import FileStager, ZipStager
+from skoljka.utils.zip_stream import stream_zip
+
+
+def _drain(steps):
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+class StoredFile:
+    """Minimal stand-in for a Django FieldFile."""
+
+    def __init__(self, path: Path, *, local: bool = True):
+        self._path = path
+        self._local = local
+
+    @property
+    def path(self) -> str:
+        if not self._local:
+            raise NotImplementedError("This backend doesn't support absolute paths.")
+        return str(self._path)
+
+    @property
+    def size(self) -> int:
+        return self._path.stat().st_size
+
+    def open(self, mode: str = "rb"):
+        return self._path.open(mode)
+
+
+class FileStagingTest(TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media = Path(tmp.name) / "media"
+        self.build = Path(tmp.name) / "build"
+        self.media.mkdir()
+        self.build.mkdir()
+
+    def _stored(self, name: str, data: bytes, *, local: bool = True) -> StoredFile:
+        path = self.media / name
+        path.write_bytes(data)
+        return StoredFile(path, local=local)
+
+    def test_local_files_are_linked_not_copied(self):
+        stored = self._stored("figure.png", b"png")
+
+        target = FileStager(self.build).stage(stored, "attachments/p1/figure.png")
+
+        self.assertEqual(target.read_bytes(), b"png")
+        self.assertTrue(os.path.samefile(target, stored.path))
+
+    def test_remote_duplicates_are_copied_once(self):
+        stager = FileStager(self.build)
+        first = stager.stage(self._stored("a.png", b"same", local=False), "p1/a.png")
+        second = stager.stage(self._stored("b.png", b"same", local=False), "p2/b.png")
+        other = stager.stage(self._stored("c.png", b"diff", local=False), "p3/c.png")
+
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertFalse(os.path.samefile(first, other))
+        self.assertEqual(other.read_bytes(), b"diff")
+
+    def test_zip_stores_identical_files_once(self):
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            files = ZipStager(zf)
+            first = _drain(files.add(self._stored("a.png", b"same"), "files/a.png"))
+            second = _drain(files.add(self._stored("b.png", b"same"), "files/b.png"))
+            other = _drain(files.add(self._stored("c.png", b"diff"), "files/c.png"))
+
+        digest = hashlib.sha256(b"same").hexdigest()
+        self.assertEqual(first, ("files/a.png", 4, digest))
+        self.assertEqual(second, ("files/a.png", 4, digest))
+        self.assertEqual(other[0], "files/c.png")
+        with zipfile.ZipFile(buffer) as zf:
+            self.assertEqual(zf.namelist(), ["files/a.png", "files/c.png"])
+            self.assertEqual(zf.read("files/a.png"), b"same")
+
+    def test_zip_streams_large_files_in_chunks(self):
+        data = bytes(range(256)) * 1024
+        stored = self._stored("big.pdf", data, local=False)
+
+        def write(zf):
+            yield from ZipStager(zf).add(stored, "documents/big.pdf")
+
+        with patch("skoljka.utils.file_staging.CHUNK_SIZE", 64 * 1024):
+            chunks = list(stream_zip(write, compression=zipfile.ZIP_STORED))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertLess(max(len(chunk) for chunk in chunks), len(data))
+        with zipfile.ZipFile(BytesIO(b"".join(chunks))) as zf:
+            self.assertEqual(zf.read("documents/big.pdf"), data)
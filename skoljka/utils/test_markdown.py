@@ -1,6 +1,22 @@
+import sys
 from unittest import TestCase
+from unittest.mock import patch
 
-from skoljka.utils.markdown import compile_markdown, render_latex
+from skoljka.utils.markdown import compile_markdown, compile_markdown_many, render_latex, render_latex_many
+from skoljka.utils.render_service import RendererPool
+
+# Answers every request, but rejects its input.
+REJECTING_RENDERER = r"""
+import json, sys
+for line in sys.stdin:
+    request = json.loads(line)
+    if request.get("kind") == "batch":
+        response = {"id": request["id"], "result": [{"error": "bad input"} for _ in request["items"]]}
+    else:
+        response = {"id": request["id"], "error": "bad input"}
+    sys.stdout.write(json.dumps(response) + "\n")
+    sys.stdout.flush()
+"""
 
 
 class CompileMarkdownTest(TestCase):
@@ -656,3 +672,44 @@ class RenderLatexTest(TestCase):
         self.assertIn("Unclosed itemize environment", result.errors[0]["message"])
         self.assertIn("xcolor", result.packages)
         self.assertIn("\\textcolor{red}", result.body)
+
+
+class BatchRenderTest(TestCase):
+    def test_compile_markdown_many_matches_single_renders_in_order(self):
+        items = [
+            ("**bold**", None),
+            ("![figure](attachment:figure.png)", {"figure.png": "/media/figure.png"}),
+            ("$x$", None),
+        ]
+
+        results = compile_markdown_many(items)
+
+        self.assertEqual(results, [compile_markdown(source, attachment_urls=urls) for source, urls in items])
+
+    def test_render_latex_many_matches_single_renders_in_order(self):
+        items = [("\\textbf{a}", None), ("![f](attachment:f.png)", {"f.png": "attachments/f.png"})]
+
+        results = render_latex_many(items)
+
+        self.assertEqual(results, [render_latex(source, attachment_paths=paths) for source, paths in items])
+
+    def test_empty_batch(self):
+        self.assertEqual(compile_markdown_many([]), [])
+
+
+class RenderErrorTest(TestCase):
+    def setUp(self):
+        pool = RendererPool([sys.executable, "-c", REJECTING_RENDERER], size=1, timeout=2)
+        self.addCleanup(pool.close)
+        patcher = patch("skoljka.utils.markdown.renderer_pool", return_value=pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rejected_input_is_not_rendered_again(self):
+        with patch("skoljka.utils.markdown.subprocess.run") as run:
+            with self.assertRaisesRegex(RuntimeError, "Markdown renderer failed: bad input"):
+                compile_markdown("$x$")
+            with self.assertRaisesRegex(RuntimeError, "LaTeX renderer failed: bad input"):
+                render_latex_many([("$x$", None)])
+
+        run.assert_not_called()
@@ -0,0 +1,83 @@
+import sys
+from unittest import TestCase
+
+from skoljka.utils.render_service import RenderRequestError, RenderServiceError, RendererPool
+
+FAKE_RENDERER = r"""
+import json, os, sys, time
+for line in sys.stdin:
+    request = json.loads(line)
+    kind = request.get("kind")
+    if kind == "crash":
+        sys.exit(1)
+    if kind == "sleep":
+        time.sleep(5)
+    if kind == "fail":
+        response = {"id": request["id"], "error": "bad input"}
+    elif kind == "ping":
+        response = {"id": request["id"], "result": {"ok": True}}
+    else:
+        response = {"id": request["id"], "result": {"pid": os.getpid(), "source": request.get("source")}}
+    sys.stdout.write(json.dumps(response) + "\n")
+    sys.stdout.flush()
+"""
+
+
+class RendererPoolTest(TestCase):
+    def _pool(self, **kwargs) -> RendererPool:
+        pool = RendererPool([sys.executable, "-c", FAKE_RENDERER], **{"size": 1, "timeout": 2, **kwargs})
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_reuses_warm_process(self):
+        pool = self._pool()
+
+        first = pool.request({"kind": "markdown", "source": "a"})
+        second = pool.request({"kind": "markdown", "source": "ž\nb"})
+
+        self.assertEqual(first["pid"], second["pid"])
+        self.assertEqual(second["source"], "ž\nb")
+
+    def test_restarts_crashed_process(self):
+        pool = self._pool()
+        first = pool.request({"kind": "markdown"})
+
+        with self.assertRaises(RenderServiceError):
+            pool.request({"kind": "crash"})
+        second = pool.request({"kind": "markdown"})
+
+        self.assertNotEqual(first["pid"], second["pid"])
+
+    def test_timeout_replaces_process(self):
+        pool = self._pool(timeout=0.5)
+        first = pool.request({"kind": "markdown"})
+
+        with self.assertRaisesRegex(RenderServiceError, "did not answer"):
+            pool.request({"kind": "sleep"})
+        second = pool.request({"kind": "markdown"})
+
+        self.assertNotEqual(first["pid"], second["pid"])
+
+    def test_render_error_keeps_process(self):
+        pool = self._pool()
+        first = pool.request({"kind": "markdown"})
+
+        with self.assertRaises(RenderRequestError):
+            pool.request({"kind": "fail"})
+        second = pool.request({"kind": "markdown"})
+
+        self.assertEqual(first["pid"], second["pid"])
+
+    def test_idle_process_is_health_checked(self):
+        pool = self._pool(health_check_interval=0)
+
+        first = pool.request({"kind": "markdown"})
+        second = pool.request({"kind": "markdown"})
+
+        self.assertEqual(first["pid"], second["pid"])
+
+    def test_missing_command_is_service_error(self):
+        pool = RendererPool(["/nonexistent/renderer"], size=1, timeout=1)
+
+        with self.assertRaises(RenderServiceError):
+            pool.request({"kind": "markdown"})
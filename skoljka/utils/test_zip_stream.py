@@ -0,0 +1,29 @@
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from skoljka.utils.zip_stream import stream_zip, write_path
+
+
+class ZipStreamTest(TestCase):
+    def test_yields_archive_incrementally(self):
+        with TemporaryDirectory() as tmp:
+            big = Path(tmp) / "big.bin"
+            big.write_bytes(bytes(range(256)) * 4096)
+
+            def write(zf):
+                zf.writestr("manifest.json", "{}")
+                yield
+                yield from write_path(zf, "files/big.bin", big)
+
+            with patch("skoljka.utils.zip_stream.CHUNK_SIZE", 64 * 1024):
+                chunks = list(stream_zip(write, compression=zipfile.ZIP_STORED))
+
+        self.assertGreater(len(chunks), 10)
+        self.assertLess(max(len(chunk) for chunk in chunks), 128 * 1024)
+        with zipfile.ZipFile(BytesIO(b"".join(chunks))) as zf:
+            self.assertEqual(zf.namelist(), ["manifest.json", "files/big.bin"])
+            self.assertEqual(zf.read("files/big.bin"), bytes(range(256)) * 4096)
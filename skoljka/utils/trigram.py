@@ -0,0 +1,39 @@
+"""Case-insensitive substring matching backed by pg_trgm GIN indexes.
+
+``__icontains`` compiles to ``UPPER(expr::text) LIKE UPPER(pattern)``, and on
+JSON paths the exact shape of ``expr`` depends on how the lookup is spelled.
+Models declare ``trigram_index(expr)`` and queries use ``contains(expr, token)``
+with the same expression, so both sides compile to the same ``UPPER(expr)``
+and the planner can match the expression index.
+"""
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models import Expression, Q
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from django.db.models.functions import Upper
+from django.db.models.lookups import Contains
+
+
+def json_text(name: str, *path: str) -> KeyTextTransform:
+    """Text at ``path`` inside the JSON field ``name`` (``->`` ... ``->>``)."""
+    *outer, last = path
+    expression: Expression | str = name
+    for key in outer:
+        expression = KeyTransform(key, expression)
+    return KeyTextTransform(last, expression)
+
+
+def trigram_index(expression: Expression, *, name: str) -> GinIndex:
+    return GinIndex(OpClass(Upper(expression), name="gin_trgm_ops"), name=name)
+
+
+def contains(expression: Expression, token: str) -> Contains:
+    """``expression`` contains ``token``, ignoring case; uses ``trigram_index``."""
+    return Contains(Upper(expression), token.upper())
+
+
+def contains_any(token: str, *expressions: Expression) -> Q:
+    match = Q()
+    for expression in expressions:
+        match |= Q(contains(expression, token))
+    return match
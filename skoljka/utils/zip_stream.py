@@ -0,0 +1,54 @@
+"""Zip archives streamed while they are written.
+
+``stream_zip`` runs a writer generator against a ``ZipFile`` on an unseekable
+sink and yields whatever the archive produced at each step of the writer, so
+a response only ever holds one step's output in memory. Members are written
+with data descriptors, which every unzip tool understands.
+"""
+
+import io
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from zipfile import ZIP64_LIMIT, ZIP_DEFLATED, ZipFile
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class _Sink(io.RawIOBase):
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(write: Callable[[ZipFile], Iterable[object]], *, compression: int = ZIP_DEFLATED) -> Iterator[bytes]:
+    """Yield the bytes of the zip archive that ``write(zf)`` fills in.
+
+    ``write`` is a generator; each of its yields flushes what was written so far.
+    """
+    sink = _Sink()
+    with ZipFile(sink, "w", compression) as zf:
+        for _step in write(zf):
+            if data := sink.take():
+                yield data
+    if data := sink.take():
+        yield data
+
+
+def write_path(zf: ZipFile, arcname: str, path: Path) -> Iterator[None]:
+    """Add ``path`` to ``zf`` in chunks, yielding after each one (for ``stream_zip``)."""
+    force_zip64 = path.stat().st_size > ZIP64_LIMIT
+    with path.open("rb") as src, zf.open(arcname, "w", force_zip64=force_zip64) as dst:
+        while chunk := src.read(CHUNK_SIZE):
+            dst.write(chunk)
+            yield
@@ -79,6 +79,8 @@ interface Props {
   inputType?: string;
   allowNew?: boolean;
   submitOnEnterWhenNoMatch?: boolean;
+  /** Result counts by slug; tags counted as 0 are not suggested. */
+  tagCounts?: Record<string, number>;
 }
 
 export function TagPicker({
@@ -91,6 +93,7 @@ export function TagPicker({
   inputType = "text",
   allowNew = true,
   submitOnEnterWhenNoMatch = false,
+  tagCounts,
 }: Props) {
   const [tags, setTags] = useState<TagOption[]>(cachedTags || []);
   const [query, setQuery] = useState(initialQuery);
@@ -116,7 +119,7 @@ export function TagPicker({
       : tags
           .filter(
             (tag) =>
-              !selectedSlugs.has(tag.slug) && (
+              !selectedSlugs.has(tag.slug) && tagCounts?.[tag.slug] !== 0 && (
                 tag.name.toLowerCase().includes(tagQuery.toLowerCase()) ||
                 (tag.fullName || "").toLowerCase().includes(tagQuery.toLowerCase())
               ),
@@ -311,6 +314,7 @@ export function TagPicker({
             >
               {tag.name}
               {tag.fullName && tag.fullName !== tag.name && <span className="tag-picker-full-name"> {tag.fullName}</span>}
+              {tagCounts?.[tag.slug] !== undefined && <span className="tag-picker-count"> ({tagCounts[tag.slug]})</span>}
             </li>
           ))}
         </ul>
@@ -338,6 +342,7 @@ function ManagedTagPicker({
   inputType,
   allowNew,
   submitOnEnterWhenNoMatch,
+  tagCounts,
 }: {
   initialSlugs: string[];
   initialNames: string[];
@@ -348,6 +353,7 @@ function ManagedTagPicker({
   inputType?: string;
   allowNew: boolean;
   submitOnEnterWhenNoMatch: boolean;
+  tagCounts?: Record<string, number>;
 }) {
   const [selected, setSelected] = useState<SelectedTag[]>(
     initialSlugs.map((slug, i) => ({
@@ -367,6 +373,7 @@ function ManagedTagPicker({
       inputType={inputType}
       allowNew={allowNew}
       submitOnEnterWhenNoMatch={submitOnEnterWhenNoMatch}
+      tagCounts={tagCounts}
     />
   );
 }
@@ -383,6 +390,9 @@ function mountTagPicker(el: HTMLElement) {
   const inputType = el.dataset.inputType || undefined;
   const allowNew = el.dataset.allowNew !== "0";
   const submitOnEnterWhenNoMatch = el.dataset.submitOnEnter === "1";
+  const tagCounts = el.dataset.tagCounts
+    ? (JSON.parse(el.dataset.tagCounts) as Record<string, number>)
+    : undefined;
 
   hydrateRoot(
     el,
@@ -396,6 +406,7 @@ function mountTagPicker(el: HTMLElement) {
       inputType={inputType}
       allowNew={allowNew}
       submitOnEnterWhenNoMatch={submitOnEnterWhenNoMatch}
+      tagCounts={tagCounts}
     />,
   );
 }
@@ -1,15 +1,35 @@
 import { stdin, stdout } from "node:process";
 import { renderLatex } from "../shared/markdown-render";
 
+interface RenderPayload {
+  source?: string;
+  attachmentPaths?: Record<string, string>;
+  items?: RenderPayload[];
+}
+
+function render(payload: RenderPayload): unknown {
+  return renderLatex(payload.source || "", {
+    attachmentPaths: payload.attachmentPaths || {},
+  });
+}
+
+function renderItem(payload: RenderPayload): { result?: unknown; error?: string } {
+  try {
+    return { result: render(payload) };
+  } catch (error) {
+    return { error: error instanceof Error ? error.message : String(error) };
+  }
+}
+
 let input = "";
 stdin.setEncoding("utf8");
 stdin.on("data", (chunk) => {
   input += chunk;
 });
 stdin.on("end", () => {
-  const payload = JSON.parse(input || "{}");
-  const result = renderLatex(payload.source || "", {
-    attachmentPaths: payload.attachmentPaths || {},
-  });
+  const payload = JSON.parse(input || "{}") as RenderPayload;
+  // A batch ({"items": [...]}) renders many fragments in one process;
+  // per-item errors must not fail the whole batch.
+  const result = Array.isArray(payload.items) ? payload.items.map(renderItem) : render(payload);
   stdout.write(JSON.stringify(result));
 });
@@ -0,0 +1,76 @@
+import { stdin, stdout } from "node:process";
+import { renderLatex, renderMarkdown } from "../shared/markdown-render";
+
+// Long-lived renderer used by skoljka/utils/render_service.py. Requests and
+// responses are single-line JSON objects, answered in order.
+
+interface RenderRequest {
+  id?: number;
+  kind?: string;
+  source?: string;
+  attachmentUrls?: Record<string, string>;
+  attachmentPaths?: Record<string, string>;
+  items?: RenderRequest[];
+}
+
+interface BatchItemResult {
+  result?: unknown;
+  error?: string;
+}
+
+function handle(request: RenderRequest): unknown {
+  if (request.kind === "ping") {
+    return { ok: true };
+  }
+  if (request.kind === "markdown") {
+    return renderMarkdown(request.source || "", {
+      attachmentUrls: request.attachmentUrls || {},
+    });
+  }
+  if (request.kind === "latex") {
+    return renderLatex(request.source || "", {
+      attachmentPaths: request.attachmentPaths || {},
+    });
+  }
+  if (request.kind === "batch") {
+    // Per-item errors must not fail the whole batch.
+    return (request.items || []).map((item): BatchItemResult => {
+      try {
+        return { result: handle(item) };
+      } catch (error) {
+        return { error: errorMessage(error) };
+      }
+    });
+  }
+  throw new Error(`Unknown render request kind: ${request.kind}`);
+}
+
+function errorMessage(error: unknown): string {
+  return error instanceof Error ? error.message : String(error);
+}
+
+function respond(line: string): void {
+  let id: number | null = null;
+  try {
+    const request = JSON.parse(line) as RenderRequest;
+    id = request.id ?? null;
+    stdout.write(JSON.stringify({ id, result: handle(request) }) + "\n");
+  } catch (error) {
+    stdout.write(JSON.stringify({ id, error: errorMessage(error) }) + "\n");
+  }
+}
+
+let buffer = "";
+stdin.setEncoding("utf8");
+stdin.on("data", (chunk) => {
+  buffer += chunk;
+  let newline = buffer.indexOf("\n");
+  while (newline >= 0) {
+    const line = buffer.slice(0, newline);
+    buffer = buffer.slice(newline + 1);
+    if (line.trim()) {
+      respond(line);
+    }
+    newline = buffer.indexOf("\n");
+  }
+});